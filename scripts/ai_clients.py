@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""AI 提供商的 HTTP 客户端
+
+每个提供商一个长连接的 requests.Session，同一次运行里的所有请求共用。
+以前每次 requests.post 都要重新做 DNS 解析、TCP 握手和 TLS 握手，
+一次运行生成好几篇文章时这部分开销是白付的。
+
+连接超时和读取超时分开设置：连不上应该很快失败，
+而生成长文时服务端本来就要算几十秒，读取超时要留足。
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+
+from provider_router import ProviderError
+
+# 各提供商的对话接口地址
+PROVIDER_ENDPOINTS = {
+    "openai": "https://api.openai.com/v1/chat/completions",
+    "zhipu": "https://open.bigmodel.cn/api/paas/v4/chat/completions",
+    "claude": "https://api.anthropic.com/v1/messages",
+    # 通义千问的 OpenAI 兼容接口，请求/响应/流式格式都和 OpenAI 一致
+    "qwen": "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions",
+}
+
+# Claude 不用 Bearer 认证，而是 x-api-key 加版本头
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+class StreamStalledError(Exception):
+    """流式响应太久没有新内容，提前放弃，而不是干等读取超时"""
+    pass
+
+
+class ConnectionStats:
+    """统计新建连接数和请求数，两者之差就是复用的次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+
+    def record_open(self) -> None:
+        with self._lock:
+            self.opened += 1
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.opened)
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """在连接池真正新建连接时计数的适配器"""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.record_open()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.record_open()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class ProviderClient:
+    """单个提供商的 HTTP 客户端，持有一个带连接池的 Session"""
+
+    def __init__(self, name: str, endpoint: str, pool_size: int = 4,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0):
+        self.name = name
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = ConnectionStats()
+
+        self.session = requests.Session()
+        # 重试交给上层处理，这里不让 urllib3 静默重发
+        adapter = CountingHTTPAdapter(self.stats, pool_connections=1,
+                                      pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+    def post_json(self, payload: Dict, api_key: str,
+                  headers: Optional[Dict] = None, **kwargs) -> requests.Response:
+        """向对话接口发送一个 JSON 请求"""
+        if self.name == "claude":
+            request_headers = {"x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION}
+        else:
+            request_headers = {"Authorization": f"Bearer {api_key}"}
+        if headers:
+            request_headers.update(headers)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(self.endpoint, json=payload, headers=request_headers, **kwargs)
+
+    def stream_chat(self, payload: Dict, api_key: str,
+                    stall_timeout: float = 20.0) -> Iterator[str]:
+        """以 SSE 流式调用对话接口，逐段产出模型生成的文字
+
+        OpenAI、智谱和通义千问的流式格式相同：每行 "data: {json}"，以 "data: [DONE]" 结束。
+        stall_timeout 同时用作 socket 读取超时和"多久没有新文字"的上限：
+        服务端只发心跳、或者干脆不发数据时，都会在 stall_timeout 秒后中止。
+        """
+        payload = {**payload, "stream": True}
+        connect_timeout = self.timeout[0]
+        response = self.post_json(payload, api_key, stream=True,
+                                  timeout=(connect_timeout, stall_timeout))
+        try:
+            if response.status_code != 200:
+                # 和非流式调用一样抛 ProviderError，重试逻辑才能按状态码和 Retry-After 处理
+                raise ProviderError(self.name, response.status_code, response.text, response.headers)
+
+            last_content = time.monotonic()
+            # 按字节读、逐行按 UTF-8 解码：text/event-stream 常常不带 charset，
+            # decode_unicode=True 会退回 ISO-8859-1，中文全部变成乱码
+            for raw in response.iter_lines():
+                if time.monotonic() - last_content > stall_timeout:
+                    raise StreamStalledError(f"{self.name} 已经 {stall_timeout} 秒没有返回新内容")
+                line = raw.decode('utf-8')
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    last_content = time.monotonic()
+                    yield delta
+        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            # 读响应体时超时，requests 会把它包装成 ConnectionError 抛出
+            if isinstance(e, requests.exceptions.ReadTimeout) or \
+                    any(isinstance(arg, ReadTimeoutError) for arg in e.args):
+                raise StreamStalledError(f"{self.name} 已经 {stall_timeout} 秒没有返回数据") from e
+            raise
+        finally:
+            response.close()
+
+    def describe_stats(self) -> str:
+        return (f"{self.name}: 请求 {self.stats.requests} 次，"
+                f"新建连接 {self.stats.opened} 次，复用 {self.stats.reused} 次")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def create_client(provider: str, http_config: Optional[Dict] = None) -> ProviderClient:
+    """按 config.json 里的 http 配置创建某个提供商的客户端"""
+    if provider not in PROVIDER_ENDPOINTS:
+        raise ValueError(f"不支持的AI提供商: {provider}")
+    http_config = http_config or {}
+    return ProviderClient(
+        provider,
+        PROVIDER_ENDPOINTS[provider],
+        pool_size=http_config.get("pool_size", 4),
+        connect_timeout=http_config.get("connect_timeout", 5.0),
+        read_timeout=http_config.get("read_timeout", 60.0),
+    )
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""文章索引：articles.json 快照 + 只追加的事件日志
+
+以前每生成一篇文章都要把整个 articles.json 读进来、按 slug 过滤、插到开头、
+再整份带缩进写回去，单篇成本随文章库线性增长；两个进程同时写还会互相覆盖。
+
+现在生成文章只往 articles.journal.jsonl 追加一行事件（O(1)）：
+    {"op": "add", "article": {...}}
+    {"op": "retitle", "slug": "...", "title": "..."}
+    {"op": "delete", "slug": "..."}
+读取时在快照上重放日志得到当前索引；compact() 把结果写回 articles.json
+（前端只读这个文件）并清空日志。追加和压缩都持有同一把文件锁。
+
+每次写 articles.json 的同时还会输出一份分片布局（都是压缩过的 JSON）：
+    data/articles/manifest.json        总数、分类、分片列表、内容哈希
+    data/articles/page-<n>.json        按新→旧每 page_size 条一页
+    data/articles/<分类slug>-<n>.json  每个分类单独分页（没有英文 slug 的分类用 cat-<名称哈希>）
+首页只需要 manifest 和第一页，传输量不再随文章库增长。
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 本地调试时没有 fcntl，只能不加锁
+    fcntl = None
+
+SNAPSHOT_PATH = 'articles.json'
+JOURNAL_PATH = 'articles.journal.jsonl'
+SHARD_DIR = 'data/articles'
+PAGE_SIZE = 20
+
+# 分类对应的英文 slug，文章 URL 和分类分片文件名共用
+CATEGORY_SLUGS = {
+    '品种介绍': 'breed',
+    '幼猫护理': 'kitten-care',
+    '用品测评': 'product-review',
+    '健康护理': 'health-care',
+    '行为训练': 'behavior-training',
+    '营养饮食': 'nutrition'
+}
+
+
+def category_shard_slug(category: str) -> str:
+    """分类分片的文件名前缀；没有对应英文 slug 的分类按名称哈希区分，互不覆盖"""
+    slug = CATEGORY_SLUGS.get(category)
+    if slug:
+        return slug
+    return 'cat-' + hashlib.sha1(category.encode('utf-8')).hexdigest()[:8]
+
+
+def replay(articles: List[Dict], events: Iterable[Dict]) -> List[Dict]:
+    """在索引快照（新→旧）上按顺序应用事件"""
+    articles = list(articles)
+    for event in events:
+        op = event.get('op')
+        if op == 'add':
+            entry = event['article']
+            # 同一个 slug 只保留一条：磁盘上 articles/<slug>.html 会被覆盖，
+            # 索引里再留一条旧的就会出现"一个 URL 对应多条记录"
+            articles = [a for a in articles if a.get('slug') != entry['slug']]
+            articles.insert(0, entry)
+        elif op == 'retitle':
+            articles = [{**a, 'title': event['title']} if a.get('slug') == event['slug'] else a
+                        for a in articles]
+        elif op == 'delete':
+            articles = [a for a in articles if a.get('slug') != event['slug']]
+        else:
+            print(f"⚠️  索引日志里有不认识的事件，已忽略：{event}")
+    return articles
+
+
+def _minified(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _paginate(articles: List[Dict], page_size: int) -> List[List[Dict]]:
+    return [articles[i:i + page_size] for i in range(0, len(articles), page_size)] or [[]]
+
+
+def write_shards(articles: List[Dict], shard_dir: str = SHARD_DIR,
+                 page_size: int = PAGE_SIZE) -> int:
+    """输出分片布局，返回实际改写的文件数
+
+    内容没变的分片不重写，多出来的旧分片会删掉，git 里只留下真正的变化。
+    """
+    files = {}
+    pages = _paginate(articles, page_size)
+    for n, page in enumerate(pages, 1):
+        files[f'page-{n}.json'] = _minified(page)
+
+    by_category = {}
+    for article in articles:
+        by_category.setdefault(article.get('category', ''), []).append(article)
+    categories = {}
+    for category, entries in by_category.items():
+        slug = category_shard_slug(category)
+        names = []
+        for n, page in enumerate(_paginate(entries, page_size), 1):
+            name = f'{slug}-{n}.json'
+            files[name] = _minified(page)
+            names.append(name)
+        categories[category] = {'slug': slug, 'count': len(entries), 'pages': names}
+
+    manifest = {
+        'version': 1,
+        'total': len(articles),
+        'pageSize': page_size,
+        'pages': [f'page-{n}.json' for n in range(1, len(pages) + 1)],
+        'categories': categories,
+        # 前端可以用它判断缓存的分片是否过期
+        'hash': hashlib.sha256(_minified(articles)).hexdigest()[:16],
+    }
+    files['manifest.json'] = _minified(manifest)
+
+    os.makedirs(shard_dir, exist_ok=True)
+    written = 0
+    for name, data in files.items():
+        path = os.path.join(shard_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    continue
+        except FileNotFoundError:
+            pass
+        with open(path, 'wb') as f:
+            f.write(data)
+        written += 1
+
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name not in files:
+            os.remove(os.path.join(shard_dir, name))
+            written += 1
+    return written
+
+
+class ArticleIndex:
+    """articles.json 的读写入口"""
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH, journal_path: str = JOURNAL_PATH,
+                 shard_dir: str = SHARD_DIR, page_size: int = PAGE_SIZE):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.shard_dir = shard_dir
+        self.page_size = page_size
+        self.lock_path = snapshot_path + '.lock'
+        # 解析过的快照和当时文件的 (mtime, 大小)；同一个对象在进程里反复 load()
+        # （统一构建时生成、合并、sitemap、feed 共用一个）只解析一次 articles.json
+        self._snapshot = None
+        self._snapshot_stat = None
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, events: List[Dict]) -> None:
+        """把事件追加到日志末尾"""
+        if not events:
+            return
+        lines = ''.join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) + '\n' for e in events)
+        with self._locked():
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def add(self, article_infos: List[Dict]) -> None:
+        """登记新文章；article_infos 按新→旧排列，和 articles.json 的顺序一致"""
+        self.append([{'op': 'add', 'article': info} for info in reversed(article_infos)])
+
+    def retitle(self, slug: str, title: str) -> None:
+        self.append([{'op': 'retitle', 'slug': slug, 'title': title}])
+
+    def delete(self, slug: str) -> None:
+        self.append([{'op': 'delete', 'slug': slug}])
+
+    def load_snapshot(self) -> List[Dict]:
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return []
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._snapshot_stat != key:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                self._snapshot = json.load(f)
+            self._snapshot_stat = key
+        return list(self._snapshot)
+
+    def load_journal(self) -> List[Dict]:
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def pending_events(self) -> int:
+        return len(self.load_journal())
+
+    def load(self) -> List[Dict]:
+        """当前索引：快照加上还没压缩的日志"""
+        return replay(self.load_snapshot(), self.load_journal())
+
+    def _write_snapshot(self, articles: List[Dict]) -> None:
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+        stat = os.stat(self.snapshot_path)
+        self._snapshot, self._snapshot_stat = list(articles), (stat.st_mtime_ns, stat.st_size)
+        if self.shard_dir:
+            write_shards(articles, self.shard_dir, self.page_size)
+
+    def write_snapshot(self, articles: List[Dict]) -> None:
+        """整份替换索引，删除日志
+
+        articles 必须已经包含日志里的全部事件。基于当前内容修改时用 rewrite()：
+        先 load() 再调用这里，两步之间追加的事件会随日志一起丢掉。
+        """
+        with self._locked():
+            self._replace_all(articles)
+
+    def _replace_all(self, articles: List[Dict]) -> None:
+        self._write_snapshot(articles)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def rewrite(self, transform: Callable[[List[Dict]], List[Dict]],
+                dry_run: bool = False) -> Tuple[List[Dict], List[Dict]]:
+        """在追加日志用的同一把锁里读出当前索引、transform 后整份写回（清洗脚本用）
+
+        返回 (修改前, 修改后)；dry_run 时只计算不写入。
+        """
+        with self._locked():
+            before = self.load()
+            after = transform(list(before))
+            if not dry_run:
+                self._replace_all(after)
+        return before, after
+
+    def compact(self) -> List[Dict]:
+        """把日志合并进 articles.json 并删除日志，返回合并后的索引"""
+        with self._locked():
+            events = self.load_journal()
+            articles = replay(self.load_snapshot(), events)
+            if events:
+                self._write_snapshot(articles)
+                os.remove(self.journal_path)
+            elif self.shard_dir and not os.path.exists(os.path.join(self.shard_dir, 'manifest.json')):
+                # 第一次运行：还没有分片就补一份
+                write_shards(articles, self.shard_dir, self.page_size)
+        return articles
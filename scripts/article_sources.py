@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""文章源文件：sources/<slug>.json.gz
+
+以前一篇文章留下的只有最终的 HTML，模型返回的 Markdown 渲染完就扔了，
+所以像 backfill_article_style.py 这样的修补只能拿正则去改 479 个 HTML 文件。
+现在生成文章时同时保存 Markdown 原文和元数据（gzip 压缩的 JSON）：
+
+    {"version": 1, "slug", "title", "category", "date", "markdown"}
+
+rebuild.py 可以随时用当前的模板和渲染器从源文件重建全部页面。
+
+没有 Markdown 原文的旧文章可以用 rebuild.py --import-html 从现有页面导入：
+记录里存的是正文 HTML、描述和阅读时间（"body_html"、"description"、
+"read_time"），重建时只换掉正文外面的页面模板。
+"""
+
+import gzip
+import json
+import os
+import re
+from typing import Dict, Iterator, Optional
+
+from page_template import article_page_values, article_template
+
+SOURCES_DIR = 'sources'
+SOURCE_SUFFIX = '.json.gz'
+FORMAT_VERSION = 1
+
+# 旧模板页面里的正文（文章内广告不算正文）；rebuild.py --import-html 导入旧页面、
+# generate_rss.py 给没有源文件的文章出全文订阅都用它
+LEGACY_BODY = re.compile(r'<div class="article-body">\s*(.*?)\s*(?:<!-- 文章内广告 -->.*?)?</div>\s*'
+                         r'<footer class="article-footer">', re.S)
+
+
+def source_path(slug: str, sources_dir: str = SOURCES_DIR) -> str:
+    return os.path.join(sources_dir, slug + SOURCE_SUFFIX)
+
+
+def make_source(slug: str, title: str, category: str, date: str,
+                markdown: Optional[str] = None, **extra) -> Dict:
+    record = {"version": FORMAT_VERSION, "slug": slug, "title": title,
+              "category": category, "date": date}
+    if markdown is not None:
+        record["markdown"] = markdown
+    record.update(extra)
+    return record
+
+
+def save_source(record: Dict, sources_dir: str = SOURCES_DIR) -> str:
+    """原子写入源文件；mtime 固定为 0，内容不变时压缩结果逐字节相同"""
+    os.makedirs(sources_dir, exist_ok=True)
+    path = source_path(record['slug'], sources_dir)
+    data = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_source(path: str) -> Dict:
+    with gzip.open(path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def iter_source_paths(sources_dir: str = SOURCES_DIR) -> Iterator[str]:
+    """按文件名排序列出所有源文件"""
+    try:
+        names = sorted(e.name for e in os.scandir(sources_dir)
+                       if e.is_file() and e.name.endswith(SOURCE_SUFFIX))
+    except FileNotFoundError:
+        return
+    for name in names:
+        yield os.path.join(sources_dir, name)
+
+
+def render_source(record: Dict, base_url: str, style_mode: str = 'inline') -> bytes:
+    """用当前模板把一条源记录渲染成完整页面（UTF-8 字节）"""
+    if 'markdown' in record:
+        values = article_page_values(record['title'], record['category'], record['markdown'],
+                                     record['date'], record['slug'], base_url)
+    else:
+        # 从旧页面导入的记录：正文、描述、阅读时间都是现成的
+        values = article_page_values(record['title'], record['category'], '',
+                                     record['date'], record['slug'], base_url,
+                                     body_html=record['body_html'])
+        values['description'] = record.get('description', '')
+        values['read_time'] = str(record.get('read_time', 1))
+    return article_template(base_url, style_mode).render_bytes(**values)
@@ -8,8 +8,22 @@
 
 generate_article.py 生成新文章、backfill_article_style.py 回填旧文章，
 都用这里的同一份内容。
+
+内联的代价是每个页面都带着同一份 4 KB 的样式，每次访问都重新下载。
+config.json 的 style.mode 设为 "external" 时改用外部样式表：
+
+- 完整样式压缩后写成 public/assets/css/article.<内容哈希>.css，文件名随内容变，
+  可以放心长期缓存；public/ 会被 Vite 原样复制进 dist，不会再出现 404；
+- 页面里只内联首屏需要的那部分（CRITICAL_SELECTORS，约 1.8 KB），即使样式表
+  加载失败，页面也不是裸 HTML。
+
+默认仍是 "inline"，输出和以前逐字节相同。
 """
 
+import hashlib
+import os
+import re
+
 # <style> 标签的完整内容（含标签本身），可直接插入 <head>
 ARTICLE_STYLE = """<style>
     :root {
@@ -129,3 +143,72 @@ ARTICLE_STYLE = """<style>
         .article-header h1 { font-size: 1.5rem; }
     }
 </style>"""
+
+
+STYLE_MODES = ('inline', 'external')
+STYLESHEET_DIR = 'public/assets/css'
+# 站点上的访问路径（public/ 对应站点根目录）
+STYLESHEET_URL_PREFIX = '/assets/css/'
+
+# 首屏会用到的规则：页头、文章标题区和正文开头（按压缩后的选择器精确匹配）
+CRITICAL_SELECTORS = frozenset((
+    ':root', '*', 'body', 'a', 'img',
+    '.site-header', '.nav-container', '.nav-logo h1', '.nav-logo a', '.nav-menu', '.nav-menu a',
+    '.main-content', '.article-page', '.article-header', '.article-header h1',
+    '.article-meta-top', '.article-category',
+    '.article-body', '.article-body h2', '.article-body p',
+    '.ad-container', '.ad-container:empty',
+    '@media (max-width:600px)',
+))
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def split_rules(css: str):
+    """把样式拆成顶层规则（@media 整块算一条），返回 [(选择器, 规则文本)]"""
+    rules = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(css):
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                rule = css[start:i + 1]
+                rules.append((rule[:rule.index('{')].strip(), rule))
+                start = i + 1
+    return rules
+
+
+ARTICLE_CSS = minify_css(ARTICLE_STYLE[len('<style>'):-len('</style>')])
+CRITICAL_CSS = ''.join(rule for selector, rule in split_rules(ARTICLE_CSS) if selector in CRITICAL_SELECTORS)
+STYLESHEET_NAME = f"article.{hashlib.sha256(ARTICLE_CSS.encode('utf-8')).hexdigest()[:10]}.css"
+
+
+def style_markup(mode: str = 'inline') -> str:
+    """页面 <head> 里的样式部分"""
+    if mode == 'inline':
+        return ARTICLE_STYLE
+    if mode == 'external':
+        return (f'<style data-critical>{CRITICAL_CSS}</style>\n'
+                f'    <link rel="stylesheet" href="{STYLESHEET_URL_PREFIX}{STYLESHEET_NAME}">')
+    raise ValueError(f"不支持的样式模式: {mode}（可选 {', '.join(STYLE_MODES)}）")
+
+
+def write_stylesheet(stylesheet_dir: str = STYLESHEET_DIR) -> str:
+    """写出带哈希的完整样式表（已存在就不动），返回路径
+
+    旧哈希的文件保留，还没重建的页面可能仍在引用它们。
+    """
+    path = os.path.join(stylesheet_dir, STYLESHEET_NAME)
+    if not os.path.exists(path):
+        os.makedirs(stylesheet_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(ARTICLE_CSS + '\n')
+    return path
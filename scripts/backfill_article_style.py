@@ -10,88 +10,42 @@
 地址搜索引擎不认，尤其是有 9 个旧文件的 <link rel="canonical"> 就指向它——
 等于告诉 Google"我的规范地址是首页"，页面永远不会被单独收录。
 
-脚本可以重复运行，已经处理过的文件会跳过。
+这几项修补现在都是 html_migrations.py 里注册的迁移（0001 去掉失效样式表、
+0002 样式、0003 hash 地址），跳过检查、并行、构建清单记录都在那边实现；
+这个脚本保留原来的命令行和 backfill() 接口，等价于运行 html_migrations.py。
+
+也用来在两种样式模式之间迁移（见 article_style.py）：--style-mode external
+把整份内联样式换成首屏样式加带哈希的外部样式表，并写出样式表文件；
+--style-mode inline 换回来；不指定时跟随 config.json 的 style.mode。
+样式内容改过之后重跑一遍，旧版本也会被换掉。
 
 用法：
     python scripts/backfill_article_style.py            # 实际写入
     python scripts/backfill_article_style.py --dry-run  # 只看会改什么
+    python scripts/backfill_article_style.py --style-mode external
+    python scripts/backfill_article_style.py --workers 4
 """
 
 import os
-import re
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from article_style import ARTICLE_STYLE
-
-# 原来那行指向不存在文件的样式表引用
-STYLESHEET_LINK = re.compile(r'[ \t]*<link rel="stylesheet" href="\.\./assets/css/style\.css">\n?')
-# 判断是否已经回填过
-STYLE_MARKER = '--accent: #ff6b6b;'
-# 任何指向 /#/stories/<slug> 的地址：canonical、og:url、微博分享 …
-HASH_STORY_URL = re.compile(r'(https?://[^\s"\'<>]*?)/#/stories/([A-Za-z0-9_-]+)')
+from html_migrations import main as migrate_main, migrate_file, migrations_for, probe_file
 
 
-def backfill(path: str, dry_run: bool = False) -> dict:
+def backfill(path: str, dry_run: bool = False, style_mode: str = 'inline') -> dict:
     """处理单个文件，返回本次做了哪些改动"""
-    with open(path, 'r', encoding='utf-8') as f:
-        html = f.read()
-
-    original = html
-    changes = {'style': False, 'urls': 0}
-
-    # 1) 去掉失效的外链样式表
-    html, removed = STYLESHEET_LINK.subn('', html)
-
-    # 2) 插入内联样式（已经有就不重复插）
-    if STYLE_MARKER not in html:
-        if '</head>' in html:
-            html = html.replace('</head>', f'    {ARTICLE_STYLE}\n</head>', 1)
-            changes['style'] = True
-        else:
-            print(f"⚠️  {path} 找不到 </head>，跳过样式注入")
-    elif removed:
-        changes['style'] = True
-
-    # 3) 把所有 hash 地址改成真实的静态页地址
-    html, n = HASH_STORY_URL.subn(r'\1/articles/\2.html', html)
-    changes['urls'] = n
-
-    if html != original and not dry_run:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(html)
-
-    return changes
-
-
-def main():
-    dry_run = '--dry-run' in sys.argv
-
-    # 允许从 scripts/ 或项目根目录运行
-    if os.path.basename(os.getcwd()) == 'scripts':
-        os.chdir('..')
-
-    articles_dir = 'articles'
-    if not os.path.isdir(articles_dir):
-        print(f"❌ 找不到目录 {articles_dir}/")
-        return 1
-
-    files = sorted(f for f in os.listdir(articles_dir) if f.endswith('.html'))
-    styled = url_files = url_total = 0
+    result = migrate_file(path, migrations_for(style_mode), dry_run)
+    changes = result['changes']
+    return {'style': any(i.startswith(('0001-', '0002-')) for i in changes),
+            'urls': changes.get('0003-real-article-urls', 0),
+            'output': result['output']}
 
-    for name in files:
-        result = backfill(os.path.join(articles_dir, name), dry_run)
-        styled += result['style']
-        if result['urls']:
-            url_files += 1
-            url_total += result['urls']
 
-    prefix = '[dry-run] ' if dry_run else ''
-    print(f"{prefix}共扫描 {len(files)} 个文章页")
-    print(f"{prefix}注入内联样式：{styled} 个")
-    print(f"{prefix}修正 hash 地址：{url_total} 处，涉及 {url_files} 个文件")
-    return 0
+def needs_backfill(path: str, style_mode: str = 'inline') -> bool:
+    """不完整读入文件，判断它是否可能需要处理"""
+    return bool(probe_file(path, migrations_for(style_mode)))
 
 
 if __name__ == '__main__':
-    sys.exit(main())
+    sys.exit(migrate_main())
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""批量生成：把大量提示词打包成一个 JSONL 批处理任务
+
+给新分类一次补 100 多篇文章时，逐篇同步调用要阻塞几百次。批处理模式把所有
+请求写成一个 JSONL 文件一次提交，轮询到完成后一次性取回全部结果。
+
+输入/输出都用 OpenAI Batch API 的格式：
+    输入每行 {"custom_id", "method", "url", "body"}
+    输出每行 {"custom_id", "response": {"status_code", "body"}, "error"}
+
+LocalBatchBackend 是基于本地文件的替身，用于测试，或者手动把别处跑出来的
+结果文件放进任务目录。
+"""
+
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+
+
+class BatchJobError(Exception):
+    """批处理任务失败、过期或超时"""
+    pass
+
+
+def build_batch_line(custom_id: str, payload: Dict) -> Dict:
+    """构造批处理输入文件里的一行"""
+    return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_PATH, "body": payload}
+
+
+def write_batch_input(path: str, lines: List[Dict]) -> None:
+    """把请求写成 JSONL 批处理输入文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+
+def parse_batch_output(text: str) -> Dict[str, str]:
+    """解析批处理输出文件，返回 custom_id → 生成内容；失败的条目不出现在结果里"""
+    results = {}
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        record = json.loads(raw)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            print(f"⚠️  批处理条目 {record.get('custom_id')} 失败：{record.get('error') or response.get('status_code')}")
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+class BatchBackend:
+    """批处理接口的抽象：提交、查询状态、取回结果"""
+
+    def submit(self, input_path: str) -> str:
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """返回 'in_progress'、'completed' 或 'failed'"""
+        raise NotImplementedError
+
+    def fetch_results(self, job_id: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def wait(self, job_id: str, poll_interval: float = 30, timeout: float = 24 * 3600) -> Dict[str, str]:
+        """轮询直到任务结束，返回全部结果"""
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.status(job_id)
+            if state == 'completed':
+                return self.fetch_results(job_id)
+            if state == 'failed':
+                raise BatchJobError(f"批处理任务 {job_id} 失败")
+            if time.monotonic() >= deadline:
+                raise BatchJobError(f"批处理任务 {job_id} 超过 {timeout} 秒仍未完成")
+            print(f"⏳ 批处理任务 {job_id} 状态：{state}，{poll_interval} 秒后再查")
+            time.sleep(poll_interval)
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API：上传文件 → 创建任务 → 轮询 → 下载输出文件"""
+
+    API_BASE = "https://api.openai.com/v1"
+
+    def __init__(self, api_key: str, session=None, timeout=(5, 120)):
+        if session is None:
+            # 不复用对话接口的 ProviderClient.session：它默认带着
+            # Content-Type: application/json，文件上传会被当成 JSON 发出去
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.timeout = timeout
+        self._jobs = {}
+
+    def _check(self, response) -> Dict:
+        if response.status_code != 200:
+            raise BatchJobError(f"OpenAI Batch API调用失败: {response.status_code} - {response.text[:500]}")
+        return response.json()
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, 'rb') as f:
+            uploaded = self._check(self.session.post(
+                f"{self.API_BASE}/files", timeout=self.timeout,
+                # Content-Type 交给 requests 按 multipart 生成（带 boundary）；
+                # 置为 None 会去掉 session 上可能设置的默认值
+                headers={**self.headers, "Content-Type": None},
+                data={"purpose": "batch"}, files={"file": (os.path.basename(input_path), f)}
+            ))
+        job = self._check(self.session.post(
+            f"{self.API_BASE}/batches", headers=self.headers, timeout=self.timeout,
+            json={"input_file_id": uploaded["id"], "endpoint": CHAT_COMPLETIONS_PATH,
+                  "completion_window": "24h"}
+        ))
+        return job["id"]
+
+    def status(self, job_id: str) -> str:
+        job = self._check(self.session.get(f"{self.API_BASE}/batches/{job_id}",
+                                           headers=self.headers, timeout=self.timeout))
+        self._jobs[job_id] = job
+        if job["status"] == "completed":
+            return 'completed'
+        if job["status"] in ("failed", "expired", "cancelled", "cancelling"):
+            return 'failed'
+        return 'in_progress'
+
+    def fetch_results(self, job_id: str) -> Dict[str, str]:
+        job = self._jobs.get(job_id)
+        if job is None or not job.get("output_file_id"):
+            raise BatchJobError(f"批处理任务 {job_id} 没有输出文件")
+        response = self.session.get(f"{self.API_BASE}/files/{job['output_file_id']}/content",
+                                    headers=self.headers, timeout=self.timeout)
+        if response.status_code != 200:
+            raise BatchJobError(f"下载批处理结果失败: {response.status_code}")
+        return parse_batch_output(response.text)
+
+
+class LocalBatchBackend(BatchBackend):
+    """基于本地文件的批处理替身
+
+    每个任务一个目录 <work_dir>/<job_id>/，里面是 input.jsonl；
+    output.jsonl 出现即视为完成。传入 responder(payload) -> str 时提交后
+    立即用它生成输出，测试里不需要任何网络。
+    """
+
+    def __init__(self, work_dir: str = '.cache/batches',
+                 responder: Optional[Callable[[Dict], str]] = None):
+        self.work_dir = work_dir
+        self.responder = responder
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.work_dir, job_id)
+
+    def submit(self, input_path: str) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        with open(input_path, 'r', encoding='utf-8') as src:
+            lines = [json.loads(line) for line in src if line.strip()]
+        write_batch_input(os.path.join(job_dir, 'input.jsonl'), lines)
+
+        if self.responder is not None:
+            with open(os.path.join(job_dir, 'output.jsonl'), 'w', encoding='utf-8') as out:
+                for line in lines:
+                    content = self.responder(line["body"])
+                    out.write(json.dumps({
+                        "custom_id": line["custom_id"],
+                        "response": {"status_code": 200,
+                                     "body": {"choices": [{"message": {"content": content}}]}},
+                        "error": None
+                    }, ensure_ascii=False) + '\n')
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        if os.path.exists(os.path.join(self._job_dir(job_id), 'output.jsonl')):
+            return 'completed'
+        return 'in_progress'
+
+    def fetch_results(self, job_id: str) -> Dict[str, str]:
+        with open(os.path.join(self._job_dir(job_id), 'output.jsonl'), 'r', encoding='utf-8') as f:
+            return parse_batch_output(f.read())
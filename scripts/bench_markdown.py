@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Markdown 渲染微基准：单遍渲染器 vs 旧版 markdown_to_html
+
+已有的 479 篇文章只留下了 HTML，没有 Markdown 原文，所以先从每篇文章的
+正文 HTML 粗略还原出 Markdown 作为语料（标题、列表、加粗、提示框、引用、
+表格），再让两个实现各渲染若干轮，报告 MB/s。
+
+用法：
+    python scripts/bench_markdown.py              # 默认跑 20 轮
+    python scripts/bench_markdown.py --rounds 50
+"""
+
+import argparse
+import glob
+import html
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from markdown_render import render_markdown
+
+BODY = re.compile(r'<div class="article-body">(.*?)</div>\s*<footer class="article-footer">', re.S)
+TAG_RULES = [
+    (re.compile(r'<h([1-6])>(.*?)</h\1>'), lambda m: '#' * int(m.group(1)) + ' ' + m.group(2)),
+    (re.compile(r'<div class="tip-box">💡 <strong>提示：</strong>(.*?)</div>', re.S), lambda m: '> 💡 提示：' + m.group(1)),
+    (re.compile(r'<div class="tip-box">(.*?)</div>', re.S), lambda m: '> ' + m.group(1)),
+    (re.compile(r'<blockquote>(.*?)</blockquote>', re.S), lambda m: '> ' + m.group(1)),
+    (re.compile(r'<tr>(.*?)</tr>', re.S), lambda m: '| ' + ' | '.join(re.findall(r'<t[hd][^>]*>(.*?)</t[hd]>', m.group(1), re.S)) + ' |'),
+    (re.compile(r'\s*<li>(.*?)</li>'), lambda m: '\n- ' + m.group(1)),
+    (re.compile(r'<strong>(.*?)</strong>'), lambda m: '**' + m.group(1) + '**'),
+    (re.compile(r'<em>(.*?)</em>'), lambda m: '*' + m.group(1) + '*'),
+    (re.compile(r'<code>(.*?)</code>'), lambda m: '`' + html.unescape(m.group(1)) + '`'),
+    (re.compile(r'</?(p|ul|ol|table|thead|tbody)[^>]*>'), lambda m: ''),
+]
+
+
+def html_to_markdown(body: str) -> str:
+    """把文章正文 HTML 粗略还原成 Markdown（只用于造基准语料）"""
+    text = body
+    for pattern, repl in TAG_RULES:
+        text = pattern.sub(repl, text)
+    # 表头后补上分隔行
+    text = re.sub(r'^(\|.*\|)\n(?=\|)', lambda m: m.group(1) + '\n|' + ' --- |' * m.group(1).count(' | ') + ' --- |\n',
+                  text, count=0, flags=re.M)
+    return re.sub(r'\n{3,}', '\n\n', text).strip() + '\n'
+
+
+def load_corpus(articles_dir: str = 'articles') -> list:
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(articles_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            match = BODY.search(f.read())
+        if match:
+            corpus.append(html_to_markdown(match.group(1)))
+    return corpus
+
+
+def legacy_markdown_to_html(markdown_text: str) -> str:
+    """旧版 ArticleGenerator.markdown_to_html，原样保留作对照"""
+    html = markdown_text
+
+    # 标题转换
+    html = re.sub(r'^### (.*$)', r'<h3>\1</h3>', html, flags=re.MULTILINE)
+    html = re.sub(r'^## (.*$)', r'<h2>\1</h2>', html, flags=re.MULTILINE)
+    html = re.sub(r'^# (.*$)', r'<h1>\1</h1>', html, flags=re.MULTILINE)
+
+    # 加粗文本
+    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
+
+    # 提示框
+    html = re.sub(r'^> 💡 提示：(.*$)', r'<div class="tip-box">💡 <strong>提示：</strong>\1</div>', html, flags=re.MULTILINE)
+    html = re.sub(r'^> (.*$)', r'<blockquote>\1</blockquote>', html, flags=re.MULTILINE)
+
+    # 列表转换
+    lines = html.split('\n')
+    in_ul = False
+    result_lines = []
+
+    for line in lines:
+        if line.strip().startswith('- '):
+            if not in_ul:
+                result_lines.append('<ul>')
+                in_ul = True
+            result_lines.append(f'  <li>{line.strip()[2:]}</li>')
+        else:
+            if in_ul:
+                result_lines.append('</ul>')
+                in_ul = False
+            result_lines.append(line)
+
+    if in_ul:
+        result_lines.append('</ul>')
+
+    html = '\n'.join(result_lines)
+
+    # 段落转换
+    paragraphs = html.split('\n\n')
+    html_paragraphs = []
+    for p in paragraphs:
+        p = p.strip()
+        if p and not p.startswith('<'):
+            html_paragraphs.append(f'<p>{p}</p>')
+        else:
+            html_paragraphs.append(p)
+
+    return '\n\n'.join(html_paragraphs)
+
+
+def bench(render, corpus: list, rounds: int) -> float:
+    """返回吞吐量（MB/s，按 UTF-8 字节计）"""
+    size = sum(len(text.encode('utf-8')) for text in corpus)
+    for text in corpus:  # 预热
+        render(text)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            render(text)
+    elapsed = time.perf_counter() - started
+    return size * rounds / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown 渲染微基准')
+    parser.add_argument('--rounds', type=int, default=20, help='每个实现渲染整个语料的轮数')
+    parser.add_argument('--articles-dir', default='articles')
+    args = parser.parse_args()
+
+    if os.path.basename(os.getcwd()) == 'scripts':
+        os.chdir('..')
+
+    corpus = load_corpus(args.articles_dir)
+    if not corpus:
+        print(f"❌ {args.articles_dir} 下没有可用的文章")
+        sys.exit(1)
+    size = sum(len(text.encode('utf-8')) for text in corpus)
+    print(f"📚 语料：{len(corpus)} 篇，{size / 1e6:.2f} MB，每个实现 {args.rounds} 轮")
+
+    legacy = bench(legacy_markdown_to_html, corpus, args.rounds)
+    current = bench(render_markdown, corpus, args.rounds)
+    print(f"旧版 markdown_to_html：{legacy:8.2f} MB/s")
+    print(f"render_markdown     ：{current:8.2f} MB/s（{current / legacy:.2f}x）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""统一构建入口
+
+以前每天的工作流要起三个 Python 进程（generate_article.py、generate_sitemap.py、
+generate_rss.py），每个都重新 import、重新探测域名、重新解析 articles.json。
+现在一个进程按顺序跑完各个阶段，共用同一份配置、同一个索引对象和同一份构建清单：
+
+    generate  生成今天的文章（AI 接口）
+    index     把索引日志合并进 articles.json 和分片
+    render    用当前模板从 sources/ 增量重建文章页
+    sitemap   生成 sitemap.xml
+    feeds     生成 RSS / Atom 订阅源
+
+某个阶段失败不影响后面的阶段（比如 AI 接口全挂了，sitemap 和 feed 照样更新），
+最后以非零状态退出。
+
+用法：
+    python scripts/build.py                          # 全部阶段
+    python scripts/build.py --stages sitemap,feeds   # 只跑指定阶段
+    python scripts/build.py --skip generate          # 不生成新文章，只重建产物
+"""
+
+import argparse
+import os
+import sys
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex
+from build_manifest import BuildManifest
+from site_config import load_site_config, site_base_url
+
+
+class BuildContext:
+    """各阶段共用的状态：配置（site_config 缓存）、索引和构建清单各一个对象"""
+
+    def __init__(self, workers: Optional[int] = None, force: bool = False):
+        self.workers = workers
+        self.force = force
+        self.config: Dict = load_site_config()
+        self.base_url = site_base_url()
+        self.style_mode = self.config.get('style', {}).get('mode', 'inline')
+        self.index = ArticleIndex()
+        self._manifest = None
+
+    @property
+    def manifest(self) -> BuildManifest:
+        # 第一次用到时才读：generate 阶段自己写构建清单，必须在它之后再加载
+        if self._manifest is None:
+            self._manifest = BuildManifest()
+        return self._manifest
+
+
+def stage_generate(ctx: BuildContext) -> None:
+    # 生成阶段依赖 AI 客户端等较重的模块，只在需要时导入
+    from generate_article import ArticleGenerator, run_generation
+    generator = ArticleGenerator(article_index=ctx.index)
+    try:
+        run_generation(generator)
+    finally:
+        generator.close_clients()
+
+
+def stage_index(ctx: BuildContext) -> None:
+    pending = ctx.index.pending_events()
+    articles = ctx.index.compact()
+    if pending:
+        print(f"🗂️  索引已合并 {pending} 条新事件，共 {len(articles)} 篇文章")
+    else:
+        print(f"🗂️  索引没有新事件，共 {len(articles)} 篇文章")
+
+
+def stage_render(ctx: BuildContext) -> None:
+    from article_style import write_stylesheet
+    from article_sources import iter_source_paths
+    from rebuild import rebuild
+    if ctx.style_mode == 'external':
+        write_stylesheet()
+    paths = list(iter_source_paths())
+    changed = rebuild(paths, ctx.base_url, workers=ctx.workers, manifest=ctx.manifest,
+                      force=ctx.force, style_mode=ctx.style_mode)
+    ctx.manifest.save()
+    print(f"🧱 源文件 {len(paths)} 篇，{len(changed)} 篇页面有变化")
+
+
+def stage_sitemap(ctx: BuildContext) -> None:
+    from generate_sitemap import SitemapGenerator
+    generator = SitemapGenerator(ctx.base_url)
+    generator.add_static_pages()
+    generator.scan_articles(ctx.index)
+    generator.save_sitemap(ctx.manifest)
+
+
+def stage_feeds(ctx: BuildContext) -> None:
+    from generate_rss import RSSGenerator
+    RSSGenerator(ctx.base_url).save_feeds(ctx.index, ctx.manifest)
+
+
+STAGES: Dict[str, Callable[[BuildContext], None]] = {
+    'generate': stage_generate,
+    'index': stage_index,
+    'render': stage_render,
+    'sitemap': stage_sitemap,
+    'feeds': stage_feeds,
+}
+
+
+def run_pipeline(stages: List[str], ctx: BuildContext) -> List[str]:
+    """按 STAGES 的顺序跑选中的阶段，返回失败的阶段"""
+    failed = []
+    for name in STAGES:
+        if name not in stages:
+            continue
+        print(f"\n▶️  {name}")
+        started = time.perf_counter()
+        try:
+            STAGES[name](ctx)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"❌ 阶段 {name} 失败：{e}")
+            failed.append(name)
+            # 生成失败时已经写出的文章也要进索引，所以后面的阶段照常执行
+            continue
+        print(f"⏱️  {name} 用时 {time.perf_counter() - started:.2f} 秒")
+    return failed
+
+
+def parse_stage_list(value: str) -> List[str]:
+    stages = [s.strip() for s in value.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知的阶段: {', '.join(unknown)}（可选：{', '.join(STAGES)}）")
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='统一构建：生成 → 索引 → 渲染 → sitemap → feed')
+    parser.add_argument('--stages', type=parse_stage_list, default=list(STAGES),
+                        help=f"逗号分隔的阶段，默认全部：{','.join(STAGES)}")
+    parser.add_argument('--skip', type=parse_stage_list, default=[], help='跳过这些阶段')
+    parser.add_argument('--workers', type=int, default=None, help='render 阶段的进程数，默认等于 CPU 核数')
+    parser.add_argument('--force', action='store_true', help='render 阶段忽略构建清单，全部重新渲染')
+    args = parser.parse_args(argv)
+
+    # 允许从 scripts/ 或项目根目录运行
+    if os.path.basename(os.getcwd()) == 'scripts':
+        os.chdir('..')
+
+    stages = [s for s in args.stages if s not in args.skip]
+    started = time.perf_counter()
+    failed = run_pipeline(stages, BuildContext(workers=args.workers, force=args.force))
+    print(f"\n🏁 构建结束，用时 {time.perf_counter() - started:.2f} 秒"
+          + (f"，失败的阶段：{', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""构建清单：data/build-manifest.json
+
+记录每个产物是由什么输入生成的，各个步骤据此只处理真正变了的部分：
+
+    "articles": {slug: {"source": 源文件哈希, "template": 模板版本,
+                        "style": 样式版本, "output": 页面哈希,
+                        "migrations": [已应用的 HTML 迁移 ID]}}
+    "outputs":  {"sitemap.xml": {"input": 内容键, "output": 文件哈希, "parts": [分卷]}, ...}
+
+- rebuild.py：源文件、模板、样式都没变且页面还在的文章直接跳过，不读不写；
+  重新渲染的页面记录整条替换，迁移记录换成渲染时已注册的迁移
+  （它们的修补都已同步进模板）；
+- html_migrations.py：已经应用过全部迁移的页面不再打开，
+  渲染之后才注册的迁移照常执行；
+- sitemap.xml / feed.xml：除了生成时间以外的内容没变，就不重写文件，
+  避免每天 CI 提交一份只改了时间戳的 diff。
+
+模板版本是页面布局加上 page_template.RENDERER_VERSION 的哈希：改布局自动过期，
+渲染代码的输出变了要手动把 RENDERER_VERSION 加一（只改注释、文档不会让全站重建）。
+样式版本是页面里样式部分（随 style.mode 不同，内联完整样式或首屏样式加
+外部样式表链接）的哈希，样式一改依赖它的页面自然就过期了。
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from article_style import style_markup
+from page_template import ARTICLE_LAYOUT, RENDERER_VERSION
+
+MANIFEST_PATH = 'data/build-manifest.json'
+FORMAT_VERSION = 1
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def template_version() -> str:
+    """页面布局 + 渲染器输出版本的哈希"""
+    digest = hashlib.sha256(ARTICLE_LAYOUT.encode('utf-8'))
+    digest.update(f'renderer:{RENDERER_VERSION}'.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def style_version(style_mode: str = 'inline') -> str:
+    return content_hash(style_markup(style_mode))[:12]
+
+
+class BuildManifest:
+    """读写构建清单；只在主进程里用，写入是原子的"""
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        self.articles: Dict[str, Dict] = data.get('articles', {})
+        self.outputs: Dict[str, Dict] = data.get('outputs', {})
+        self.dirty = False
+
+    def article_is_current(self, slug: str, source: str, output_path: str,
+                           style_mode: str = 'inline') -> bool:
+        """源文件、模板、样式都和上次一样，页面也还在"""
+        entry = self.articles.get(slug)
+        return (entry is not None
+                and entry.get('source') == source
+                and entry.get('template') == template_version()
+                and entry.get('style') == style_version(style_mode)
+                and os.path.exists(output_path))
+
+    def record_article(self, slug: str, source: Optional[str], output: Optional[str],
+                       style_mode: str = 'inline', migrations: List[str] = (), **extra) -> None:
+        """记录刚用当前模板渲染的页面
+
+        migrations 是渲染时已注册的迁移 ID（html_migrations.migration_ids），
+        这些不用再对新页面执行；之后注册的迁移仍然是待执行。
+        """
+        entry = {'source': source, 'template': template_version(),
+                 'style': style_version(style_mode), 'output': output,
+                 'migrations': list(migrations)}
+        entry.update(extra)
+        if self.articles.get(slug) != entry:
+            self.articles[slug] = entry
+            self.dirty = True
+
+    def applied_migrations(self, slug: str) -> List[str]:
+        return self.articles.get(slug, {}).get('migrations', [])
+
+    def record_migrations(self, slug: str, ids: List[str], output: Optional[str] = None,
+                          style: Optional[str] = None) -> None:
+        """记录页面已应用的迁移
+
+        ids 是当前注册的全部迁移 ID，直接替换旧记录，已经不存在的迁移
+        （比如换了样式模式之后的旧样式迁移）自然被清掉。
+        output 是迁移后的页面哈希，页面没改动时为 None；style 非空表示样式迁移换了页面样式。
+        """
+        entry = dict(self.articles.get(slug, {}))
+        entry['migrations'] = list(ids)
+        if output is not None:
+            entry['output'] = output
+        if style is not None:
+            entry['style'] = style
+        if self.articles.get(slug) != entry:
+            self.articles[slug] = entry
+            self.dirty = True
+
+    def output_is_current(self, path: str, input_key: str) -> bool:
+        """产物的输入键和上次一样，文件（连同记录的分卷）也都还在"""
+        entry = self.outputs.get(path)
+        return (entry is not None and entry.get('input') == input_key
+                and all(os.path.exists(p) for p in [path] + entry.get('parts', [])))
+
+    def record_output(self, path: str, input_key: str, output: str, **extra) -> None:
+        self.outputs[path] = dict(input=input_key, output=output, **extra)
+        self.dirty = True
+
+    def write_output(self, path: str, input_key: str, produce) -> bool:
+        """生成站点级产物（sitemap、feed）
+
+        input_key 是除生成时间以外全部内容的哈希；和上次一样且文件还在，
+        就不调用 produce()、也不写文件。返回是否写了。
+        """
+        if self.output_is_current(path, input_key):
+            return False
+        data = produce()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.record_output(path, input_key, content_hash(data))
+        return True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {'version': FORMAT_VERSION, 'articles': self.articles, 'outputs': self.outputs}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, ensure_ascii=False, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -19,11 +19,13 @@
     python scripts/dedupe_articles_index.py --dry-run  # 只看会改什么
 """
 
-import json
 import os
 import re
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex
+
 TITLE_RE = re.compile(r'<title>(.*?) - 猫咪世界</title>', re.S)
 
 
@@ -38,20 +40,13 @@ def html_title(path: str):
     return m.group(1).strip() if m else None
 
 
-def main():
-    dry_run = '--dry-run' in sys.argv
-
-    # 允许从 scripts/ 或项目根目录运行
-    if os.path.basename(os.getcwd()) == 'scripts':
-        os.chdir('..')
-
-    with open('articles.json', 'r', encoding='utf-8') as f:
-        articles = json.load(f)
-
+def dedupe(articles, report=None):
+    """按上面的清洗规则处理索引条目，返回保留下来的；report 收集丢弃和改标题的记录"""
+    report = report if report is not None else {}
+    missing = report.setdefault('missing', [])
+    retitled = report.setdefault('retitled', [])
     kept = []
     seen = set()
-    missing = []
-    retitled = []
 
     for article in articles:
         slug = article.get('slug')
@@ -70,6 +65,21 @@ def main():
             article = {**article, 'title': actual}
 
         kept.append(article)
+    return kept
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+
+    # 允许从 scripts/ 或项目根目录运行
+    if os.path.basename(os.getcwd()) == 'scripts':
+        os.chdir('..')
+
+    # 包含还没合并进 articles.json 的索引日志；读、清洗、写回在同一把锁里，
+    # 期间并发追加的新文章不会丢
+    report = {}
+    articles, kept = ArticleIndex().rewrite(lambda items: dedupe(items, report), dry_run)
+    missing, retitled = report['missing'], report['retitled']
 
     print(f"原有 {len(articles)} 条 → 去重后 {len(kept)} 条（删掉 {len(articles) - len(kept)} 条重复记录）")
     if retitled:
@@ -83,8 +93,6 @@ def main():
         print("[dry-run] 未写入 articles.json")
         return 0
 
-    with open('articles.json', 'w', encoding='utf-8') as f:
-        json.dump(kept, f, indent=2, ensure_ascii=False)
     print("✅ 已写入 articles.json")
     return 0
 
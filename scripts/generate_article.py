@@ -6,45 +6,133 @@ AI文章自动生成脚本
 """
 
 import os
-import json
+import copy
 import random
+import argparse
 import datetime
-from typing import Dict, List, Optional
-import requests
-import time
-import re
-from pathlib import Path
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import os
-from dotenv import load_dotenv
+from article_index import CATEGORY_SLUGS, ArticleIndex
+from title_space import TitleSpace
+from used_topics import UsedTopics
+from markdown_render import IncrementalMarkdownRenderer, render_markdown
+from page_template import extract_description, render_article_page
+from article_style import write_stylesheet
+from article_sources import make_source, save_source, source_path
+from build_manifest import BuildManifest, file_hash
+from html_migrations import migration_ids
+from site_config import load_site_config, site_base_url
+from response_cache import ResponseCache, create_cache
+from provider_router import ProviderError, ProviderRouter
+from batch_jobs import (BatchBackend, LocalBatchBackend, OpenAIBatchBackend,
+                        build_batch_line, write_batch_input)
+from throttle import ProviderThrottle, RetryPolicy, ThrottleStats, create_throttle
+
+if TYPE_CHECKING:
+    # ai_clients 会拉进 requests/urllib3，导入要一百多毫秒，只在真正发请求时才导入
+    from ai_clients import ProviderClient
+
+# 各提供商使用的模型；模型和温度都参与缓存键的计算
+PROVIDER_MODELS = {
+    "openai": "gpt-4o",
+    "zhipu": "glm-4",
+    "claude": "claude-3-5-sonnet-latest",
+    "qwen": "qwen-plus",
+}
+DEFAULT_TEMPERATURE = 0.7
+# 这几家的流式接口都是 OpenAI 的 SSE 格式
+STREAMING_PROVIDERS = ("openai", "zhipu", "qwen")
 
-from article_style import ARTICLE_STYLE
 
-load_dotenv()  # 加载 .env 文件
-openai_key = os.getenv("OPENAI_API_KEY")
-claude_key = os.getenv("CLAUDE_API_KEY")
-zhipu_key = os.getenv("ZHIPU_API_KEY")
-qwen_key = os.getenv("QWEN_API_KEY")
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """加载 .env 文件；第一次要用API密钥时才调用，导入本模块不读文件"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
 
 class TopicExhaustedError(Exception):
     """标题模板组合已经用尽，再生成只会和已发布文章重名"""
     pass
 
 
+class GenerationFailedError(Exception):
+    """文章全部生成失败，原因不是标题用尽（通常是AI接口的问题）；__cause__ 是最后一个错误"""
+    pass
+
+
 class ArticleGenerator:
-    def __init__(self, config_file: str = "config.json"):
-        """初始化文章生成器"""
-        # 自动检测并切换到项目根目录
-        self.setup_working_directory()
-        self.config = self.load_config(config_file)
-        self.article_templates = self.load_article_templates()
-        self.used_topics = self.load_used_topics()
+    def __init__(self, config_file: str = "config.json",
+                 article_index: Optional[ArticleIndex] = None):
+        """初始化文章生成器
+
+        构造时不读文件、不切目录、不建目录：配置、已发布文章、标题索引都在
+        第一次用到时才加载（见下面的 cached_property），只用渲染或 slug
+        逻辑的脚本和测试不用为这些付开销。工作目录由 main() 负责切换。
+        统一构建（build.py）会传入共用的索引对象，避免重复读 articles.json。
+        """
+        self.config_file = config_file
+        # articles.json 的读写入口：新文章只往日志里追加，运行结束时统一压缩
+        self.article_index = article_index or ArticleIndex()
+        # 每个提供商一个限流器；重试和等待的统计所有提供商共用
+        self.throttle_stats = ThrottleStats()
+        self._throttles = {}
+        self._throttles_lock = threading.Lock()
+        # 每个提供商一个长连接客户端，整个运行期间复用
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._router = None
+        self._router_lock = threading.Lock()
+
+    @cached_property
+    def config(self) -> Dict:
+        return self.load_config(self.config_file)
+
+    @cached_property
+    def base_url(self) -> str:
+        # 页面、sitemap、feed 用同一个站点地址
+        return site_base_url(self.config_file)
+
+    @cached_property
+    def style_mode(self) -> str:
+        return self.config.get("style", {}).get("mode", "inline")
+
+    @cached_property
+    def response_cache(self) -> Optional[ResponseCache]:
+        return create_cache(self.config.get("cache"))
+
+    @cached_property
+    def article_templates(self) -> List[Dict]:
+        return self.load_article_templates()
+
+    @cached_property
+    def published_articles(self) -> List[Dict]:
         # articles.json 才是"已发布"的权威记录：used_topics.json 可能因为
         # 没被 CI 提交而丢状态，只靠它去重会导致标题撞车、文章互相覆盖
-        self.published_titles = self.load_published_titles()
+        return self.load_published_articles()
+
+    @cached_property
+    def published_titles(self) -> set:
+        return self.load_published_titles(self.published_articles)
+
+    @cached_property
+    def used_topics(self) -> UsedTopics:
+        return self.load_used_topics(self.published_articles)
+
+    @cached_property
+    def title_space(self) -> TitleSpace:
+        # 所有标题组合的索引：已发布/已用/已预留的都标记为占用，抽样只在未用的里面抽
+        return TitleSpace(
+            self.article_templates,
+            used_titles=self.used_topics.titles,
+            used_topics=self.used_topics.topics
+        )
     
     def setup_working_directory(self):
-        """设置正确的工作目录"""
+        """设置正确的工作目录（命令行入口调用）"""
         current_dir = os.getcwd()
         
         # 如果当前在scripts目录，切换到上级目录
@@ -52,38 +140,17 @@ class ArticleGenerator:
             os.chdir('..')
             print(f"工作目录已切换到: {os.getcwd()}")
         
-        # 确保必要的目录存在
-        os.makedirs('articles', exist_ok=True)
-        os.makedirs('assets/images', exist_ok=True)
-        
     def load_config(self, config_file: str) -> Dict:
-        """加载配置文件"""
-        default_config = {
-            "ai_provider": "openai",  # openai, claude, zhipu, qwen
-            "article_length": "medium",  # short, medium, long
-            "articles_per_day": 1,
-            "output_dir": "articles",
-            "images_dir": "assets/images",
-            "base_url": "https://yourusername.github.io/mao.com.cn"
-        }
-        
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                user_config = json.load(f)
-                default_config.update(user_config)
-        except FileNotFoundError:
-            print(f"配置文件 {config_file} 不存在，使用默认配置")
-            # 创建默认配置文件
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
-        
-        return default_config
+        """加载配置文件（校验过、合并了默认值；进程内只读一次，这里拿一份可以改的副本）"""
+        return copy.deepcopy(load_site_config(config_file))
     
     def load_article_templates(self) -> List[Dict]:
         """加载文章模板"""
         return [
             {
                 "category": "品种介绍",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["breed"],
                 "title_patterns": [
                     "{breed}猫品种详解：性格特点与饲养指南",
                     "深度解析{breed}猫：从历史到现代饲养",
@@ -107,6 +174,8 @@ class ArticleGenerator:
             },
             {
                 "category": "幼猫护理",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["age", "topic"],
                 "title_patterns": [
                     "{age}幼猫护理完全指南",
                     "新生幼猫{topic}的专业建议",
@@ -131,6 +200,8 @@ class ArticleGenerator:
             },
             {
                 "category": "用品测评",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["product"],
                 "title_patterns": [
                     "2025年{product}深度测评：{count}款产品对比",
                     "{product}选购指南：性价比分析与推荐",
@@ -155,6 +226,8 @@ class ArticleGenerator:
             },
             {
                 "category": "健康护理",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["condition"],
                 "title_patterns": [
                     "猫咪{condition}预防与治疗指南",
                     "{condition}在猫咪中的表现与应对",
@@ -178,6 +251,8 @@ class ArticleGenerator:
             },
             {
                 "category": "行为训练",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["behavior"],
                 "title_patterns": [
                     "解决猫咪{behavior}问题的有效方法",
                     "猫咪{behavior}训练：从基础到进阶",
@@ -201,6 +276,8 @@ class ArticleGenerator:
             },
             {
                 "category": "营养饮食",
+                # 话题键由这些词决定：同一话题写过一次就不再换个句式重写
+                "topic_slots": ["nutrition"],
                 "title_patterns": [
                     "猫咪{nutrition}营养指南：科学喂养方法",
                     "{nutrition}猫咪饮食全攻略：专家建议",
@@ -224,141 +301,84 @@ class ArticleGenerator:
             }
         ]
     
-    def load_used_topics(self) -> Dict[str, List[str]]:
-        """加载已使用的话题，避免重复"""
-        try:
-            with open('used_topics.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # 兼容旧格式
-                if isinstance(data, list):
-                    return {"topics": data, "titles": [], "categories": {}}
-                return data
-        except FileNotFoundError:
-            return {"topics": [], "titles": [], "categories": {}}
+    def load_used_topics(self, published: Optional[List[Dict]] = None) -> UsedTopics:
+        """加载已使用的话题，避免重复；标题和分类计数与 articles.json 同步"""
+        return UsedTopics.load('used_topics.json', published)
     
     def save_used_topics(self) -> None:
         """保存已使用的话题"""
-        with open('used_topics.json', 'w', encoding='utf-8') as f:
-            json.dump(self.used_topics, f, indent=2, ensure_ascii=False)
+        self.used_topics.save('used_topics.json', self.published_titles)
+
+    def load_published_articles(self) -> List[Dict]:
+        """读取当前索引的全部条目（含还没合并的日志）"""
+        return self.article_index.load()
 
-    def load_published_titles(self) -> set:
+    def load_published_titles(self, articles: Optional[List[Dict]] = None) -> set:
         """从 articles.json 读取所有已发布的标题"""
-        try:
-            with open('articles.json', 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-            titles = {a['title'] for a in articles if a.get('title')}
+        if articles is None:
+            articles = self.load_published_articles()
+        titles = {a['title'] for a in articles if a.get('title')}
+        if titles:
             print(f"📚 已发布 {len(titles)} 个不同标题，将避免重复")
-            return titles
-        except FileNotFoundError:
-            return set()
-
-    def count_available_titles(self) -> int:
-        """粗略统计还剩多少个没用过的标题组合"""
-        import itertools
-        all_titles = set()
-        for t in self.article_templates:
-            option_lists = {k: v for k, v in t.items()
-                            if k not in ('category', 'title_patterns', 'content_structure')}
-            for pattern in t['title_patterns']:
-                names = sorted(set(re.findall(r'\{(\w+)\}', pattern)))
-                pools = []
-                for name in names:
-                    pool = option_lists.get(name) or option_lists.get(name + 's') \
-                        or next((v for k, v in option_lists.items() if k.rstrip('s') == name), None)
-                    pools.append(pool or [])
-                for combo in itertools.product(*pools):
-                    all_titles.add(pattern.format(**dict(zip(names, combo))))
-        return len(all_titles - self.published_titles)
+        return titles
+
+    def count_available_titles(self, category: Optional[str] = None) -> int:
+        """还剩多少个没用过的标题组合（直接读索引，不再枚举）"""
+        return self.title_space.remaining(category)
     
-    def generate_article_idea(self) -> Dict:
-        """生成文章创意"""
-        # 随机抽取，剩余可用标题越少越需要多试几次，避免误判"已用尽"
-        max_attempts = 500
-        attempts = 0
-        
-        while attempts < max_attempts:
-            template = random.choice(self.article_templates)
-            
-            # 根据模板类型生成具体内容
-            if template["category"] == "品种介绍":
-                breed = random.choice(template["breeds"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(breed=breed)
-                topic_key = f"{template['category']}_{breed}"
-
-            elif template["category"] == "幼猫护理":
-                age = random.choice(template["ages"])
-                topic = random.choice(template["topics"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(age=age, topic=topic)
-                topic_key = f"{template['category']}_{age}_{topic}"
-
-            elif template["category"] == "用品测评":
-                product = random.choice(template["products"])
-                count = random.choice(template["counts"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(product=product, count=count)
-                topic_key = f"{template['category']}_{product}"
-
-            elif template["category"] == "健康护理":
-                condition = random.choice(template["conditions"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(condition=condition)
-                topic_key = f"{template['category']}_{condition}"
-
-            elif template["category"] == "行为训练":
-                behavior = random.choice(template["behaviors"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(behavior=behavior)
-                topic_key = f"{template['category']}_{behavior}"
-
-            elif template["category"] == "营养饮食":
-                nutrition = random.choice(template["nutrition"])
-                title_pattern = random.choice(template["title_patterns"])
-                title = title_pattern.format(nutrition=nutrition)
-                topic_key = f"{template['category']}_{nutrition}"
+    def generate_article_idea(self, category: Optional[str] = None) -> Dict:
+        """生成文章创意；指定 category 时只从该分类里抽
+
+        published_titles 来自 articles.json，是跨运行持久的去重依据；
+        少了它，标题撞车会让 articles/<slug>.html 被静默覆盖。
+        这些都已经在 title_space 里标记为占用，抽到的一定是没用过的组合。
+        """
+        if category is not None and category not in self.title_space.spaces:
+            raise ValueError(f"没有分类为 {category} 的文章模板")
+
+        idea = self.title_space.sample(self._category_weights(), category)
+        if idea is not None:
+            return idea
 
-            else:
-                # fallback
-                title = "猫咪博文"
-                topic_key = "unknown"
-
-            # 检查是否已经使用过这个话题或标题
-            # published_titles 来自 articles.json，是跨运行持久的去重依据；
-            # 少了它，标题撞车会让 articles/<slug>.html 被静默覆盖
-            if (title not in self.published_titles and
-                topic_key not in self.used_topics.get("topics", []) and
-                title not in self.used_topics.get("titles", []) and
-                self._check_category_balance(template["category"])):
-                return {
-                    "title": title,
-                    "category": template["category"],
-                    "content_structure": template["content_structure"],
-                    "topic_key": topic_key
-                }
-            
-            attempts += 1
-        
         # 抽不到没用过的标题 = 模板组合已经用尽。
         # 这里绝不能退回 _generate_fallback_idea()：那 3 个写死的标题同样会重名，
         # 只会用另一种方式重新制造"文章互相覆盖"的问题。宁可失败，也不要静默覆盖。
-        remaining = self.count_available_titles()
+        scope = f"分类「{category}」的" if category else ""
         raise TopicExhaustedError(
-            f"试了 {max_attempts} 次都抽不到没用过的标题（剩余可用组合约 {remaining} 个）。"
+            f"{scope}标题模板组合已经用尽（共 {self.title_space.total()} 个组合）。"
             f"请在 load_article_templates() 里扩充 breeds / ages / topics / products / "
             f"conditions / behaviors / nutrition 词表或 title_patterns 后再运行。"
         )
 
-    def _check_category_balance(self, category: str) -> bool:
-        """检查分类平衡，避免某个分类过多"""
-        category_counts = self.used_topics.get("categories", {})
-        current_count = category_counts.get(category, 0)
-        
-        # 如果某个分类已经有3篇以上文章，减少该分类的选择概率
-        if current_count >= 3:
-            return random.random() > 0.7  # 30%的概率仍然选择
+    def reserve_article_ideas(self, count: int, category: Optional[str] = None) -> List[Dict]:
+        """一次性预留 count 个互不重复的文章创意
+
+        预留的标题和话题会立即从候选池里排除，之后并发生成时各线程拿到的
+        创意一定不同。标题中途用尽时返回已经预留到的部分；一个都没有则抛出
+        TopicExhaustedError。
+        """
+        ideas = []
+        for _ in range(count):
+            try:
+                idea = self.generate_article_idea(category)
+            except TopicExhaustedError:
+                if not ideas:
+                    raise
+                print(f"🛑 标题已用尽，只预留到 {len(ideas)} 个创意")
+                break
+            self.title_space.mark_used(idea['title'], idea['topic_key'])
+            ideas.append(idea)
+        return ideas
+
+    def _category_weights(self) -> Dict[str, float]:
+        """分类平衡：抽样时各分类的权重，避免某个分类过多"""
+        category_counts = self.used_topics.categories
         
-        return True
+        # 如果某个分类已经有3篇以上文章，该分类的权重降到 0.3
+        return {
+            category: 0.3 if category_counts.get(category, 0) >= 3 else 1.0
+            for category in self.title_space.spaces
+        }
     
     def _generate_fallback_idea(self) -> Dict:
         """生成备用文章创意"""
@@ -390,76 +410,292 @@ class ArticleGenerator:
         }
     
     def call_ai_api(self, prompt: str, max_tokens: int = 2000) -> str:
-        """调用AI API生成内容"""
-        provider = self.config["ai_provider"]
+        """调用AI API生成内容
 
-        api_key = os.getenv(f"{provider.upper()}_API_KEY", "")
-        if not api_key:
-            raise ValueError(f"未配置 {provider} API密钥")
-        
-        if provider == "openai":
-            return self._call_openai_api(prompt, api_key, max_tokens)
-        elif provider == "claude":
-            return self._call_claude_api(prompt, api_key, max_tokens)
-        elif provider == "zhipu":
-            return self._call_zhipu_api(prompt, api_key, max_tokens)
-        else:
-            raise ValueError(f"不支持的AI提供商: {provider}")
+        先查本地缓存，命中就不发任何网络请求（也不需要API密钥）；
+        没命中再交给 ProviderRouter 按优先级故障转移。
+        """
+        cached = self._lookup_cached_response(prompt, max_tokens)
+        if cached is not None:
+            return cached
+
+        content, provider = self.get_router().call(prompt, max_tokens)
+        self._store_response(provider, prompt, max_tokens, content)
+        return content
+
+    def stream_ai_api(self, prompt: str, max_tokens: int = 2000) -> Iterator[str]:
+        """以流式方式调用AI API，逐段产出生成的文字
+
+        使用优先级最高的健康提供商；它不支持流式、或者还没吐出任何内容就失败时，
+        退回 call_ai_api() 走普通的故障转移。已经吐出内容后再失败则直接抛出。
+        """
+        cached = self._lookup_cached_response(prompt, max_tokens)
+        if cached is not None:
+            yield cached
+            return
+
+        router = self.get_router()
+        healthy = router.healthy_providers()
+        if (not healthy or healthy[0] not in STREAMING_PROVIDERS
+                or not router.breakers[healthy[0]].try_acquire_probe()):
+            yield self.call_ai_api(prompt, max_tokens)
+            return
+
+        provider = healthy[0]
+        stall_timeout = self.config.get("streaming", {}).get("stall_timeout", 20)
+        data = self._chat_payload(provider, prompt, max_tokens)
+        parts = []
+        try:
+            with self.get_throttle(provider).slot(self.estimate_tokens(prompt, max_tokens)):
+                client = self.get_client(provider)
+                for chunk in client.stream_chat(data, self.get_api_key(provider), stall_timeout):
+                    parts.append(chunk)
+                    yield chunk
+        except GeneratorExit:
+            # 调用方中途丢弃了生成器：没有成败结论，让出半开状态的试探名额
+            router.breakers[provider].release_probe()
+            raise
+        except Exception as e:
+            router.breakers[provider].record_failure()
+            if parts:
+                raise
+            print(f"⚠️  {provider} 流式调用失败，改用普通调用：{e}")
+            yield self.call_ai_api(prompt, max_tokens)
+            return
+        router.breakers[provider].record_success()
+
+        # 只缓存完整收完的响应，中途中止的不缓存
+        self._store_response(provider, prompt, max_tokens, ''.join(parts))
+
+    @staticmethod
+    def _chat_payload(provider: str, prompt: str, max_tokens: int) -> Dict:
+        """OpenAI 格式的对话请求体"""
+        return {
+            "model": PROVIDER_MODELS[provider],
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": DEFAULT_TEMPERATURE
+        }
+
+    def get_api_key(self, provider: str) -> str:
+        """读取某个提供商的API密钥（环境变量 <PROVIDER>_API_KEY）"""
+        load_env()
+        return os.getenv(f"{provider.upper()}_API_KEY", "")
+
+    def provider_order(self) -> List[str]:
+        """按优先级排列、且已经配置了API密钥的提供商"""
+        configured = self.config.get("ai_providers") or [self.config["ai_provider"]]
+        for provider in configured:
+            if provider not in PROVIDER_MODELS:
+                raise ValueError(f"不支持的AI提供商: {provider}")
+        return [p for p in configured if self.get_api_key(p)]
+
+    def get_router(self) -> ProviderRouter:
+        """获取（必要时创建）提供商路由，整个运行期间共用熔断状态和耗时统计"""
+        with self._router_lock:
+            if self._router is None:
+                providers = self.provider_order()
+                if not providers:
+                    configured = self.config.get("ai_providers") or [self.config["ai_provider"]]
+                    raise ValueError(f"未配置 {', '.join(configured)} API密钥")
+                self._router = ProviderRouter(providers, self._call_provider, self.config.get("router"),
+                                              self.config.get("concurrency", {}).get("max_workers", 1))
+            return self._router
+
+    def _call_provider(self, provider: str, prompt: str, max_tokens: int) -> str:
+        """向某个提供商发请求：经过限流器，遇到可重试的错误按重试策略重试"""
+        api_key = self.get_api_key(provider)
+        throttle = self.get_throttle(provider)
+
+        def attempt() -> str:
+            with throttle.slot(self.estimate_tokens(prompt, max_tokens)):
+                if provider == "openai":
+                    return self._call_openai_api(prompt, api_key, max_tokens)
+                elif provider == "claude":
+                    return self._call_claude_api(prompt, api_key, max_tokens)
+                elif provider == "zhipu":
+                    return self._call_zhipu_api(prompt, api_key, max_tokens)
+                elif provider == "qwen":
+                    return self._call_qwen_api(prompt, api_key, max_tokens)
+                else:
+                    raise ValueError(f"不支持的AI提供商: {provider}")
+
+        return self.get_retry_policy().run(provider, attempt, throttle)
+
+    def get_retry_policy(self) -> RetryPolicy:
+        """按配置创建重试策略（无状态，计数记在 throttle_stats 里）"""
+        retry = self.config.get("retry", {})
+        return RetryPolicy(
+            max_attempts=retry.get("max_attempts", 4),
+            base_delay=retry.get("base_delay", 1),
+            max_delay=retry.get("max_delay", 30),
+            stats=self.throttle_stats
+        )
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_tokens: int) -> int:
+        """粗略估计一次请求消耗的token数，用于 tokens/min 限流
+
+        中文大约一个字一个token，按字符数估计只会偏多，不会把限额打爆。
+        """
+        return len(prompt) + max_tokens
+
+    def _lookup_cached_response(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """按提供商优先级查缓存，任何一家生成过都直接复用"""
+        if not self.response_cache:
+            return None
+        configured = self.config.get("ai_providers") or [self.config["ai_provider"]]
+        for provider in configured:
+            cache_key = self._response_cache_key(provider, prompt, max_tokens)
+            if not cache_key:
+                continue
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print(f"💾 命中AI响应缓存（{provider}），跳过生成")
+                return cached
+        return None
+
+    def _response_cache_key(self, provider: str, prompt: str, max_tokens: int) -> Optional[str]:
+        """计算缓存键；不认识的提供商没有模型信息，不缓存"""
+        model = PROVIDER_MODELS.get(provider)
+        if model is None:
+            return None
+        return ResponseCache.make_key(provider, model, prompt, max_tokens, DEFAULT_TEMPERATURE)
+
+    def _store_response(self, provider: str, prompt: str, max_tokens: int, content: str) -> None:
+        """把生成结果写进缓存"""
+        cache_key = self._response_cache_key(provider, prompt, max_tokens)
+        if not (self.response_cache and cache_key and content):
+            return
+        self.response_cache.put(cache_key, content, {
+            "provider": provider,
+            "model": PROVIDER_MODELS[provider],
+            "max_tokens": max_tokens,
+            "temperature": DEFAULT_TEMPERATURE,
+            "prompt": prompt
+        })
+
+    def get_throttle(self, provider: str) -> ProviderThrottle:
+        """获取（必要时创建）某个提供商的限流器，同一次运行内所有线程共用"""
+        with self._throttles_lock:
+            throttle = self._throttles.get(provider)
+            if throttle is None:
+                limits = self.config.get("concurrency", {}).get("rate_limits", {}).get(provider)
+                throttle = create_throttle(limits, self.throttle_stats)
+                self._throttles[provider] = throttle
+            return throttle
+
+    def get_client(self, provider: str) -> "ProviderClient":
+        """获取（必要时创建）某个提供商的HTTP客户端"""
+        from ai_clients import create_client
+        with self._clients_lock:
+            client = self._clients.get(provider)
+            if client is None:
+                client = create_client(provider, self.config.get("http"))
+                self._clients[provider] = client
+            return client
+
+    def close_clients(self) -> None:
+        """关闭所有连接，并打印连接复用情况"""
+        print(f"🔁 {self.throttle_stats.describe()}")
+        with self._router_lock:
+            if self._router is not None:
+                print(f"🧭 提供商状态：{self._router.describe()}")
+                self._router.close()
+                self._router = None
+        with self._clients_lock:
+            for client in self._clients.values():
+                print(f"🔌 {client.describe_stats()}")
+                client.close()
+            self._clients.clear()
     
     def _call_openai_api(self, prompt: str, api_key: str, max_tokens: int) -> str:
         """调用OpenAI API"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
-            "model": "gpt-4o",
+            "model": PROVIDER_MODELS["openai"],
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens,
-            "temperature": 0.7
+            "temperature": DEFAULT_TEMPERATURE
         }
         
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=60
-        )
+        response = self.get_client("openai").post_json(data, api_key)
         
         if response.status_code == 200:
             return response.json()["choices"][0]["message"]["content"]
         else:
-            raise Exception(f"OpenAI API调用失败: {response.status_code} - {response.text}")
+            raise ProviderError("openai", response.status_code, response.text, response.headers)
     
     def _call_zhipu_api(self, prompt: str, api_key: str, max_tokens: int) -> str:
         """调用智谱AI API (GLM-4)"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
+        data = {
+            "model": PROVIDER_MODELS["zhipu"],
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": DEFAULT_TEMPERATURE
         }
         
+        response = self.get_client("zhipu").post_json(data, api_key)
+        
+        if response.status_code == 200:
+            return response.json()["choices"][0]["message"]["content"]
+        else:
+            raise ProviderError("zhipu", response.status_code, response.text, response.headers)
+
+    def _call_claude_api(self, prompt: str, api_key: str, max_tokens: int) -> str:
+        """调用Anthropic Claude API（Messages 接口）"""
         data = {
-            "model": "glm-4",
+            "model": PROVIDER_MODELS["claude"],
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens,
-            "temperature": 0.7
+            "temperature": DEFAULT_TEMPERATURE
         }
         
-        response = requests.post(
-            "https://open.bigmodel.cn/api/paas/v4/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=60
-        )
+        response = self.get_client("claude").post_json(data, api_key)
+        
+        if response.status_code == 200:
+            blocks = response.json().get("content", [])
+            return "".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+        else:
+            raise ProviderError("claude", response.status_code, response.text, response.headers)
+
+    def _call_qwen_api(self, prompt: str, api_key: str, max_tokens: int) -> str:
+        """调用通义千问 API（DashScope 的 OpenAI 兼容接口）"""
+        data = {
+            "model": PROVIDER_MODELS["qwen"],
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": DEFAULT_TEMPERATURE
+        }
+        
+        response = self.get_client("qwen").post_json(data, api_key)
         
         if response.status_code == 200:
             return response.json()["choices"][0]["message"]["content"]
         else:
-            raise Exception(f"智谱AI API调用失败: {response.status_code} - {response.text}")
+            raise ProviderError("qwen", response.status_code, response.text, response.headers)
     
     def generate_article_content(self, article_idea: Dict) -> str:
         """生成文章内容"""
+        return self.call_ai_api(self.build_article_prompt(article_idea), max_tokens=3000)
+
+    def stream_article_content(self, article_idea: Dict) -> Tuple[str, str]:
+        """流式生成文章内容，返回 (Markdown 原文, 正文 HTML)
+
+        流式的用处是卡住的连接能在 streaming.stall_timeout 秒内发现，不用干等读取超时；
+        正文在等待下一段文字的间隙里逐块渲染好。页面头部的描述和阅读时间要等全文
+        生成完才能确定，所以页面仍然在最后一次写出。
+        """
+        renderer = IncrementalMarkdownRenderer(self.markdown_to_html)
+        markdown_parts = []
+        blocks = []
+        for chunk in self.stream_ai_api(self.build_article_prompt(article_idea), max_tokens=3000):
+            markdown_parts.append(chunk)
+            blocks.extend(renderer.feed(chunk))
+        blocks.extend(renderer.close())
+        return ''.join(markdown_parts), renderer.BLOCK_SEPARATOR.join(blocks)
+
+    def build_article_prompt(self, article_idea: Dict) -> str:
+        """构造生成文章用的提示词"""
         length_map = {
             "short": "800-1200字",
             "medium": "1500-2000字", 
@@ -495,258 +731,24 @@ class ArticleGenerator:
 请开始写作：
 """
         
-        return self.call_ai_api(prompt, max_tokens=3000)
-    
-    def create_article_html(self, title: str, category: str, content: str, date: str, slug: str) -> str:
-        """创建文章HTML页面"""
-        # 估算阅读时间（假设每分钟250字）
-        word_count = len(content)
-        read_time = max(1, round(word_count / 250))
-        
-        # 生成SEO描述
-        description = self.extract_description(content)
-        
-        # 生成文章图片URL（使用网站logo）
-        og_image = f"{self.config['base_url']}/assets/images/logo.png"
-        
-        html_template = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - 猫咪世界</title>
-    <meta name="description" content="{description}">
-    <meta name="keywords" content="养猫,猫咪,{category},{title.split('：')[0] if '：' in title else title}">
-    
-    <!-- Open Graph / Facebook -->
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="{self.config['base_url']}/articles/{slug}.html">
-    <meta property="og:title" content="{title}">
-    <meta property="og:description" content="{description}">
-    <meta property="og:image" content="{og_image}">
-    <meta property="og:image:width" content="1200">
-    <meta property="og:image:height" content="630">
-    <meta property="og:site_name" content="猫咪世界">
-    <meta property="og:locale" content="zh_CN">
-    <meta property="article:published_time" content="{date}T00:00:00+08:00">
-    <meta property="article:section" content="{category}">
-    <meta property="article:tag" content="养猫">
-    <meta property="article:tag" content="猫咪">
-    <meta property="article:tag" content="{category}">
+        return prompt
     
-    <!-- Twitter -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:url" content="{self.config['base_url']}/articles/{slug}.html">
-    <meta name="twitter:title" content="{title}">
-    <meta name="twitter:description" content="{description}">
-    <meta name="twitter:image" content="{og_image}">
-    
-    <!-- WeChat specific -->
-    <meta name="apple-mobile-web-app-title" content="猫咪世界">
-    <meta name="application-name" content="猫咪世界">
-    <link rel="canonical" href="{self.config['base_url']}/articles/{slug}.html">
-    {ARTICLE_STYLE}
-    <!-- Google AdSense -->
-    <script async src="https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client=ca-pub-YOUR_ADSENSE_ID"
-     crossorigin="anonymous"></script>
-</head>
-<body>
-    <header class="site-header">
-        <nav class="navbar">
-            <div class="nav-container">
-                <div class="nav-logo">
-                    <h1><a href="/">🐱 猫咪世界</a></h1>
-                </div>
-                <ul class="nav-menu">
-                    <li><a href="/">首页</a></li>
-                    <li><a href="/#articles">文章</a></li>
-                    <li><a href="/#breeds">品种</a></li>
-                    <li><a href="/#care">护理</a></li>
-                    <li><a href="/#products">用品</a></li>
-                </ul>
-            </div>
-        </nav>
-    </header>
-
-    <main class="main-content">
-        <article class="article-page">
-            <header class="article-header">
-                <div class="article-meta-top">
-                    <span class="article-category">{category}</span>
-                    <span class="article-date">📅 {date}</span>
-                    <span class="read-time">⏱️ {read_time}分钟阅读</span>
-                </div>
-                <h1>{title}</h1>
-            </header>
-
-            <!-- 广告位 -->
-            <div class="ad-container">
-                <ins class="adsbygoogle"
-                     style="display:block"
-                     data-ad-client="ca-pub-YOUR_ADSENSE_ID"
-                     data-ad-slot="1234567890"
-                     data-ad-format="auto"
-                     data-full-width-responsive="true"></ins>
-            </div>
-
-            <div class="article-body">
-                {self.markdown_to_html(content)}
-                
-                <!-- 文章内广告 -->
-                <div class="ad-container" style="margin: 2rem 0;">
-                    <ins class="adsbygoogle"
-                         style="display:block; text-align:center;"
-                         data-ad-layout="in-article"
-                         data-ad-format="fluid"
-                         data-ad-client="ca-pub-YOUR_ADSENSE_ID"
-                         data-ad-slot="0987654321"></ins>
-                </div>
-            </div>
-
-            <footer class="article-footer">
-                <div class="article-tags">
-                    <span class="tag">{category}</span>
-                    <span class="tag">养猫知识</span>
-                    <span class="tag">宠物护理</span>
-                </div>
-                
-                <div class="article-share">
-                    <h4>分享这篇文章</h4>
-                    <div class="share-buttons">
-                        <button class="share-btn" onclick="shareArticle()">分享</button>
-                        <a href="https://service.weibo.com/share/share.php?url={self.config['base_url']}/articles/{slug}.html&title={title}" target="_blank" class="social-share weibo">微博</a>
-                        <a href="javascript:void(0)" onclick="copyLink()" class="social-share copy">复制链接</a>
-                    </div>
-                </div>
-            </footer>
-        </article>
-
-        <section class="related-articles">
-            <h3>相关文章推荐</h3>
-            <div class="related-grid" id="related-articles">
-                <!-- 相关文章将通过JavaScript加载 -->
-            </div>
-        </section>
-    </main>
-
-    <footer class="site-footer">
-        <div class="footer-content">
-            <div class="footer-section">
-                <h4>猫咪世界</h4>
-                <p>专业的养猫知识分享平台，帮助铲屎官更好地照顾毛孩子。</p>
-            </div>
-            <div class="footer-section">
-                <h4>快速链接</h4>
-                <ul>
-                    <li><a href="/">返回首页</a></li>
-                    <li><a href="/sitemap.xml">网站地图</a></li>
-                    <li><a href="/feed.xml">RSS订阅</a></li>
-                </ul>
-            </div>
-        </div>
-        <div class="footer-bottom">
-            <p>&copy; 2024 猫咪世界. All rights reserved.</p>
-        </div>
-    </footer>
-
-    <script>
-        // 分享功能
-        function shareArticle() {{
-            if (navigator.share) {{
-                navigator.share({{
-                    title: '{title}',
-                    text: '{description}',
-                    url: window.location.href
-                }});
-            }} else {{
-                copyLink();
-            }}
-        }}
-        
-        function copyLink() {{
-            navigator.clipboard.writeText(window.location.href).then(() => {{
-                alert('链接已复制到剪贴板');
-            }});
-        }}
-        
-        // AdSense
-        (adsbygoogle = window.adsbygoogle || []).push({{}});
-        (adsbygoogle = window.adsbygoogle || []).push({{}});
-    </script>
-</body>
-</html>"""
-        
-        return html_template
+    def create_article_html(self, title: str, category: str, content: str, date: str, slug: str,
+                            body_html: Optional[str] = None) -> str:
+        """创建文章HTML页面（模板见 page_template.py）
+
+        body_html 是已经渲染好的正文（流式生成时传入），不传则由 content 渲染。
+        """
+        return render_article_page(title, category, content, date, slug,
+                                   self.base_url, body_html, self.style_mode)
     
     def markdown_to_html(self, markdown_text: str) -> str:
-        """简单的Markdown到HTML转换"""
-        html = markdown_text
-        
-        # 标题转换
-        html = re.sub(r'^### (.*$)', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-        html = re.sub(r'^## (.*$)', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-        html = re.sub(r'^# (.*$)', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-        
-        # 加粗文本
-        html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-        
-        # 提示框
-        html = re.sub(r'^> 💡 提示：(.*$)', r'<div class="tip-box">💡 <strong>提示：</strong>\1</div>', html, flags=re.MULTILINE)
-        html = re.sub(r'^> (.*$)', r'<blockquote>\1</blockquote>', html, flags=re.MULTILINE)
-        
-        # 列表转换
-        lines = html.split('\n')
-        in_ul = False
-        result_lines = []
-        
-        for line in lines:
-            if line.strip().startswith('- '):
-                if not in_ul:
-                    result_lines.append('<ul>')
-                    in_ul = True
-                result_lines.append(f'  <li>{line.strip()[2:]}</li>')
-            else:
-                if in_ul:
-                    result_lines.append('</ul>')
-                    in_ul = False
-                result_lines.append(line)
-        
-        if in_ul:
-            result_lines.append('</ul>')
-        
-        html = '\n'.join(result_lines)
-        
-        # 段落转换
-        paragraphs = html.split('\n\n')
-        html_paragraphs = []
-        for p in paragraphs:
-            p = p.strip()
-            if p and not p.startswith('<'):
-                html_paragraphs.append(f'<p>{p}</p>')
-            else:
-                html_paragraphs.append(p)
-        
-        return '\n\n'.join(html_paragraphs)
+        """Markdown到HTML转换（单遍渲染，见 markdown_render.py）"""
+        return render_markdown(markdown_text)
     
     def extract_description(self, content: str, max_length: int = 160) -> str:
         """从内容中提取SEO描述"""
-        # 移除Markdown标记
-        text = re.sub(r'#+\s*', '', content)  # 移除标题标记
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # 移除加粗标记
-        text = re.sub(r'[*>-]', '', text)  # 移除其他标记
-        text = re.sub(r'\n+', ' ', text).strip()  # 合并换行
-        
-        # 获取第一段有意义的内容
-        sentences = [s.strip() for s in text.split('。') if s.strip() and len(s.strip()) > 10]
-        if sentences:
-            first_sentence = sentences[0] + '。'
-            if len(first_sentence) <= max_length:
-                return first_sentence
-            else:
-                return first_sentence[:max_length-3] + '...'
-        
-        # 如果没有合适的句子，截取前部分内容
-        return text[:max_length-3] + '...' if len(text) > max_length else text
+        return extract_description(content, max_length)
     
     def generate_slug(self, title: str, category: str) -> str:
         """生成URL友好的slug"""
@@ -755,51 +757,62 @@ class ArticleGenerator:
         hash_value = hashlib.md5(title.encode('utf-8')).hexdigest()[:8]
 
         # 简化的slug生成
-        slug_map = {
-            '品种介绍': 'breed',
-            '幼猫护理': 'kitten-care',
-            '用品测评': 'product-review',
-            '健康护理': 'health-care',
-            '行为训练': 'behavior-training',
-            '营养饮食': 'nutrition'
-        }
-
-        return f"{slug_map.get(category, 'article')}-{hash_value}"
+        return f"{CATEGORY_SLUGS.get(category, 'article')}-{hash_value}"
     
     def update_articles_index(self, article_info: Dict) -> None:
         """更新文章索引"""
-        articles_file = 'articles.json'
-        
-        try:
-            with open(articles_file, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-        except FileNotFoundError:
-            articles = []
-        
-        # 同一个 slug 只保留一条：磁盘上 articles/<slug>.html 会被覆盖，
-        # 索引里再追加一条就会出现"一个 URL 对应多条记录"，
-        # sitemap 和 RSS 都会跟着重复。
-        articles = [a for a in articles if a.get('slug') != article_info['slug']]
+        self.update_articles_index_batch([article_info])
+
+    def update_articles_index_batch(self, article_infos: List[Dict]) -> None:
+        """把一批新文章登记进索引
 
-        # 添加新文章到列表开头
-        articles.insert(0, article_info)
+        article_infos 按新→旧排列。只往 articles.journal.jsonl 追加事件，
+        不再每篇都整份重写 articles.json；compact_articles_index() 时才合并。
+        同一个 slug 只保留一条的规则在合并时生效。
+        """
+        self.article_index.add(article_infos)
 
-        # 保存更新后的索引
-        with open(articles_file, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, indent=2, ensure_ascii=False)
+    def compact_articles_index(self) -> None:
+        """把索引日志合并进 articles.json（前端读取的文件）"""
+        pending = self.article_index.pending_events()
+        articles = self.article_index.compact()
+        if pending:
+            print(f"🗂️  索引已合并 {pending} 条新事件，共 {len(articles)} 篇文章")
     
     def generate_article(self) -> Dict:
         """生成一篇完整的文章"""
         # 生成文章创意
         article_idea = self.generate_article_idea()
+        article_info = self.write_article(article_idea)
+        self.commit_articles([(article_idea, article_info)])
+        return article_info
+
+    def write_article(self, article_idea: Dict, content: Optional[str] = None) -> Dict:
+        """根据创意生成内容并写出 HTML 页面，返回索引条目
+
+        这一步只写 articles/<slug>.html 和 sources/<slug>.json.gz，
+        不碰 articles.json 和 used_topics.json，
+        可以在多个线程里同时执行；索引由 commit_articles() 统一写入。
+        content 已经生成好（例如批处理取回的结果）时直接渲染，不再调用接口。
+        """
         print(f"正在生成文章：{article_idea['title']}")
-        
-        # 生成文章内容
-        content = self.generate_article_content(article_idea)
-        
+
         # 生成文章信息
         date = datetime.datetime.now().strftime("%Y-%m-%d")
         slug = self.generate_slug(article_idea['title'], article_idea['category'])
+
+        # 确保输出目录存在
+        os.makedirs(self.config['output_dir'], exist_ok=True)
+        html_file_path = f"{self.config['output_dir']}/{slug}.html"
+
+        # 生成文章内容
+        body_html = None
+        if content is not None:
+            pass
+        elif self.config.get("streaming", {}).get("enabled"):
+            content, body_html = self.stream_article_content(article_idea)
+        else:
+            content = self.generate_article_content(article_idea)
         
         # 创建HTML文件
         html_content = self.create_article_html(
@@ -807,19 +820,21 @@ class ArticleGenerator:
             article_idea['category'],
             content,
             date,
-            slug
+            slug,
+            body_html=body_html
         )
         
-        # 确保输出目录存在
-        os.makedirs(self.config['output_dir'], exist_ok=True)
-        
         # 保存HTML文件
-        html_file_path = f"{self.config['output_dir']}/{slug}.html"
         with open(html_file_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
+
+        # 保存 Markdown 原文，以后换模板可以用 rebuild.py 重建
+        save_source(make_source(slug, article_idea['title'], article_idea['category'], date, content))
         
+        print(f"文章生成完成：{html_file_path}")
+
         # 文章信息
-        article_info = {
+        return {
             "title": article_idea['title'],
             "category": article_idea['category'],
             "excerpt": self.extract_description(content, 120),
@@ -828,30 +843,141 @@ class ArticleGenerator:
             "slug": slug,
             "icon": self.get_category_icon(article_idea['category'])
         }
+
+    def commit_articles(self, results: List[tuple]) -> None:
+        """把已经写出 HTML 的文章登记到 articles.json、used_topics.json 和构建清单
+
+        results 是 (article_idea, article_info) 列表，按生成顺序排列。
+        两个文件各只读写一次，所以并发生成时也只在这里串行落盘。
+        """
+        if not results:
+            return
+
+        # 更新文章索引：后生成的排在前面，和逐篇插入的结果一致
+        self.update_articles_index_batch([info for _, info in reversed(results)])
         
-        # 更新文章索引
-        self.update_articles_index(article_info)
-        
-        # 记录已使用的话题
-        if "topics" not in self.used_topics:
-            self.used_topics["topics"] = []
-        if "titles" not in self.used_topics:
-            self.used_topics["titles"] = []
-        if "categories" not in self.used_topics:
-            self.used_topics["categories"] = {}
-        
-        self.used_topics["topics"].append(article_idea['topic_key'])
-        self.used_topics["titles"].append(article_idea['title'])
-        
-        # 更新分类计数
-        category = article_idea['category']
-        self.used_topics["categories"][category] = self.used_topics["categories"].get(category, 0) + 1
+        # 记录已使用的话题（同时更新分类计数）
+        for article_idea, _ in results:
+            self.used_topics.add(article_idea['topic_key'], article_idea['title'], article_idea['category'])
+            self.published_titles.add(article_idea['title'])
+            self.title_space.mark_used(article_idea['title'], article_idea['topic_key'])
         
         self.save_used_topics()
-        
-        print(f"文章生成完成：{html_file_path}")
-        return article_info
+
+        # 外部样式表模式下，页面引用的样式表必须跟着一起提交
+        if self.style_mode == "external":
+            write_stylesheet()
+
+        # 记进构建清单，rebuild.py 不会再重复渲染这些刚生成的页面
+        manifest = BuildManifest()
+        rendered_with = migration_ids(self.style_mode)
+        for _, info in results:
+            slug = info['slug']
+            manifest.record_article(slug, file_hash(source_path(slug)),
+                                    file_hash(f"{self.config['output_dir']}/{slug}.html"),
+                                    self.style_mode, migrations=rendered_with)
+        manifest.save()
+
+    def generate_articles_concurrently(self, count: int) -> List[Dict]:
+        """并发生成 count 篇文章
+
+        先一次性预留 count 个不重复的创意，再用线程池同时请求AI接口
+        （每个提供商受 get_throttle() 限流），全部结束后由主线程
+        统一写索引。总耗时取决于最慢的那次调用，而不是所有调用之和。
+        单篇失败不影响其他文章，失败的创意会被释放，下次运行还能再用。
+        全部失败时抛出 GenerationFailedError，带上最后一个错误，
+        不要让调用方误以为是标题用尽。
+        """
+        ideas = self.reserve_article_ideas(count)
+        max_workers = max(1, int(self.config.get("concurrency", {}).get("max_workers", 1)))
+        print(f"⚡ 并发生成 {len(ideas)} 篇文章（{min(max_workers, len(ideas))} 个线程）")
+
+        results = {}
+        last_error = None
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.write_article, idea): i for i, idea in enumerate(ideas)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    print(f"❌ 文章生成失败：{ideas[i]['title']}：{e}")
+                    self.title_space.release(ideas[i]['title'], ideas[i]['topic_key'])
+                    last_error = e
+
+        failed = len(ideas) - len(results)
+        if failed and not results:
+            raise GenerationFailedError(
+                f"{failed} 篇文章全部生成失败，最后一个错误：{last_error}") from last_error
+        if failed:
+            print(f"⚠️  {failed} 篇文章生成失败，标题已释放，下次运行可以再用")
+
+        done = [(ideas[i], results[i]) for i in sorted(results)]
+        self.commit_articles(done)
+        return [info for _, info in done]
     
+    def create_batch_backend(self) -> BatchBackend:
+        """按 config.json 的 batch.backend 创建批处理后端"""
+        batch_config = self.config.get("batch", {})
+        backend = batch_config.get("backend", "openai")
+        if backend == "local":
+            return LocalBatchBackend(batch_config.get("dir", ".cache/batches"))
+        if backend == "openai":
+            api_key = self.get_api_key("openai")
+            if not api_key:
+                raise ValueError("未配置 openai API密钥，无法使用 Batch API")
+            return OpenAIBatchBackend(api_key)
+        raise ValueError(f"不支持的批处理后端: {backend}")
+
+    def generate_articles_batch(self, count: int, category: Optional[str] = None,
+                                backend: Optional[BatchBackend] = None) -> List[Dict]:
+        """批量生成：所有提示词打成一个批处理任务，取回后一次性渲染和登记
+
+        适合给新分类一次补上百篇文章。已经在本地缓存里的提示词不再提交；
+        取回的结果写进缓存，渲染或登记失败后重跑不会重复付费。
+        """
+        batch_config = self.config.get("batch", {})
+        ideas = self.reserve_article_ideas(count, category)
+        prompts = [self.build_article_prompt(idea) for idea in ideas]
+
+        contents = {}
+        lines = []
+        for i, prompt in enumerate(prompts):
+            cached = self._lookup_cached_response(prompt, 3000)
+            if cached is not None:
+                contents[i] = cached
+            else:
+                lines.append(build_batch_line(f"article-{i}", self._chat_payload("openai", prompt, 3000)))
+
+        if lines:
+            batch_dir = batch_config.get("dir", ".cache/batches")
+            input_path = os.path.join(batch_dir, datetime.datetime.now().strftime("batch-%Y%m%d-%H%M%S.jsonl"))
+            write_batch_input(input_path, lines)
+
+            backend = backend or self.create_batch_backend()
+            job_id = backend.submit(input_path)
+            print(f"📦 已提交批处理任务 {job_id}：{len(lines)} 个请求（{len(contents)} 个命中缓存）")
+            results = backend.wait(
+                job_id,
+                poll_interval=batch_config.get("poll_interval", 30),
+                timeout=batch_config.get("timeout_hours", 24) * 3600
+            )
+            for custom_id, content in results.items():
+                i = int(custom_id.rsplit('-', 1)[1])
+                contents[i] = content
+                self._store_response("openai", prompts[i], 3000, content)
+
+        done = []
+        for i, idea in enumerate(ideas):
+            if i not in contents:
+                print(f"❌ 批处理没有返回：{idea['title']}")
+                self.title_space.release(idea['title'], idea['topic_key'])
+                continue
+            done.append((idea, self.write_article(idea, content=contents[i])))
+
+        self.commit_articles(done)
+        return [info for _, info in done]
+
     def get_category_icon(self, category: str) -> str:
         """根据分类获取图标"""
         icons = {
@@ -866,33 +992,67 @@ class ArticleGenerator:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="AI文章自动生成")
+    parser.add_argument("--batch", type=int, metavar="N",
+                        help="批量模式：用批处理接口一次生成 N 篇文章（用于补充新分类）")
+    parser.add_argument("--category", help="批量模式下只生成这个分类的文章，如 品种介绍")
+    parser.add_argument("--batch-backend", choices=["openai", "local"],
+                        help="覆盖 config.json 里的 batch.backend")
+    args = parser.parse_args()
+
     print("🐱 开始生成猫咪文章...")
     
     generator = ArticleGenerator()
+    generator.setup_working_directory()
+    if args.batch_backend:
+        generator.config.setdefault("batch", {})["backend"] = args.batch_backend
     
+    try:
+        if args.batch:
+            infos = generator.generate_articles_batch(args.batch, args.category)
+            print(f"🎉 批量生成完成，共生成 {len(infos)} 篇文章")
+        else:
+            run_generation(generator)
+    finally:
+        generator.close_clients()
+        # 即使中途失败，已经生成的文章也要进 articles.json
+        generator.compact_articles_index()
+
+
+def run_generation(generator: ArticleGenerator) -> None:
+    """按配置生成今天的文章"""
     print(f"🧮 剩余可用标题组合：约 {generator.count_available_titles()} 个")
 
     generated = 0
+    exhausted = False
     try:
         # 生成文章
         article_count = generator.config.get('articles_per_day', 1)
-        for i in range(article_count):
+        max_workers = generator.config.get('concurrency', {}).get('max_workers', 1)
+        if max_workers > 1 and article_count > 1:
             try:
-                article_info = generator.generate_article()
+                for article_info in generator.generate_articles_concurrently(article_count):
+                    generated += 1
+                    print(f"✅ 第{generated}篇文章生成成功：{article_info['title']}")
             except TopicExhaustedError as e:
-                # 标题用尽：保留已经生成的部分，不要为了凑数去覆盖旧文章
                 print(f"🛑 标题已用尽，停止生成：{e}")
-                break
-            generated += 1
-            print(f"✅ 第{generated}篇文章生成成功：{article_info['title']}")
-
-            # 避免API调用过频繁
-            if i < article_count - 1:
-                time.sleep(3)  # 减少等待时间，因为文章数量较多
+                exhausted = True
+        else:
+            for i in range(article_count):
+                try:
+                    article_info = generator.generate_article()
+                except TopicExhaustedError as e:
+                    # 标题用尽：保留已经生成的部分，不要为了凑数去覆盖旧文章
+                    print(f"🛑 标题已用尽，停止生成：{e}")
+                    exhausted = True
+                    break
+                generated += 1
+                print(f"✅ 第{generated}篇文章生成成功：{article_info['title']}")
 
         print(f"🎉 今日文章生成完成，共生成 {generated} 篇文章")
 
-        if generated == 0:
+        # 生成失败的错误会直接抛出来，走到这里一篇没有只可能是标题用尽
+        if generated == 0 and exhausted:
             raise TopicExhaustedError(
                 "本次一篇文章都没生成出来：标题模板组合已经用尽，"
                 "请扩充 load_article_templates() 里的词表后再运行。"
@@ -3,19 +3,162 @@
 """
 RSS Feed 生成脚本
 自动生成feed.xml文件，用于RSS订阅
+
+一次生成全部订阅源，RSS 和 Atom 各一份：
+    feed.xml / atom.xml                    全站最新文章（摘要）
+    feeds/full.xml / feeds/full.atom.xml   全站最新文章（全文）
+    feeds/<分类slug>.xml / .atom.xml        每个分类的最新文章（摘要）
+
+每个订阅源只有最新的 20 篇：索引只走一遍，利用它新→旧的顺序把文章同时分进
+全站和各分类的桶里，所有桶都满了就停（顺序被打乱时用堆取 top-K），不对整个文章库排序。
+全文只给入选的文章读取（优先 sources/ 里的源文件，没有就从页面里取正文），
+同一篇在 RSS 和 Atom 之间共用。条目逐条写进带缓冲的文件；每个订阅源的内容键
+记在构建清单里，没有变化的订阅源连 XML 都不生成。
 """
 
 import os
+import sys
 import json
+import heapq
+import hashlib
 import datetime
-from typing import List, Dict
+from typing import List, Dict, BinaryIO, Iterable, Optional
 import html
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex, CATEGORY_SLUGS
+from article_sources import LEGACY_BODY, load_source, source_path
+from site_config import site_base_url
+from build_manifest import BuildManifest, file_hash
+from markdown_render import render_markdown
+
+FEED_SIZE = 20
+FEEDS_DIR = 'feeds'
+# 参与 feed 内容的字段；其余字段变了不影响 feed
+FEED_FIELDS = ('slug', 'title', 'category', 'date', 'readTime', 'excerpt')
+
+
+def select_newest(articles: List[Dict], k: int = FEED_SIZE,
+                  categories: Iterable[str] = ()) -> Dict[Optional[str], List[Dict]]:
+    """一次遍历取出全站（键为 None）和每个分类最新的 k 篇，同一个 slug 只取一条
+
+    日期相同时索引里靠前的优先。索引是新→旧排列的（新文章总插在最前面，
+    ArticleIndex 保证这一点），所以从头走到所有桶都凑够 k 篇就停，只看走过的部分；
+    走过的部分里发现日期倒挂（比如手工改过 articles.json）时，退回到每个桶
+    各自在堆上取 top-k，也不做整表排序。
+    """
+    groups = {None: []}
+    groups.update((category, []) for category in categories)
+
+    seen = set()
+    unfilled = len(groups)
+    previous = None
+    for article in articles:
+        date = article.get('date', '')
+        if previous is not None and date > previous:
+            break
+        previous = date
+        if article.get('slug') in seen:
+            continue
+        seen.add(article.get('slug'))
+        for key in {None, article.get('category')}:
+            bucket = groups.get(key)
+            if bucket is not None and len(bucket) < k:
+                bucket.append(article)
+                unfilled -= len(bucket) == k
+        if not unfilled:
+            return groups
+    else:
+        # 走完了整个索引也没有倒挂：有的桶不满 k 篇
+        return groups
+
+    best = {}
+    for i, article in enumerate(articles):
+        key = (article.get('date', ''), -i)
+        slug = article.get('slug')
+        if slug not in best or key > best[slug][0]:
+            best[slug] = (key, article)
+    candidates = {key: [] for key in groups}
+    for entry in best.values():
+        candidates[None].append(entry)
+        if entry[1].get('category') is not None and entry[1].get('category') in candidates:
+            candidates[entry[1].get('category')].append(entry)
+    return {key: [article for _, article in heapq.nlargest(k, entries, key=lambda e: e[0])]
+            for key, entries in candidates.items()}
+
+
+def newest_articles(articles: List[Dict], k: int = FEED_SIZE) -> List[Dict]:
+    """按日期取最新的 k 篇，同一个 slug 只取一条"""
+    return select_newest(articles, k)[None]
+
+
+class Feed:
+    """一个订阅源：输出路径、格式（rss / atom）、标题，只收某个分类时 category 非空"""
+
+    def __init__(self, path: str, format: str, title: str, description: str,
+                 category: Optional[str] = None, full_text: bool = False):
+        self.path = path
+        self.format = format
+        self.title = title
+        self.description = description
+        self.category = category
+        self.full_text = full_text
+
+
+class FullText:
+    """按需读取文章正文 HTML，读过的缓存起来给 RSS 和 Atom 共用"""
+
+    def __init__(self, manifest: BuildManifest, articles_dir: str = 'articles'):
+        self.manifest = manifest
+        self.articles_dir = articles_dir
+        self._bodies: Dict[str, Optional[str]] = {}
+
+    def version(self, slug: str) -> Optional[str]:
+        """正文的版本，只看构建清单里的页面哈希或页面文件的 stat，不读内容"""
+        output = self.manifest.articles.get(slug, {}).get('output')
+        if output:
+            return output
+        try:
+            stat = os.stat(os.path.join(self.articles_dir, f"{slug}.html"))
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    @property
+    def loaded(self) -> int:
+        return len(self._bodies)
+
+    def body(self, slug: str) -> Optional[str]:
+        if slug not in self._bodies:
+            self._bodies[slug] = self._load(slug)
+        return self._bodies[slug]
+
+    def _load(self, slug: str) -> Optional[str]:
+        path = source_path(slug)
+        if os.path.exists(path):
+            record = load_source(path)
+            if 'markdown' in record:
+                return render_markdown(record['markdown'])
+            if 'body_html' in record:
+                return record['body_html']
+        try:
+            with open(os.path.join(self.articles_dir, f"{slug}.html"), 'r', encoding='utf-8') as f:
+                match = LEGACY_BODY.search(f.read())
+        except FileNotFoundError:
+            return None
+        return match.group(1) if match else None
+
+
+def cdata(text: str) -> str:
+    # 正文里出现 ]]> 会提前结束 CDATA，拆成两段
+    return '<![CDATA[' + text.replace(']]>', ']]]]><![CDATA[>') + ']]>'
+
+
 class RSSGenerator:
     def __init__(self, base_url: str = None):
-        # 自动检测域名：优先使用CNAME，否则使用config.json中的base_url
+        # 默认用 site_config 的站点地址：CNAME 优先，否则使用config.json中的base_url
         if base_url is None:
-            base_url = self.detect_base_url()
+            base_url = site_base_url()
         self.base_url = base_url.rstrip('/')
         self.site_title = "猫咪世界"
         self.site_description = "专业的养猫知识分享平台，每日更新猫咪护理、品种介绍、用品测评等内容"
@@ -23,55 +166,46 @@ class RSSGenerator:
         self.site_author = "猫咪世界编辑团队"
         print(f"🌐 RSS使用域名: {self.base_url}")
         
-    def detect_base_url(self) -> str:
-        """自动检测base URL"""
-        # 首先检查CNAME文件
-        try:
-            with open('CNAME', 'r', encoding='utf-8') as f:
-                cname_domain = f.read().strip()
-                if cname_domain:
-                    print(f"📍 RSS检测到CNAME域名: {cname_domain}")
-                    return f"https://{cname_domain}"
-        except FileNotFoundError:
-            pass
-        
-        # 然后检查config.json
-        try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                config_url = config.get('base_url')
-                if config_url:
-                    print(f"📍 RSS使用config.json中的URL: {config_url}")
-                    return config_url
-        except FileNotFoundError:
-            pass
-        
-        # 默认使用GitHub Pages URL
-        default_url = 'https://pet-content-hub.github.io/pet-daily'
-        print(f"📍 RSS使用默认URL: {default_url}")
-        return default_url
-        
-    def load_articles(self) -> List[Dict]:
-        """加载文章数据"""
-        try:
-            with open('articles.json', 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-                # 按日期排序，最新的在前面
-                articles.sort(key=lambda x: x['date'], reverse=True)
-                # 同一个 slug 只保留最新的一条，避免 RSS 里出现重复条目
-                unique = []
-                seen = set()
-                for article in articles:
-                    if article.get('slug') in seen:
-                        continue
-                    seen.add(article.get('slug'))
-                    unique.append(article)
-                # 只返回最近20篇文章
-                return unique[:20]
-        except FileNotFoundError:
+    def feeds(self) -> List[Feed]:
+        """要生成的全部订阅源"""
+        feeds = [
+            Feed('feed.xml', 'rss', self.site_title, self.site_description),
+            Feed('atom.xml', 'atom', self.site_title, self.site_description),
+            Feed(f'{FEEDS_DIR}/full.xml', 'rss', f"{self.site_title}（全文）",
+                 self.site_description, full_text=True),
+            Feed(f'{FEEDS_DIR}/full.atom.xml', 'atom', f"{self.site_title}（全文）",
+                 self.site_description, full_text=True),
+        ]
+        for category, slug in CATEGORY_SLUGS.items():
+            title = f"{self.site_title} - {category}"
+            description = f"{self.site_title}{category}栏目的最新文章"
+            feeds.append(Feed(f'{FEEDS_DIR}/{slug}.xml', 'rss', title, description, category))
+            feeds.append(Feed(f'{FEEDS_DIR}/{slug}.atom.xml', 'atom', title, description, category))
+        return feeds
+
+    def load_articles(self, index: Optional[ArticleIndex] = None) -> List[Dict]:
+        """加载文章索引；index 可以传入统一构建里共用的索引对象"""
+        index = index or ArticleIndex()
+        if not os.path.exists(index.snapshot_path) and not os.path.exists(index.journal_path):
             print("articles.json 文件不存在")
             return []
-    
+
+        # 包含还没合并进 articles.json 的索引日志
+        return index.load()
+
+    def feed_key(self, articles: List[Dict], feed: Feed, full_text: Optional[FullText] = None) -> str:
+        """feed 除生成时间以外全部内容的哈希，只看入选的这 K 篇文章
+
+        全文订阅源再加上每篇正文的版本（页面哈希），正文本身不用读。
+        """
+        items = [[a.get(field) for field in FEED_FIELDS] for a in articles]
+        if feed.full_text and full_text is not None:
+            items = [item + [full_text.version(a['slug'])] for item, a in zip(items, articles)]
+        digest = hashlib.sha256(json.dumps(
+            [self.base_url, feed.path, feed.format, feed.title, feed.description, feed.full_text]
+            + items, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
     def format_rfc822_date(self, date_str: str) -> str:
         """将日期转换为RFC822格式"""
         try:
@@ -81,42 +215,59 @@ class RSSGenerator:
             # 如果日期格式不正确，使用当前日期
             return datetime.datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0800')
     
+    def format_rfc3339_date(self, date_str: str) -> str:
+        """将日期转换为Atom使用的RFC3339格式"""
+        try:
+            date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+            return date_obj.strftime('%Y-%m-%dT10:00:00+08:00')
+        except ValueError:
+            return datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S+08:00')
+
     def escape_xml(self, text: str) -> str:
         """转义XML特殊字符"""
         return html.escape(text, quote=True)
     
-    def generate_rss_xml(self, articles: List[Dict]) -> str:
-        """生成RSS XML内容"""
-        build_date = datetime.datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0800')
-        
-        xml_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+    def article_url(self, article: Dict) -> str:
+        # 指向真实可抓取的静态页；/#/stories/ 是 fragment，
+        # 阅读器和搜索引擎都会把它折叠成首页
+        return f"{self.base_url}/articles/{article['slug']}.html"
+
+    def write_rss(self, out: BinaryIO, articles: List[Dict], build_date: str = None,
+                  feed: Feed = None, full_text: Optional[FullText] = None) -> None:
+        """把RSS XML逐段写进 out（二进制文件对象）"""
+        if build_date is None:
+            build_date = datetime.datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0800')
+        if feed is None:
+            feed = self.feeds()[0]
+        with_content = feed.full_text and full_text is not None
+        namespaces = ' xmlns:content="http://purl.org/rss/1.0/modules/content/"' if with_content else ''
+
+        out.write(f'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"{namespaces}>
   <channel>
-    <title>{self.escape_xml(self.site_title)}</title>
+    <title>{self.escape_xml(feed.title)}</title>
     <link>{self.base_url}/</link>
-    <description>{self.escape_xml(self.site_description)}</description>
+    <description>{self.escape_xml(feed.description)}</description>
     <language>{self.site_language}</language>
     <managingEditor>noreply@example.com ({self.escape_xml(self.site_author)})</managingEditor>
     <webMaster>noreply@example.com ({self.escape_xml(self.site_author)})</webMaster>
     <lastBuildDate>{build_date}</lastBuildDate>
     <pubDate>{build_date}</pubDate>
     <ttl>1440</ttl>
-    <atom:link href="{self.base_url}/feed.xml" rel="self" type="application/rss+xml" />
+    <atom:link href="{self.base_url}/{feed.path}" rel="self" type="application/rss+xml" />
     <image>
-      <title>{self.escape_xml(self.site_title)}</title>
+      <title>{self.escape_xml(feed.title)}</title>
       <url>{self.base_url}/assets/images/logo.png</url>
       <link>{self.base_url}/</link>
       <width>144</width>
       <height>144</height>
-      <description>{self.escape_xml(self.site_description)}</description>
+      <description>{self.escape_xml(feed.description)}</description>
     </image>
-'''
+'''.encode('utf-8'))
         
         for article in articles:
             pub_date = self.format_rfc822_date(article['date'])
-            # 指向真实可抓取的静态页；/#/stories/ 是 fragment，
-            # 阅读器和搜索引擎都会把它折叠成首页
-            article_url = f"{self.base_url}/articles/{article['slug']}.html"
+            article_url = self.article_url(article)
             
             # 构建内容描述
             content_description = f"""
@@ -125,37 +276,93 @@ class RSSGenerator:
             <p>{self.escape_xml(article['excerpt'])}</p>
             <p><a href="{article_url}">阅读全文 →</a></p>
             """
+            body = full_text.body(article['slug']) if with_content else None
+            content = f"\n      <content:encoded>{cdata(body)}</content:encoded>" if body else ''
             
-            xml_content += f'''    <item>
+            out.write(f'''    <item>
       <title>{self.escape_xml(article['title'])}</title>
       <link>{article_url}</link>
-      <description><![CDATA[{content_description.strip()}]]></description>
+      <description><![CDATA[{content_description.strip()}]]></description>{content}
       <pubDate>{pub_date}</pubDate>
       <guid>{article_url}</guid>
       <category>{self.escape_xml(article['category'])}</category>
       <author>noreply@example.com ({self.escape_xml(self.site_author)})</author>
     </item>
-'''
-        
-        xml_content += '''  </channel>
-</rss>'''
-        
-        return xml_content
-    
-    def save_rss_feed(self, filename: str = "feed.xml") -> None:
-        """保存RSS feed到文件"""
-        articles = self.load_articles()
+'''.encode('utf-8'))
         
+        out.write(b'''  </channel>
+</rss>''')
+
+    def write_atom(self, out: BinaryIO, articles: List[Dict], feed: Feed,
+                   full_text: Optional[FullText] = None) -> None:
+        """把Atom XML逐段写进 out；feed 的更新时间取最新一篇的日期，内容不变输出就不变"""
+        feed_url = f"{self.base_url}/{feed.path}"
+        updated = self.format_rfc3339_date(articles[0]['date'] if articles else '1970-01-01')
+        out.write(f'''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="{self.site_language}">
+  <title>{self.escape_xml(feed.title)}</title>
+  <subtitle>{self.escape_xml(feed.description)}</subtitle>
+  <link href="{feed_url}" rel="self" type="application/atom+xml" />
+  <link href="{self.base_url}/" rel="alternate" type="text/html" />
+  <id>{feed_url}</id>
+  <updated>{updated}</updated>
+  <author><name>{self.escape_xml(self.site_author)}</name></author>
+  <icon>{self.base_url}/assets/images/logo.png</icon>
+'''.encode('utf-8'))
+
+        for article in articles:
+            article_url = self.article_url(article)
+            published = self.format_rfc3339_date(article['date'])
+            body = full_text.body(article['slug']) if feed.full_text and full_text is not None else None
+            content = f'\n    <content type="html">{self.escape_xml(body)}</content>' if body else ''
+            out.write(f'''  <entry>
+    <title>{self.escape_xml(article['title'])}</title>
+    <link href="{article_url}" rel="alternate" type="text/html" />
+    <id>{article_url}</id>
+    <published>{published}</published>
+    <updated>{published}</updated>
+    <category term="{self.escape_xml(article['category'])}" />
+    <summary>{self.escape_xml(article['excerpt'])}</summary>{content}
+  </entry>
+'''.encode('utf-8'))
+
+        out.write(b'</feed>')
+
+    def save_feeds(self, index: Optional[ArticleIndex] = None,
+                   manifest: Optional[BuildManifest] = None) -> None:
+        """生成并保存全部订阅源"""
+        articles = self.load_articles(index)
         if not articles:
             print("⚠️  没有找到文章，生成空的RSS feed")
-        
-        xml_content = self.generate_rss_xml(articles)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(xml_content)
-        
-        print(f"✅ RSS Feed已生成：{filename}")
-        print(f"📰 包含 {len(articles)} 篇文章")
+
+        groups = select_newest(articles, FEED_SIZE, CATEGORY_SLUGS)
+        manifest = manifest if manifest is not None else BuildManifest()
+        full_text = FullText(manifest)
+        written = []
+        for feed in self.feeds():
+            items = groups.get(feed.category, [])
+            # 入选的 K 篇和上次一样就直接跳过：不生成 XML、不重写文件
+            input_key = self.feed_key(items, feed, full_text)
+            if manifest.output_is_current(feed.path, input_key):
+                continue
+            os.makedirs(os.path.dirname(feed.path) or '.', exist_ok=True)
+            tmp_path = f"{feed.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb', buffering=1 << 16) as f:
+                if feed.format == 'atom':
+                    self.write_atom(f, items, feed, full_text)
+                else:
+                    self.write_rss(f, items, feed=feed, full_text=full_text)
+            os.replace(tmp_path, feed.path)
+            manifest.record_output(feed.path, input_key, file_hash(feed.path))
+            written.append(feed.path)
+        manifest.save()
+
+        total = len(self.feeds())
+        if written:
+            print(f"✅ 订阅源已生成 {len(written)} 个：{', '.join(written)}")
+        if len(written) < total:
+            print(f"⏭️  {total - len(written)} 个订阅源内容没有变化，保留现有文件")
+        print(f"📰 全站订阅包含 {len(groups[None])} 篇文章，全文正文读取 {full_text.loaded} 篇")
 
 def main():
     """主函数"""
@@ -169,9 +376,9 @@ def main():
     
     # 创建RSS生成器（自动检测域名）
     generator = RSSGenerator()
-    generator.save_rss_feed()
+    generator.save_feeds()
     
     print("🎉 RSS Feed生成完成")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,52 +3,172 @@
 """
 网站地图生成脚本
 自动生成sitemap.xml文件，包含所有页面和文章
+
+条目逐条写进带缓冲的文件（同时写一份 .gz），不在内存里拼整份 XML。
+单个 sitemap 最多 50,000 个 URL、50 MB，快到上限时自动分卷成
+sitemap-1.xml、sitemap-2.xml …，sitemap.xml 改为指向各分卷的 sitemap index，
+robots.txt 里的地址不用改。
 """
 
 import os
-import json
+import sys
+import gzip
+import hashlib
 import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex
+from site_config import site_base_url
+from build_manifest import BuildManifest, file_hash
+
+# sitemaps.org 协议规定的单个文件上限
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+URLSET_HEADER = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+        xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
+        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
+'''
+URLSET_FOOTER = b'</urlset>'
+INDEX_HEADER = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+'''
+INDEX_FOOTER = b'</sitemapindex>'
+
+
+class SitemapWriter:
+    """流式写 sitemap
+
+    add() 直接把条目写进当前分卷的临时文件（.xml 和 .xml.gz 各一份），
+    满了就换下一卷；同时把除当天日期以外的内容累积成哈希，作为构建清单的输入键。
+    最后由 commit() 把临时文件换成正式文件，或者内容没变时由 discard() 丢掉。
+    """
+
+    def __init__(self, path: str = 'sitemap.xml', base_url: str = '', today: str = None,
+                 max_urls: int = MAX_URLS, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.base_url = base_url.rstrip('/')
+        self.today = today or datetime.datetime.now().strftime('%Y-%m-%d')
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.url_count = 0
+        self._stem, self._ext = os.path.splitext(path)
+        self._parts: List[str] = []       # 各分卷的临时文件
+        self._files = None                # 当前分卷 (xml, gz 底层文件, gz)
+        self._part_urls = 0
+        self._part_bytes = 0
+        self._key = hashlib.sha256(f"{max_urls}\t{max_bytes}\n".encode('utf-8'))
+
+    def _tmp(self, path: str) -> str:
+        return f"{path}.{os.getpid()}.tmp"
+
+    def _write(self, data: bytes) -> None:
+        raw, _, gz = self._files
+        raw.write(data)
+        gz.write(data)
+        self._part_bytes += len(data)
+
+    def _open_part(self) -> None:
+        tmp = self._tmp(f"{self._stem}-{len(self._parts) + 1}{self._ext}")
+        gz_raw = open(tmp + '.gz', 'wb')
+        self._files = (open(tmp, 'wb', buffering=1 << 16), gz_raw,
+                       gzip.GzipFile(filename='', mode='wb', fileobj=gz_raw, mtime=0))
+        self._parts.append(tmp)
+        self._part_urls = self._part_bytes = 0
+        self._write(URLSET_HEADER)
+
+    def _close_part(self) -> None:
+        self._write(URLSET_FOOTER)
+        raw, gz_raw, gz = self._files
+        gz.close()
+        gz_raw.close()
+        raw.close()
+        self._files = None
+
+    def add(self, url: str, lastmod: Optional[str] = None,
+            changefreq: str = "weekly", priority: str = "0.8") -> None:
+        """写一个条目；lastmod 为 None 时取当天"""
+        entry = (f"  <url>\n    <loc>{escape(url)}</loc>\n"
+                 f"    <lastmod>{lastmod or self.today}</lastmod>\n"
+                 f"    <changefreq>{changefreq}</changefreq>\n"
+                 f"    <priority>{priority}</priority>\n  </url>\n").encode('utf-8')
+        if (self._files is None or self._part_urls >= self.max_urls
+                or self._part_bytes + len(entry) + len(URLSET_FOOTER) > self.max_bytes):
+            if self._files is not None:
+                self._close_part()
+            self._open_part()
+        self._write(entry)
+        self._part_urls += 1
+        self.url_count += 1
+        self._key.update(f"{url}\t{lastmod or ''}\t{changefreq}\t{priority}\n".encode('utf-8'))
+
+    def close(self) -> str:
+        """写完最后一卷，返回输入键"""
+        if self._files is None and not self._parts:
+            self._open_part()  # 没有条目也要有一个合法的空 urlset
+        if self._files is not None:
+            self._close_part()
+        return self._key.hexdigest()[:16]
+
+    @property
+    def part_paths(self) -> List[str]:
+        """分卷的正式文件名；只有一卷时就是 sitemap.xml 本身，没有单独的分卷"""
+        if len(self._parts) == 1:
+            return []
+        return [f"{self._stem}-{i}{self._ext}" for i in range(1, len(self._parts) + 1)]
+
+    def discard(self) -> None:
+        for tmp in self._parts:
+            for path in (tmp, tmp + '.gz'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def commit(self, stale_parts: List[str] = ()) -> List[str]:
+        """把临时文件换成正式文件，删掉上次多出来的分卷，返回写出的文件"""
+        parts = self.part_paths
+        targets = parts or [self.path]
+        for tmp, target in zip(self._parts, targets):
+            os.replace(tmp, target)
+            os.replace(tmp + '.gz', target + '.gz')
+        if parts:
+            self._write_index(parts)
+        for path in stale_parts:
+            if path not in parts:
+                for stale in (path, path + '.gz'):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+        return [self.path] + parts
+
+    def _write_index(self, parts: List[str]) -> None:
+        tmp = self._tmp(self.path)
+        with open(tmp, 'wb') as raw, open(tmp + '.gz', 'wb') as gz_raw, \
+                gzip.GzipFile(filename='', mode='wb', fileobj=gz_raw, mtime=0) as gz:
+            for data in [INDEX_HEADER] + [
+                    (f"  <sitemap>\n    <loc>{escape(self.base_url + '/' + os.path.basename(p))}</loc>\n"
+                     f"    <lastmod>{self.today}</lastmod>\n  </sitemap>\n").encode('utf-8')
+                    for p in parts] + [INDEX_FOOTER]:
+                raw.write(data)
+                gz.write(data)
+        os.replace(tmp, self.path)
+        os.replace(tmp + '.gz', self.path + '.gz')
+
 
 class SitemapGenerator:
-    def __init__(self, base_url: str = None):
-        # 自动检测域名：优先使用CNAME，否则使用config.json中的base_url
+    def __init__(self, base_url: str = None, filename: str = "sitemap.xml", today: str = None,
+                 max_urls: int = MAX_URLS, max_bytes: int = MAX_BYTES):
+        # 默认用 site_config 的站点地址：CNAME 优先，否则使用config.json中的base_url
         if base_url is None:
-            base_url = self.detect_base_url()
+            base_url = site_base_url()
         self.base_url = base_url.rstrip('/')
-        self.sitemap_urls = []
+        self.writer = SitemapWriter(filename, self.base_url, today, max_urls, max_bytes)
         self._seen_urls = set()
         print(f"🌐 使用域名: {self.base_url}")
         
-    def detect_base_url(self) -> str:
-        """自动检测base URL"""
-        # 首先检查CNAME文件
-        try:
-            with open('CNAME', 'r', encoding='utf-8') as f:
-                cname_domain = f.read().strip()
-                if cname_domain:
-                    print(f"📍 检测到CNAME域名: {cname_domain}")
-                    return f"https://{cname_domain}"
-        except FileNotFoundError:
-            pass
-        
-        # 然后检查config.json
-        try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                config_url = config.get('base_url')
-                if config_url:
-                    print(f"📍 使用config.json中的URL: {config_url}")
-                    return config_url
-        except FileNotFoundError:
-            pass
-        
-        # 默认使用GitHub Pages URL
-        default_url = 'https://pet-content-hub.github.io/pet-daily'
-        print(f"📍 使用默认URL: {default_url}")
-        return default_url
-        
     def add_url(self, url: str, lastmod: str = None, changefreq: str = "weekly", priority: str = "0.8"):
         """添加URL到sitemap（同一个URL只会出现一次）"""
         if not url.startswith('http'):
@@ -58,29 +178,39 @@ class SitemapGenerator:
         if url in self._seen_urls:
             return
         self._seen_urls.add(url)
-
-        self.sitemap_urls.append({
-            'url': url,
-            'lastmod': lastmod or datetime.datetime.now().strftime('%Y-%m-%d'),
-            'changefreq': changefreq,
-            'priority': priority
-        })
+        # lastmod 为 None 表示没有固定日期，写的时候取当天
+        self.writer.add(url, lastmod, changefreq, priority)
     
-    def scan_articles(self) -> None:
+    @staticmethod
+    def snapshot_dir(path: str) -> Dict[str, os.stat_result]:
+        """一次 scandir 读出目录里所有文件的 stat（mtime、大小）"""
+        try:
+            with os.scandir(path) as entries:
+                return {e.name: e.stat() for e in entries if e.is_file()}
+        except FileNotFoundError:
+            return {}
+
+    def scan_articles(self, index: Optional[ArticleIndex] = None) -> None:
         """扫描所有文章
 
         只收录真正可被抓取的静态文章页 /articles/<slug>.html。
         注意：不能用 /#/stories/<slug>，因为 # 之后是 fragment，
         搜索引擎不会把它当成独立 URL，全部会折叠成首页。
+
+        articles/ 目录只读一次（scandir 快照），索引里的每一条都对照快照判断，
+        不再逐个 os.path.exists。lastmod 用页面文件的真实修改时间：
+        重建、迁移只在内容变了时才写文件，所以 mtime 就是页面最后一次变化的时间
+        （CI 检出后由工作流按 git 提交时间恢复 mtime）。
+        index 可以传入统一构建里共用的索引对象。
         """
-        try:
-            with open('articles.json', 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-        except FileNotFoundError:
+        index = index or ArticleIndex()
+        if not os.path.exists(index.snapshot_path) and not os.path.exists(index.journal_path):
             print("articles.json 文件不存在，跳过文章扫描")
             return
+        # 包含还没合并进 articles.json 的索引日志
+        articles = index.load()
 
-        output_dir = 'articles'
+        pages = self.snapshot_dir('articles')
         seen = set()
         missing = 0
 
@@ -90,15 +220,16 @@ class SitemapGenerator:
             if not slug or slug in seen:
                 continue
 
-            # 磁盘上没有对应 HTML 就不写进 sitemap，避免收录 404
-            if not os.path.exists(os.path.join(output_dir, f"{slug}.html")):
+            # 磁盘上没有对应 HTML（或是空文件）就不写进 sitemap，避免收录 404
+            page = pages.get(f"{slug}.html")
+            if page is None or page.st_size == 0:
                 missing += 1
                 continue
 
             seen.add(slug)
             self.add_url(
                 f"/articles/{slug}.html",
-                lastmod=article['date'],
+                lastmod=datetime.datetime.fromtimestamp(page.st_mtime, datetime.timezone.utc).strftime('%Y-%m-%d'),
                 changefreq="monthly",
                 priority="0.7"
             )
@@ -124,36 +255,28 @@ class SitemapGenerator:
         for page in static_pages:
             self.add_url(page["url"], changefreq=page["changefreq"], priority=page["priority"])
     
-    def generate_xml(self) -> str:
-        """生成sitemap XML内容"""
-        xml_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
-        xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-        xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
-        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
-'''
-        
-        for url_info in self.sitemap_urls:
-            xml_content += f'''  <url>
-    <loc>{url_info['url']}</loc>
-    <lastmod>{url_info['lastmod']}</lastmod>
-    <changefreq>{url_info['changefreq']}</changefreq>
-    <priority>{url_info['priority']}</priority>
-  </url>
-'''
-        
-        xml_content += '</urlset>'
-        return xml_content
-    
-    def save_sitemap(self, filename: str = "sitemap.xml") -> None:
-        """保存sitemap到文件"""
-        xml_content = self.generate_xml()
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(xml_content)
-        
-        print(f"✅ Sitemap已生成：{filename}")
-        print(f"📊 包含 {len(self.sitemap_urls)} 个URL")
+    def save_sitemap(self, manifest: Optional[BuildManifest] = None) -> None:
+        """写完并保存sitemap
+
+        条目在 add_url 时已经写进临时文件；除了当天日期以外内容都没变时
+        丢掉临时文件、不重写，避免每天提交一份只改了日期的 sitemap。
+        """
+        writer = self.writer
+        input_key = writer.close()
+        manifest = manifest if manifest is not None else BuildManifest()
+        previous = manifest.outputs.get(writer.path, {}).get('parts', [])
+        if (manifest.output_is_current(writer.path, input_key) and previous == writer.part_paths
+                and os.path.exists(writer.path + '.gz')):
+            writer.discard()
+            print(f"⏭️  Sitemap内容没有变化，保留现有的 {writer.path}")
+        else:
+            files = writer.commit(stale_parts=previous)
+            manifest.record_output(writer.path, input_key, file_hash(writer.path),
+                                   parts=writer.part_paths)
+            manifest.save()
+            print(f"✅ Sitemap已生成：{', '.join(files)}（另有 .gz 压缩版）")
+        print(f"📊 包含 {writer.url_count} 个URL" +
+              (f"，分为 {len(writer.part_paths)} 卷" if writer.part_paths else ""))
 
 def main():
     """主函数"""
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""文章页 HTML 迁移
+
+以前每一次全站修补都是一个单独的脚本（backfill_article_style.py 之类），
+各自遍历目录、各自实现 dry-run 和统计，叠加 N 个修补就要把 479 个文件
+读写 N 遍。现在修补写成按顺序注册的迁移：
+
+    @register('0003-real-article-urls', '把 /#/stories/<slug> 改成静态页地址',
+              probe=lambda head, mm: mm.find(b'/#/stories/') != -1)
+    def fix_hash_story_urls(html):
+        return HASH_STORY_URL.subn(r'\\1/articles/\\2.html', html)
+
+- transform(html) 返回 (新内容, 改动处数)，必须幂等；
+- probe(head, mm) 可选：head 是 </head> 之前的字节，mm 是整个文件的 mmap，
+  返回 False 表示这个文件肯定不需要这条迁移，不用完整读入；
+- 每个文件只读写一次：所有待执行的迁移在内存里依次应用，最后原子写回；
+- 构建清单（build_manifest.py）按页面记录已应用的迁移 ID，
+  下次运行时没有新迁移的页面连文件都不打开；
+- rebuild.py 和生成文章时用当前模板渲染的页面，清单里记的是渲染时
+  已注册的迁移（修补要同步进模板），所以刚渲染的页面同样不打开，
+  之后新注册的迁移仍会对它们执行；
+- 文件分到进程池里并行处理。
+
+样式迁移的 ID 带着样式模式和版本（0002-style-<模式>-<版本>），
+样式改了或者换了模式，它自然又变成待执行。
+
+用法：
+    python scripts/html_migrations.py --list      # 列出已注册的迁移
+    python scripts/html_migrations.py --dry-run   # 只看会改什么（样式模式默认取 config.json）
+    python scripts/html_migrations.py --style-mode external --workers 4
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_style import STYLE_MODES, style_markup, write_stylesheet
+from build_manifest import BuildManifest, content_hash, style_version
+from site_config import load_site_config
+
+ARTICLES_DIR = 'articles'
+# 探测时读取的文件开头长度；现有页面的 </head> 都在 9 KB 以内
+HEAD_BYTES = 16 * 1024
+
+# 原来那行指向不存在文件的样式表引用
+STYLESHEET_LINK = re.compile(r'[ \t]*<link rel="stylesheet" href="\.\./assets/css/style\.css">\n?')
+# 页面里已有的样式：整份内联的，或者首屏样式 + 外部样式表（任意版本）
+STYLE_BLOCK = re.compile(
+    r'<style>\s*:root \{\s*--accent: #ff6b6b;.*?</style>'
+    r'|<style data-critical>.*?</style>\s*<link rel="stylesheet" href="/assets/css/article\.[0-9a-f]+\.css">',
+    re.S)
+# 任何指向 /#/stories/<slug> 的地址：canonical、og:url、微博分享 …
+HASH_STORY_URL = re.compile(r'(https?://[^\s"\'<>]*?)/#/stories/([A-Za-z0-9_-]+)')
+
+
+class Migration:
+    """一条迁移：ID 决定执行顺序，transform 必须幂等"""
+
+    def __init__(self, id: str, description: str,
+                 transform: Callable[[str], Tuple[str, int]],
+                 probe: Optional[Callable[[bytes, mmap.mmap], bool]] = None):
+        self.id = id
+        self.description = description
+        self.transform = transform
+        self.probe = probe
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def register(id: str, description: str, probe=None):
+    """把函数注册成迁移"""
+    def decorator(transform):
+        if any(m.id == id for m in MIGRATIONS):
+            raise ValueError(f"迁移 ID 重复: {id}")
+        MIGRATIONS.append(Migration(id, description, transform, probe))
+        return transform
+    return decorator
+
+
+@register('0001-drop-dead-stylesheet', '去掉指向不存在的 ../assets/css/style.css 的引用',
+          probe=lambda head, mm: b'../assets/css/style.css' in head)
+def drop_dead_stylesheet(html: str) -> Tuple[str, int]:
+    return STYLESHEET_LINK.subn('', html)
+
+
+def style_migration(style_mode: str = 'inline') -> Migration:
+    """把页面样式换成指定模式的当前版本"""
+    target = style_markup(style_mode)
+    target_bytes = target.encode('utf-8')
+
+    def transform(html: str) -> Tuple[str, int]:
+        if target in html:
+            return html, 0
+        html, swapped = STYLE_BLOCK.subn(lambda m: target, html, count=1)
+        if swapped:
+            return html, 1
+        if '</head>' in html:
+            return html.replace('</head>', f'    {target}\n</head>', 1), 1
+        return html, 0
+
+    return Migration(f'0002-style-{style_mode}-{style_version(style_mode)}',
+                     f'页面样式换成 {style_mode} 模式的当前版本', transform,
+                     probe=lambda head, mm: target_bytes not in head)
+
+
+@register('0003-real-article-urls', '把 /#/stories/<slug> 地址改成真实的静态页地址',
+          probe=lambda head, mm: mm.find(b'/#/stories/') != -1)
+def fix_hash_story_urls(html: str) -> Tuple[str, int]:
+    return HASH_STORY_URL.subn(r'\1/articles/\2.html', html)
+
+
+def migrations_for(style_mode: str = 'inline') -> List[Migration]:
+    """当前要执行的全部迁移，按 ID 排序"""
+    return sorted(MIGRATIONS + [style_migration(style_mode)], key=lambda m: m.id)
+
+
+def migration_ids(style_mode: str = 'inline') -> List[str]:
+    """当前注册的全部迁移 ID；渲染页面时记进构建清单"""
+    return [m.id for m in migrations_for(style_mode)]
+
+
+def probe_file(path: str, migrations: List[Migration]) -> List[Migration]:
+    """只读文件头和 mmap，筛掉肯定用不上的迁移"""
+    if any(m.probe is None for m in migrations):
+        return migrations
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+        end = head.find(b'</head>')
+        if end < 0:
+            return migrations  # 头部太长，保守起见都执行
+        head = head[:end]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [m for m in migrations if m.probe(head, mm)]
+
+
+def migrate_file(path: str, migrations: List[Migration], dry_run: bool = False) -> Dict:
+    """对一个文件执行迁移：一次读入、依次应用、一次写回
+
+    返回 {"changes": {迁移ID: 改动处数}, "output": 新内容哈希（没改动为 None）,
+    "read": 是否完整读入了文件}。
+    """
+    result = {'changes': {}, 'output': None, 'read': False}
+    candidates = probe_file(path, migrations)
+    if not candidates:
+        return result
+
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    result['read'] = True
+    original = html
+    for migration in candidates:
+        html, count = migration.transform(html)
+        if count:
+            result['changes'][migration.id] = count
+
+    if html != original:
+        data = html.encode('utf-8')
+        result['output'] = content_hash(data)
+        if not dry_run:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    return result
+
+
+def _migrate_task(task: Tuple[str, List[str], str, bool]) -> Tuple[str, Dict, int]:
+    """进程池里执行：迁移对象不方便跨进程传，按 ID 在子进程里重新取"""
+    path, ids, style_mode, dry_run = task
+    wanted = set(ids)
+    migrations = [m for m in migrations_for(style_mode) if m.id in wanted]
+    return path, migrate_file(path, migrations, dry_run), os.path.getsize(path)
+
+
+def run_migrations(articles_dir: str = ARTICLES_DIR, style_mode: str = 'inline',
+                   workers: Optional[int] = None, dry_run: bool = False,
+                   manifest: Optional[BuildManifest] = None) -> Dict:
+    """对目录下所有文章页执行待执行的迁移，返回统计"""
+    manifest = manifest if manifest is not None else BuildManifest()
+    migrations = migrations_for(style_mode)
+    all_ids = [m.id for m in migrations]
+
+    started = time.perf_counter()
+    files = sorted(e.name for e in os.scandir(articles_dir) if e.name.endswith('.html'))
+    tasks = []
+    for name in files:
+        applied = manifest.applied_migrations(name[:-len('.html')])
+        pending = [i for i in all_ids if i not in applied]
+        if not pending:
+            continue
+        tasks.append((os.path.join(articles_dir, name), pending, style_mode, dry_run))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        results = list(map(_migrate_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_migrate_task, tasks,
+                                        chunksize=max(1, len(tasks) // (workers * 4))))
+
+    stats = {'files': len(files), 'up_to_date': len(files) - len(tasks), 'probed_only': 0,
+             'changed': 0, 'bytes': 0, 'by_migration': {i: [0, 0] for i in all_ids},
+             'workers': workers}
+    style_id = next(i for i in all_ids if i.startswith('0002-style-'))
+    for path, result, size in results:
+        stats['bytes'] += size
+        if not result['read']:
+            stats['probed_only'] += 1
+        for migration_id, count in result['changes'].items():
+            stats['by_migration'][migration_id][0] += 1
+            stats['by_migration'][migration_id][1] += count
+        if result['output']:
+            stats['changed'] += 1
+        if not dry_run:
+            manifest.record_migrations(
+                os.path.basename(path)[:-len('.html')], all_ids, result['output'],
+                style=style_version(style_mode) if style_id in result['changes'] else None)
+    if not dry_run:
+        manifest.save()
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def print_stats(stats: Dict, dry_run: bool = False) -> None:
+    prefix = '[dry-run] ' if dry_run else ''
+    elapsed = stats['elapsed']
+    print(f"{prefix}共 {stats['files']} 个文章页：清单显示已是最新 {stats['up_to_date']} 个，"
+          f"快速检查跳过 {stats['probed_only']} 个，改动 {stats['changed']} 个")
+    for migration_id, (files, count) in stats['by_migration'].items():
+        if files:
+            print(f"{prefix}  {migration_id}：{files} 个文件，{count} 处")
+    print(f"⏱️  用时 {elapsed:.2f} 秒（{stats['files'] / elapsed if elapsed else 0:.0f} 个/秒，"
+          f"{stats['bytes'] / elapsed / 1e6 if elapsed else 0:.1f} MB/s，{stats['workers']} 个进程）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='对已有的文章页执行 HTML 迁移')
+    parser.add_argument('--dry-run', action='store_true', help='只看会改什么，不写文件')
+    parser.add_argument('--style-mode', choices=STYLE_MODES,
+                        help='覆盖 config.json 里的 style.mode（inline 内联 / external 外部样式表）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认等于 CPU 核数')
+    parser.add_argument('--list', action='store_true', help='列出已注册的迁移')
+    args = parser.parse_args(argv)
+
+    # 允许从 scripts/ 或项目根目录运行
+    if os.path.basename(os.getcwd()) == 'scripts':
+        os.chdir('..')
+
+    # 和 rebuild.py 一样默认跟随站点配置，否则 external 站点跑一次就全换回内联样式
+    style_mode = args.style_mode or load_site_config().get('style', {}).get('mode', 'inline')
+
+    if args.list:
+        for migration in migrations_for(style_mode):
+            print(f"{migration.id}  {migration.description}")
+        return 0
+
+    if not os.path.isdir(ARTICLES_DIR):
+        print(f"❌ 找不到目录 {ARTICLES_DIR}/")
+        return 1
+
+    if style_mode == 'external' and not args.dry_run:
+        print(f"🎨 外部样式表：{write_stylesheet()}")
+
+    stats = run_migrations(style_mode=style_mode, workers=args.workers, dry_run=args.dry_run)
+    print_stats(stats, args.dry_run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Markdown 渲染工具
+
+render_markdown() 把模型生成的 Markdown 转成文章正文 HTML。以前的
+markdown_to_html 对整篇文章跑六遍 re.sub，再切行处理列表、拼回去、
+再按空行切段落，每篇文章至少复制八份；有序列表、表格和代码也不认，
+内联样式里给它们写的样式一直用不上。现在是一遍扫描：
+
+- 块级：逐行判断标题、有序/无序列表、表格、提示框、引用、代码块、
+  分隔线和段落，每行只看一次；
+- 行内：一个预编译的组合正则一次替换行内代码、加粗和斜体。
+
+IncrementalMarkdownRenderer 用于流式生成：模型每吐出一段文字就喂进来，
+凑齐一个完整的块（以空行结尾）就立即渲染成 HTML 交出去，
+不必等整篇文章生成完才开始转换。
+
+改动会让输出变样时，记得把 page_template.RENDERER_VERSION 加一，
+已有页面才会在 rebuild.py 里重新渲染。
+"""
+
+import html
+import re
+from typing import Callable, List
+
+TIP_PREFIX = '💡 提示：'
+
+_HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*\s*$')
+_UL_ITEM = re.compile(r'\s*[-*+]\s+(.*)')
+_OL_ITEM = re.compile(r'\s*(\d{1,9})[.)]\s+(.*)')
+_FENCE = re.compile(r'\s*(```+|~~~+)\s*([\w+-]*)')
+_TABLE_SEP = re.compile(r'\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_HR = re.compile(r'\s*([-*_])(\s*\1){2,}\s*$')
+# 行内代码优先，其中的星号原样保留；** 在 * 之前匹配
+_INLINE = re.compile(r'`([^`\n]+)`|\*\*(.+?)\*\*|\*(?![\s*])(.+?)(?<![\s*])\*')
+
+
+def _inline_sub(match) -> str:
+    code, strong, em = match.groups()
+    if code is not None:
+        return f'<code>{html.escape(code, quote=False)}</code>'
+    if strong is not None:
+        return f'<strong>{render_inline(strong)}</strong>'
+    return f'<em>{em}</em>'
+
+
+def render_inline(text: str) -> str:
+    """行内标记：`代码`、**加粗**、*斜体*"""
+    if '*' not in text and '`' not in text:
+        return text
+    return _INLINE.sub(_inline_sub, text)
+
+
+def _table_cells(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+def _table_aligns(separator: str) -> List[str]:
+    aligns = []
+    for cell in _table_cells(separator):
+        if cell.startswith(':') and cell.endswith(':'):
+            aligns.append(' style="text-align: center"')
+        elif cell.endswith(':'):
+            aligns.append(' style="text-align: right"')
+        else:
+            aligns.append('')
+    return aligns
+
+
+def _render_table(header: str, separator: str, rows: List[str]) -> str:
+    aligns = _table_aligns(separator)
+    width = len(aligns)
+
+    def row_html(line, tag):
+        cells = (_table_cells(line) + [''] * width)[:width]
+        return '<tr>' + ''.join(f'<{tag}{align}>{render_inline(cell)}</{tag}>'
+                                for cell, align in zip(cells, aligns)) + '</tr>'
+
+    parts = ['<table>', '<thead>' + row_html(header, 'th') + '</thead>', '<tbody>']
+    parts.extend(row_html(row, 'td') for row in rows)
+    parts.append('</tbody>')
+    parts.append('</table>')
+    return '\n'.join(parts)
+
+
+def _render_quote(lines: List[str]) -> str:
+    text = '\n'.join(render_inline(line) for line in lines)
+    if text.startswith(TIP_PREFIX):
+        return f'<div class="tip-box">💡 <strong>提示：</strong>{text[len(TIP_PREFIX):]}</div>'
+    return f'<blockquote>{text}</blockquote>'
+
+
+def render_markdown(markdown_text: str) -> str:
+    """一遍扫描把 Markdown 转成 HTML，块之间用空行分隔"""
+    blocks = []
+    paragraph = []
+
+    def flush_paragraph():
+        if paragraph:
+            text = '\n'.join(paragraph)
+            # 模型偶尔直接输出 HTML 片段，原样保留
+            blocks.append(text if text.startswith('<') else f'<p>{render_inline(text)}</p>')
+            paragraph.clear()
+
+    lines = markdown_text.split('\n')
+    count = len(lines)
+    i = 0
+    while i < count:
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        first = stripped[0]
+
+        if first in '`~':
+            fence = _FENCE.match(line)
+            if fence:
+                flush_paragraph()
+                marker, lang = fence.groups()
+                i += 1
+                code = []
+                while i < count and not lines[i].strip().startswith(marker):
+                    code.append(lines[i])
+                    i += 1
+                i += 1  # 跳过结束的围栏（文章被截断时可能没有）
+                css = f' class="language-{lang}"' if lang else ''
+                blocks.append(f'<pre><code{css}>{html.escape(chr(10).join(code), quote=False)}</code></pre>')
+                continue
+
+        if first == '#':
+            heading = _HEADING.match(stripped)
+            if heading:
+                flush_paragraph()
+                level = len(heading.group(1))
+                blocks.append(f'<h{level}>{render_inline(heading.group(2))}</h{level}>')
+                i += 1
+                continue
+
+        if first == '>':
+            flush_paragraph()
+            quote = []
+            while i < count and lines[i].strip().startswith('>'):
+                quote.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            blocks.append(_render_quote(quote))
+            continue
+
+        if first in '-*_' and _HR.match(line):
+            flush_paragraph()
+            blocks.append('<hr>')
+            i += 1
+            continue
+
+        if first in '-*+' and _UL_ITEM.match(line):
+            flush_paragraph()
+            items = []
+            while i < count:
+                item = _UL_ITEM.match(lines[i])
+                if not item:
+                    break
+                items.append(f'  <li>{render_inline(item.group(1))}</li>')
+                i += 1
+            blocks.append('<ul>\n' + '\n'.join(items) + '\n</ul>')
+            continue
+
+        if first.isdigit():
+            item = _OL_ITEM.match(line)
+            if item:
+                flush_paragraph()
+                start = int(item.group(1))
+                items = []
+                while i < count:
+                    item = _OL_ITEM.match(lines[i])
+                    if not item:
+                        break
+                    items.append(f'  <li>{render_inline(item.group(2))}</li>')
+                    i += 1
+                # 被空行隔开的有序列表分块渲染时靠 start 接上编号
+                attr = f' start="{start}"' if start != 1 else ''
+                blocks.append(f'<ol{attr}>\n' + '\n'.join(items) + '\n</ol>')
+                continue
+
+        if '|' in stripped and i + 1 < count and '-' in lines[i + 1] and _TABLE_SEP.match(lines[i + 1]):
+            flush_paragraph()
+            header, separator = line, lines[i + 1]
+            i += 2
+            rows = []
+            while i < count and '|' in lines[i] and lines[i].strip():
+                rows.append(lines[i])
+                i += 1
+            blocks.append(_render_table(header, separator, rows))
+            continue
+
+        paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    return '\n\n'.join(blocks)
+
+
+class IncrementalMarkdownRenderer:
+    """按块增量渲染 Markdown
+
+    render_block 负责把一个块（不含空行的连续几行）转成 HTML。
+    render_markdown() 的块不会跨过空行（代码块除外），所以逐块渲染再用
+    空行拼起来，和对整篇文章一次性渲染的结果一致。代码块里可以有空行，
+    围栏没闭合之前不会在块内切开。
+    """
+
+    BLOCK_SEPARATOR = '\n\n'
+
+    def __init__(self, render_block: Callable[[str], str] = render_markdown):
+        self.render_block = render_block
+        self._pending = ''
+        self.blocks_emitted = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """喂入一段新文字，返回这次凑齐的块渲染出的 HTML"""
+        self._pending += chunk
+        cut = self._safe_cut(self._pending)
+        if cut < 0:
+            return []
+        complete, self._pending = self._pending[:cut], self._pending[cut + len(self.BLOCK_SEPARATOR):]
+        return self._render(complete)
+
+    def close(self) -> List[str]:
+        """流结束：把剩下不完整的最后一块也渲染出来"""
+        rest, self._pending = self._pending, ''
+        return self._render(rest)
+
+    def _safe_cut(self, text: str) -> int:
+        """最后一个不在代码块里的空行位置，没有返回 -1"""
+        cut = text.rfind(self.BLOCK_SEPARATOR)
+        while cut >= 0 and self._open_fence(text[:cut]):
+            cut = text.rfind(self.BLOCK_SEPARATOR, 0, cut)
+        return cut
+
+    @staticmethod
+    def _open_fence(text: str) -> bool:
+        if '```' not in text and '~~~' not in text:
+            return False
+        marker = None
+        for line in text.split('\n'):
+            stripped = line.lstrip()
+            if marker is None:
+                fence = _FENCE.match(line)
+                if fence:
+                    marker = fence.group(1)
+            elif stripped.startswith(marker):
+                marker = None
+        return marker is not None
+
+    def _split_blocks(self, text: str) -> List[str]:
+        """按空行切块，代码块整体算一块"""
+        blocks = []
+        current = []
+        for part in text.split(self.BLOCK_SEPARATOR):
+            current.append(part)
+            joined = self.BLOCK_SEPARATOR.join(current)
+            if not self._open_fence(joined):
+                blocks.append(joined)
+                current = []
+        if current:
+            blocks.append(self.BLOCK_SEPARATOR.join(current))
+        return blocks
+
+    def _render(self, text: str) -> List[str]:
+        html_blocks = []
+        for block in self._split_blocks(text):
+            if not block.strip():
+                continue
+            html_blocks.append(self.render_block(block))
+            self.blocks_emitted += 1
+        return html_blocks
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""静态文章页模板
+
+以前 create_article_html() 每篇文章都重新拼一遍 170 行的 f-string，
+站点地址和文章地址要算好几遍；test_local.py 还有一份自己的模板，
+两边早就不一样了。现在页面布局只在这里写一份：
+
+- 模块加载时把 ARTICLE_LAYOUT 按 {{槽位}} 切成静态片段和槽位名；
+- 站点地址、内联样式这类整站不变的值用 bind() 先填进静态片段；
+- 渲染一篇文章只是把预先算好的片段和这篇文章的几个值拼起来。
+
+generate_article.py 和 test_local.py 都通过 render_article_page() 出页面。
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+from article_style import style_markup
+from markdown_render import render_markdown
+
+SLOT = re.compile(r'\{\{(\w+)\}\}')
+
+# 渲染代码的输出版本：本文件或 markdown_render.py 的改动会让生成的页面变样时加一。
+# 构建清单的模板版本是 ARTICLE_LAYOUT 加上这个数，只改注释、文档或无关代码不会让页面过期
+RENDERER_VERSION = 1
+
+# 文章页布局；{{...}} 是槽位，其余花括号原样输出
+ARTICLE_LAYOUT = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{title}} - 猫咪世界</title>
+    <meta name="description" content="{{description}}">
+    <meta name="keywords" content="养猫,猫咪,{{category}},{{keyword}}">
+    
+    <!-- Open Graph / Facebook -->
+    <meta property="og:type" content="article">
+    <meta property="og:url" content="{{url}}">
+    <meta property="og:title" content="{{title}}">
+    <meta property="og:description" content="{{description}}">
+    <meta property="og:image" content="{{base_url}}/assets/images/logo.png">
+    <meta property="og:image:width" content="1200">
+    <meta property="og:image:height" content="630">
+    <meta property="og:site_name" content="猫咪世界">
+    <meta property="og:locale" content="zh_CN">
+    <meta property="article:published_time" content="{{date}}T00:00:00+08:00">
+    <meta property="article:section" content="{{category}}">
+    <meta property="article:tag" content="养猫">
+    <meta property="article:tag" content="猫咪">
+    <meta property="article:tag" content="{{category}}">
+    
+    <!-- Twitter -->
+    <meta name="twitter:card" content="summary_large_image">
+    <meta name="twitter:url" content="{{url}}">
+    <meta name="twitter:title" content="{{title}}">
+    <meta name="twitter:description" content="{{description}}">
+    <meta name="twitter:image" content="{{base_url}}/assets/images/logo.png">
+    
+    <!-- WeChat specific -->
+    <meta name="apple-mobile-web-app-title" content="猫咪世界">
+    <meta name="application-name" content="猫咪世界">
+    <link rel="canonical" href="{{url}}">
+    {{style}}
+    <!-- Google AdSense -->
+    <script async src="https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js?client=ca-pub-YOUR_ADSENSE_ID"
+     crossorigin="anonymous"></script>
+</head>
+<body>
+    <header class="site-header">
+        <nav class="navbar">
+            <div class="nav-container">
+                <div class="nav-logo">
+                    <h1><a href="/">🐱 猫咪世界</a></h1>
+                </div>
+                <ul class="nav-menu">
+                    <li><a href="/">首页</a></li>
+                    <li><a href="/#articles">文章</a></li>
+                    <li><a href="/#breeds">品种</a></li>
+                    <li><a href="/#care">护理</a></li>
+                    <li><a href="/#products">用品</a></li>
+                </ul>
+            </div>
+        </nav>
+    </header>
+
+    <main class="main-content">
+        <article class="article-page">
+            <header class="article-header">
+                <div class="article-meta-top">
+                    <span class="article-category">{{category}}</span>
+                    <span class="article-date">📅 {{date}}</span>
+                    <span class="read-time">⏱️ {{read_time}}分钟阅读</span>
+                </div>
+                <h1>{{title}}</h1>
+            </header>
+
+            <!-- 广告位 -->
+            <div class="ad-container">
+                <ins class="adsbygoogle"
+                     style="display:block"
+                     data-ad-client="ca-pub-YOUR_ADSENSE_ID"
+                     data-ad-slot="1234567890"
+                     data-ad-format="auto"
+                     data-full-width-responsive="true"></ins>
+            </div>
+
+            <div class="article-body">
+                {{body_html}}
+                
+                <!-- 文章内广告 -->
+                <div class="ad-container" style="margin: 2rem 0;">
+                    <ins class="adsbygoogle"
+                         style="display:block; text-align:center;"
+                         data-ad-layout="in-article"
+                         data-ad-format="fluid"
+                         data-ad-client="ca-pub-YOUR_ADSENSE_ID"
+                         data-ad-slot="0987654321"></ins>
+                </div>
+            </div>
+
+            <footer class="article-footer">
+                <div class="article-tags">
+                    <span class="tag">{{category}}</span>
+                    <span class="tag">养猫知识</span>
+                    <span class="tag">宠物护理</span>
+                </div>
+                
+                <div class="article-share">
+                    <h4>分享这篇文章</h4>
+                    <div class="share-buttons">
+                        <button class="share-btn" onclick="shareArticle()">分享</button>
+                        <a href="https://service.weibo.com/share/share.php?url={{url}}&title={{title}}" target="_blank" class="social-share weibo">微博</a>
+                        <a href="javascript:void(0)" onclick="copyLink()" class="social-share copy">复制链接</a>
+                    </div>
+                </div>
+            </footer>
+        </article>
+
+        <section class="related-articles">
+            <h3>相关文章推荐</h3>
+            <div class="related-grid" id="related-articles">
+                <!-- 相关文章将通过JavaScript加载 -->
+            </div>
+        </section>
+    </main>
+
+    <footer class="site-footer">
+        <div class="footer-content">
+            <div class="footer-section">
+                <h4>猫咪世界</h4>
+                <p>专业的养猫知识分享平台，帮助铲屎官更好地照顾毛孩子。</p>
+            </div>
+            <div class="footer-section">
+                <h4>快速链接</h4>
+                <ul>
+                    <li><a href="/">返回首页</a></li>
+                    <li><a href="/sitemap.xml">网站地图</a></li>
+                    <li><a href="/feed.xml">RSS订阅</a></li>
+                </ul>
+            </div>
+        </div>
+        <div class="footer-bottom">
+            <p>&copy; 2024 猫咪世界. All rights reserved.</p>
+        </div>
+    </footer>
+
+    <script>
+        // 分享功能
+        function shareArticle() {
+            if (navigator.share) {
+                navigator.share({
+                    title: '{{title}}',
+                    text: '{{description}}',
+                    url: window.location.href
+                });
+            } else {
+                copyLink();
+            }
+        }
+        
+        function copyLink() {
+            navigator.clipboard.writeText(window.location.href).then(() => {
+                alert('链接已复制到剪贴板');
+            });
+        }
+        
+        // AdSense
+        (adsbygoogle = window.adsbygoogle || []).push({});
+        (adsbygoogle = window.adsbygoogle || []).push({});
+    </script>
+</body>
+</html>"""
+
+
+class PageTemplate:
+    """解析一次、反复渲染的页面模板"""
+
+    def __init__(self, source: str):
+        self._set_pieces(SLOT.split(source))
+
+    def _set_pieces(self, parts) -> None:
+        self._pieces = parts
+        # 奇数位是槽位名，渲染时替换成对应的值
+        self._slots = [(i, parts[i]) for i in range(1, len(parts), 2)]
+        self._byte_pieces = None
+
+    @property
+    def slots(self) -> set:
+        return {name for _, name in self._slots}
+
+    def bind(self, **values) -> 'PageTemplate':
+        """把整站不变的槽位提前填进静态片段，返回新模板"""
+        parts = [self._pieces[0]]
+        for i, name in self._slots:
+            if name in values:
+                # 填好的值和后面的静态片段并进前一个静态片段
+                parts[-1] += values[name] + self._pieces[i + 1]
+            else:
+                parts.extend((name, self._pieces[i + 1]))
+        bound = PageTemplate.__new__(PageTemplate)
+        bound._set_pieces(parts)
+        return bound
+
+    def render(self, **values) -> str:
+        pieces = self._pieces[:]
+        for i, name in self._slots:
+            pieces[i] = values[name]
+        return ''.join(pieces)
+
+    def render_bytes(self, **values) -> bytes:
+        """直接输出 UTF-8 字节，静态片段只编码一次（批量重建时写文件用）"""
+        if self._byte_pieces is None:
+            self._byte_pieces = [piece.encode('utf-8') for piece in self._pieces]
+        pieces = self._byte_pieces[:]
+        for i, name in self._slots:
+            pieces[i] = values[name].encode('utf-8')
+        return b''.join(pieces)
+
+
+ARTICLE_TEMPLATE = PageTemplate(ARTICLE_LAYOUT)
+
+
+@lru_cache(maxsize=None)
+def article_template(base_url: str, style_mode: str = 'inline') -> PageTemplate:
+    """填好站点地址和样式的文章页模板，每种组合只编译一次
+
+    style_mode 见 article_style.style_markup()：内联完整样式或外部样式表。
+    """
+    return ARTICLE_TEMPLATE.bind(base_url=base_url, style=style_markup(style_mode))
+
+
+def extract_description(content: str, max_length: int = 160) -> str:
+    """从内容中提取SEO描述"""
+    # 移除Markdown标记
+    text = re.sub(r'#+\s*', '', content)  # 移除标题标记
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # 移除加粗标记
+    text = re.sub(r'[*>-]', '', text)  # 移除其他标记
+    text = re.sub(r'\n+', ' ', text).strip()  # 合并换行
+
+    # 获取第一段有意义的内容
+    sentences = [s.strip() for s in text.split('。') if s.strip() and len(s.strip()) > 10]
+    if sentences:
+        first_sentence = sentences[0] + '。'
+        if len(first_sentence) <= max_length:
+            return first_sentence
+        else:
+            return first_sentence[:max_length-3] + '...'
+
+    # 如果没有合适的句子，截取前部分内容
+    return text[:max_length-3] + '...' if len(text) > max_length else text
+
+
+def article_page_values(title: str, category: str, content: str, date: str, slug: str,
+                        base_url: str, body_html: Optional[str] = None) -> Dict[str, str]:
+    """一篇文章在模板里用到的全部槽位值"""
+    return {
+        'title': title,
+        'category': category,
+        'date': date,
+        'keyword': title.split('：')[0] if '：' in title else title,
+        'url': f"{base_url}/articles/{slug}.html",
+        # 估算阅读时间（假设每分钟250字）
+        'read_time': str(max(1, round(len(content) / 250))),
+        'description': extract_description(content),
+        'body_html': render_markdown(content) if body_html is None else body_html,
+    }
+
+
+def render_article_page(title: str, category: str, content: str, date: str, slug: str,
+                        base_url: str, body_html: Optional[str] = None,
+                        style_mode: str = 'inline') -> str:
+    """渲染完整的文章页；body_html 不传则由 content 渲染"""
+    values = article_page_values(title, category, content, date, slug, base_url, body_html)
+    return article_template(base_url, style_mode).render(**values)
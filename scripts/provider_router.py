@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""AI 提供商路由：按优先级故障转移、熔断、对冲请求
+
+以前 call_ai_api 只认 config["ai_provider"] 一个提供商，它一出错整篇文章就没了。
+ProviderRouter 按配置的优先级依次尝试各个提供商：
+
+- 熔断：某个提供商连续失败 failure_threshold 次后，reset_timeout 秒内直接跳过，
+  到时间后放一个请求去试探，成功才恢复；
+- 对冲：开启后，如果当前请求的耗时超过该提供商历史耗时的某个分位数，
+  就同时向下一个健康的提供商再发一份，谁先成功用谁。
+
+这样整个任务的尾延迟取决于最快的那个健康提供商，而不是最慢的。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ProviderError(Exception):
+    """提供商返回了非 200 的响应；headers 里可能带着 Retry-After 等限流信息"""
+
+    def __init__(self, provider: str, status_code: int, body: str = '',
+                 headers: Optional[Dict] = None):
+        self.provider = provider
+        self.status_code = status_code
+        self.body = body
+        self.headers = dict(headers or {})
+        super().__init__(f"{provider} API调用失败: {status_code} - {body[:500]}")
+
+
+class AllProvidersFailedError(Exception):
+    """所有可用的提供商都失败了（或者都处于熔断状态）"""
+    pass
+
+
+class CircuitBreaker:
+    """单个提供商的熔断器：closed → open → half_open → closed"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        # half_open 时是否已经有一个试探请求在路上
+        self._probing = False
+
+    def _cooled_down(self) -> bool:
+        return self._clock() - self._opened_at >= self.reset_timeout
+
+    def is_available(self) -> bool:
+        """现在能不能向这个提供商发请求（只读，不改变状态，用于列出候选）"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                return self._cooled_down()
+            return not self._probing
+
+    def try_acquire_probe(self) -> bool:
+        """真正要发请求之前调用：closed 时总是放行；冷却结束后只放一个试探请求
+
+        放行的请求结束时必须调用 record_success() / record_failure()
+        （或者请求没发出去时调用 release_probe()）。
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                if not self._cooled_down():
+                    return False
+                self.state = 'half_open'
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release_probe(self) -> None:
+        """试探请求没有结果就放弃了（比如流式读取被中途丢弃），让出试探名额"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = self._clock()
+
+
+class LatencyTracker:
+    """记录每个提供商最近若干次成功调用的耗时"""
+
+    def __init__(self, window: int = 50):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ProviderRouter:
+    """按优先级调用提供商，带熔断和可选的对冲请求
+
+    call_provider(provider, prompt, max_tokens) 负责真正发请求，失败时抛异常。
+    max_concurrency 是同时调用 call() 的线程数（并发生成的 max_workers）。
+    """
+
+    def __init__(self, providers: List[str],
+                 call_provider: Callable[[str, str, int], str],
+                 router_config: Optional[Dict] = None,
+                 max_concurrency: int = 1):
+        router_config = router_config or {}
+        hedging = router_config.get('hedging', {})
+        self.providers = list(providers)
+        self.call_provider = call_provider
+        self.breakers = {
+            p: CircuitBreaker(router_config.get('failure_threshold', 3),
+                              router_config.get('reset_timeout', 300))
+            for p in self.providers
+        }
+        self.latency = {p: LatencyTracker() for p in self.providers}
+        self.hedging_enabled = hedging.get('enabled', False)
+        self.hedge_percentile = hedging.get('percentile', 90)
+        self.hedge_min_samples = hedging.get('min_samples', 5)
+        self.hedge_default_delay = hedging.get('default_delay', 45)
+        self.hedges_fired = 0
+        # 每个并发的 call() 最多同时占用所有提供商各一个线程（主请求 + 对冲），
+        # 线程池按这个上限开，并发生成时不会互相排队、对冲也不会抢主请求的线程
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency) * len(self.providers),
+                                            thread_name_prefix='provider')
+
+    def healthy_providers(self) -> List[str]:
+        """按优先级列出当前没有熔断的提供商（只读；真正发请求前还要 try_acquire_probe）"""
+        return [p for p in self.providers if self.breakers[p].is_available()]
+
+    def hedge_delay(self, provider: str) -> float:
+        """等多久还没结果就向下一个提供商发对冲请求"""
+        tracker = self.latency[provider]
+        if len(tracker) >= self.hedge_min_samples:
+            return tracker.percentile(self.hedge_percentile)
+        return self.hedge_default_delay
+
+    def _timed_call(self, provider: str, prompt: str, max_tokens: int) -> str:
+        started = time.monotonic()
+        try:
+            result = self.call_provider(provider, prompt, max_tokens)
+        except Exception:
+            self.breakers[provider].record_failure()
+            raise
+        self.breakers[provider].record_success()
+        self.latency[provider].record(time.monotonic() - started)
+        return result
+
+    def call(self, prompt: str, max_tokens: int) -> Tuple[str, str]:
+        """生成内容，返回 (生成结果, 实际使用的提供商)"""
+        candidates = self.healthy_providers()
+        if not candidates:
+            raise AllProvidersFailedError(f"所有AI提供商都处于熔断状态：{', '.join(self.providers)}")
+
+        errors = []
+        pending = {}
+        next_index = 0
+
+        def launch() -> Optional[str]:
+            """向下一个拿到放行的候选发请求；都拿不到时返回 None"""
+            nonlocal next_index
+            while next_index < len(candidates):
+                provider = candidates[next_index]
+                next_index += 1
+                # 半开状态的试探名额可能刚被别的线程拿走
+                if not self.breakers[provider].try_acquire_probe():
+                    continue
+                future = self._executor.submit(self._timed_call, provider, prompt, max_tokens)
+                pending[future] = provider
+                return provider
+            return None
+
+        last_launched = launch()
+        if last_launched is None:
+            raise AllProvidersFailedError(f"所有AI提供商都处于熔断状态：{', '.join(self.providers)}")
+        while pending:
+            timeout = None
+            if self.hedging_enabled and next_index < len(candidates):
+                timeout = self.hedge_delay(last_launched)
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 当前请求太慢：不取消它，同时向下一个提供商再发一份
+                hedged = launch()
+                if hedged is not None:
+                    self.hedges_fired += 1
+                    print(f"⏱️  {last_launched} 超过 {timeout:.1f} 秒未返回，对冲请求 {hedged}")
+                    last_launched = hedged
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result(), provider
+                except Exception as e:
+                    errors.append(f"{provider}: {e}")
+                    print(f"⚠️  {provider} 调用失败：{e}")
+
+            if not pending and next_index < len(candidates):
+                last_launched = launch() or last_launched
+
+        raise AllProvidersFailedError("所有AI提供商都调用失败：" + "；".join(errors))
+
+    def describe(self) -> str:
+        parts = []
+        for p in self.providers:
+            p90 = self.latency[p].percentile(90)
+            latency = f"p90 {p90:.1f}s" if p90 is not None else "无样本"
+            parts.append(f"{p}({self.breakers[p].state}, {latency})")
+        return "、".join(parts) + f"；对冲 {self.hedges_fired} 次"
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
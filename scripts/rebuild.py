@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""从源文件重建全部文章页
+
+sources/ 里每篇文章都有 Markdown 原文和元数据（见 article_sources.py），
+模板、样式或渲染器改了之后，用这个脚本把所有页面用当前版本重新渲染一遍，
+不用再写一次性的正则回填脚本。渲染分到进程池里跑满所有核；
+构建清单（build_manifest.py）里输入没变的文章直接跳过，内容没变的页面不会重写。
+
+用法：
+    python scripts/rebuild.py                 # 重建所有有源文件的文章
+    python scripts/rebuild.py --workers 4
+    python scripts/rebuild.py --dry-run       # 只统计会改哪些页面
+    python scripts/rebuild.py --force         # 忽略构建清单全部重新渲染
+    python scripts/rebuild.py --import-html   # 先给没有源文件的旧文章从现有页面导入正文
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex
+from article_style import STYLE_MODES, write_stylesheet
+from build_manifest import BuildManifest, content_hash, file_hash
+from html_migrations import migration_ids
+from site_config import load_site_config, site_base_url
+from article_sources import (LEGACY_BODY, SOURCE_SUFFIX, iter_source_paths, load_source,
+                             make_source, render_source, save_source, source_path)
+
+ARTICLES_DIR = 'articles'
+LEGACY_DESCRIPTION = re.compile(r'<meta name="description" content="([^"]*)">')
+LEGACY_READ_TIME = re.compile(r'⏱️ (\d+)分钟')
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """内容不同才写（临时文件 + 改名），返回是否写了"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def rebuild_one(task: Tuple[str, str, str, str, bool]) -> Tuple[str, bool, str]:
+    """进程池里执行：渲染一个源文件，返回 (slug, 是否有变化, 页面哈希)"""
+    path, base_url, style_mode, articles_dir, dry_run = task
+    record = load_source(path)
+    html = render_source(record, base_url, style_mode)
+    out_path = os.path.join(articles_dir, record['slug'] + '.html')
+    if dry_run:
+        try:
+            with open(out_path, 'rb') as f:
+                changed = f.read() != html
+        except FileNotFoundError:
+            changed = True
+    else:
+        changed = write_if_changed(out_path, html)
+    return record['slug'], changed, content_hash(html)
+
+
+def rebuild(paths: List[str], base_url: str, articles_dir: str = ARTICLES_DIR,
+            workers: Optional[int] = None, dry_run: bool = False,
+            manifest: Optional[BuildManifest] = None, force: bool = False,
+            style_mode: str = 'inline') -> List[str]:
+    """重建给定的源文件，返回内容有变化的 slug
+
+    传入 manifest 时，输入没变的文章直接跳过（force 时不跳过），重建结果记进清单。
+    """
+    source_hashes = {}
+    if manifest is not None:
+        todo = []
+        for path in paths:
+            slug = os.path.basename(path)[:-len(SOURCE_SUFFIX)]
+            source_hashes[slug] = file_hash(path)
+            if force or not manifest.article_is_current(slug, source_hashes[slug],
+                                                        os.path.join(articles_dir, slug + '.html'),
+                                                        style_mode):
+                todo.append(path)
+        paths = todo
+
+    tasks = [(path, base_url, style_mode, articles_dir, dry_run) for path in paths]
+    if not tasks:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(rebuild_one, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(tasks) // (workers * 4))
+        results = executor.map(rebuild_one, tasks, chunksize=chunksize)
+    changed = []
+    rendered_with = migration_ids(style_mode)
+    try:
+        for slug, was_changed, output in results:
+            if was_changed:
+                changed.append(slug)
+            if manifest is not None and not dry_run:
+                manifest.record_article(slug, source_hashes.get(slug), output, style_mode,
+                                        migrations=rendered_with)
+    finally:
+        if workers != 1:
+            executor.shutdown()
+    return changed
+
+
+def import_legacy_html(articles: List[Dict], articles_dir: str = ARTICLES_DIR) -> int:
+    """给没有源文件的旧文章从现有页面导入正文，返回导入的篇数"""
+    imported = 0
+    for article in articles:
+        slug = article['slug']
+        if os.path.exists(source_path(slug)):
+            continue
+        try:
+            with open(os.path.join(articles_dir, slug + '.html'), 'r', encoding='utf-8') as f:
+                page = f.read()
+        except FileNotFoundError:
+            continue
+        body = LEGACY_BODY.search(page)
+        if not body:
+            print(f"⚠️  {slug}.html 找不到正文，跳过")
+            continue
+        description = LEGACY_DESCRIPTION.search(page)
+        read_time = LEGACY_READ_TIME.search(page)
+        save_source(make_source(
+            slug, article['title'], article['category'], article['date'],
+            body_html=body.group(1),
+            description=description.group(1) if description else article.get('excerpt', ''),
+            read_time=int(read_time.group(1)) if read_time else 1,
+        ))
+        imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从 sources/ 重建全部文章页')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认等于 CPU 核数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不写文件')
+    parser.add_argument('--force', action='store_true', help='忽略构建清单，全部重新渲染')
+    parser.add_argument('--style-mode', choices=STYLE_MODES,
+                        help='覆盖 config.json 里的 style.mode（inline 内联 / external 外部样式表）')
+    parser.add_argument('--import-html', action='store_true',
+                        help='先给没有源文件的旧文章从现有页面导入正文')
+    args = parser.parse_args()
+
+    # 允许从 scripts/ 或项目根目录运行
+    if os.path.basename(os.getcwd()) == 'scripts':
+        os.chdir('..')
+
+    articles = ArticleIndex().load()
+    if args.import_html:
+        print(f"📥 从旧页面导入 {import_legacy_html(articles)} 篇文章的正文")
+
+    paths = list(iter_source_paths())
+    missing = len({a['slug'] for a in articles} - {os.path.basename(p)[:-len(SOURCE_SUFFIX)] for p in paths})
+    if missing:
+        print(f"ℹ️  还有 {missing} 篇文章没有源文件，不参与重建（可用 --import-html 导入）")
+
+    config = load_site_config()
+    style_mode = args.style_mode or config.get('style', {}).get('mode', 'inline')
+    if style_mode == 'external' and not args.dry_run:
+        print(f"🎨 外部样式表：{write_stylesheet()}")
+
+    manifest = BuildManifest()
+    started = time.perf_counter()
+    changed = rebuild(paths, site_base_url(), workers=args.workers, dry_run=args.dry_run,
+                      manifest=manifest, force=args.force, style_mode=style_mode)
+    elapsed = time.perf_counter() - started
+    manifest.save()
+
+    prefix = '[dry-run] ' if args.dry_run else ''
+    print(f"{prefix}源文件 {len(paths)} 篇，{len(changed)} 篇页面有变化，用时 {elapsed:.2f} 秒"
+          f"（{len(paths) / elapsed if elapsed else 0:.0f} 篇/秒）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
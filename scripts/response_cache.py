@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""AI 响应的本地缓存
+
+以 (提供商, 模型, 提示词, max_tokens, temperature) 的哈希为键，把原始生成结果
+存到磁盘上。同一个提示词重跑时直接读缓存，不再重新付费生成：
+写 HTML、更新索引、生成 sitemap 这些后续步骤失败了，可以在本地立刻重跑；
+测试也可以用缓存里的真实响应离线回放。
+
+缓存按总大小和存放时间淘汰，最久没用过的先删。总大小在内存里累计，
+只有超限或者每写 EVICT_EVERY 条时才扫一遍目录，批量写入不会变成 O(n²)；
+扫目录时顺带清掉崩溃时留下的 *.tmp。
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+# 每写这么多条做一次完整扫描（主要是清过期条目；超限时会立即扫描）
+EVICT_EVERY = 100
+# 比这更旧的 .tmp 一定是中途崩溃的写入留下的
+STALE_TMP_SECONDS = 3600
+
+
+class ResponseCache:
+    """内容寻址的磁盘缓存：<cache_dir>/<键的前两位>/<键>.json"""
+
+    def __init__(self, cache_dir: str = '.cache/ai_responses',
+                 max_bytes: int = 50 * 1024 * 1024,
+                 max_age_seconds: float = 30 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        # 缓存目录的总大小；None 表示还没扫描过
+        self._size: Optional[int] = None
+        self._puts_since_scan = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str,
+                 max_tokens: int, temperature: float) -> str:
+        """计算缓存键：任何一个参数变了都是不同的键"""
+        material = json.dumps([provider, model, prompt, max_tokens, temperature],
+                              ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的生成结果，没有或已过期返回 None"""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        if time.time() - stat.st_mtime > self.max_age_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                completion = json.load(f)['completion']
+        except (OSError, ValueError, KeyError):
+            # 写了一半或者格式不对的条目，当作没有
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # 更新修改时间，淘汰时按"最近使用"排序
+        os.utime(path, None)
+        self.hits += 1
+        return completion
+
+    def put(self, key: str, completion: str, meta: Optional[Dict] = None) -> None:
+        """写入一条生成结果，然后按需淘汰旧条目"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = dict(meta or {})
+        record['created'] = time.time()
+        record['completion'] = completion
+
+        # 先写临时文件再改名，中途失败也不会留下半个条目
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        replaced = self._file_size(path)
+        os.replace(tmp_path, path)
+
+        self._puts_since_scan += 1
+        if self._size is not None:
+            self._size += self._file_size(path) - replaced
+        if (self._size is None or self._size > self.max_bytes
+                or self._puts_since_scan >= EVICT_EVERY):
+            self.evict()
+
+    def evict(self) -> int:
+        """扫描整个目录：删除过期条目和残留的临时文件；总大小超限时再从最久没用的开始删
+
+        返回删除的条目数（不含临时文件），并重新校准内存里的总大小。
+        """
+        entries = []
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.endswith('.tmp'):
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        self._remove(path)
+                    continue
+                if not name.endswith('.json'):
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        self._size = total
+        self._puts_since_scan = 0
+        return removed
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _remove(self, path: str) -> None:
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        if self._size is not None and path.endswith('.json'):
+            self._size = max(0, self._size - size)
+
+
+def create_cache(cache_config: Optional[Dict]) -> Optional[ResponseCache]:
+    """按 config.json 里的 cache 配置创建缓存；未启用时返回 None"""
+    cache_config = cache_config or {}
+    if not cache_config.get('enabled', False):
+        return None
+    return ResponseCache(
+        cache_dir=cache_config.get('dir', '.cache/ai_responses'),
+        max_bytes=int(cache_config.get('max_mb', 50) * 1024 * 1024),
+        max_age_seconds=cache_config.get('max_age_days', 30) * 24 * 3600,
+    )
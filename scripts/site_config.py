@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""站点配置：config.json + CNAME，每个进程只读一次
+
+以前 generate_article.py、generate_sitemap.py、generate_rss.py、rebuild.py
+各自读 config.json，sitemap 和 RSS 还各有一份探测域名的代码，默认域名也不一样
+（文章页默认 yourusername.github.io，sitemap/RSS 默认 pet-content-hub.github.io），
+配置缺失时页面和订阅源里的地址会对不上。现在所有脚本和 build.py 都从这里取：
+
+    load_site_config()  config.json 逐层合并默认值、按 SCHEMA 校验后的结果（缓存，只读）
+    site_base_url()     站点地址：CNAME 优先，其次 config.json 的 base_url，再次默认值
+
+配置写错（类型不对、取值不在范围内）时抛出 ConfigError，列出所有问题，
+而不是等到生成到一半才在某个 .get() 上出错。
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from article_style import STYLE_MODES
+
+CONFIG_PATH = 'config.json'
+CNAME_PATH = 'CNAME'
+DEFAULT_BASE_URL = 'https://www.mao.com.cn'
+PROVIDERS = ('openai', 'claude', 'zhipu', 'qwen')
+
+DEFAULT_CONFIG = {
+    "ai_provider": "openai",  # openai, claude, zhipu, qwen
+    # 按优先级排列的提供商，前一个失败或熔断时自动换下一个；不配置则只用 ai_provider
+    "ai_providers": [],
+    # 熔断与对冲请求
+    "router": {
+        "failure_threshold": 3,
+        "reset_timeout": 300,
+        "hedging": {"enabled": False, "percentile": 90, "min_samples": 5, "default_delay": 45}
+    },
+    "article_length": "medium",  # short, medium, long
+    "articles_per_day": 1,
+    "output_dir": "articles",
+    "images_dir": "assets/images",
+    "base_url": DEFAULT_BASE_URL,
+    # max_workers > 1 时并发生成；rate_limits 按提供商限制并发数、每分钟请求数和token数
+    "concurrency": {"max_workers": 1, "rate_limits": {}},
+    # 429/5xx/网络错误的重试：指数退避加抖动，优先遵守 Retry-After
+    "retry": {"max_attempts": 4, "base_delay": 1, "max_delay": 30},
+    # AI接口的连接池大小，以及分开设置的连接/读取超时（秒）
+    "http": {"pool_size": 4, "connect_timeout": 5, "read_timeout": 60},
+    # 流式生成：边收边渲染；stall_timeout 秒没有新内容就中止
+    "streaming": {"enabled": False, "stall_timeout": 20},
+    # AI响应的本地缓存：同一个提示词重跑时不再重新生成
+    "cache": {"enabled": True, "dir": ".cache/ai_responses", "max_mb": 50, "max_age_days": 30},
+    # 批量补文章：openai 走 Batch API，local 是本地文件替身
+    "batch": {"backend": "openai", "dir": ".cache/batches", "poll_interval": 30, "timeout_hours": 24},
+    # 文章页样式：inline 整份内联；external 内联首屏样式 + 带哈希的外部样式表
+    "style": {"mode": "inline"}
+}
+
+NUMBER = (int, float)
+# (路径, 类型, 可选值, 最小值)；路径不存在时不检查，缺省值由 DEFAULT_CONFIG 提供
+SCHEMA: List[Tuple[str, object, Optional[tuple], Optional[float]]] = [
+    ("ai_provider", str, PROVIDERS, None),
+    ("ai_providers", list, None, None),
+    ("router", dict, None, None),
+    ("router.failure_threshold", int, None, 1),
+    ("router.reset_timeout", NUMBER, None, 0),
+    ("router.hedging", dict, None, None),
+    ("router.hedging.enabled", bool, None, None),
+    ("article_length", str, ("short", "medium", "long"), None),
+    ("articles_per_day", int, None, 0),
+    ("output_dir", str, None, None),
+    ("images_dir", str, None, None),
+    ("base_url", str, None, None),
+    ("concurrency", dict, None, None),
+    ("concurrency.max_workers", int, None, 1),
+    ("concurrency.rate_limits", dict, None, None),
+    ("retry", dict, None, None),
+    ("retry.max_attempts", int, None, 1),
+    ("retry.base_delay", NUMBER, None, 0),
+    ("retry.max_delay", NUMBER, None, 0),
+    ("http", dict, None, None),
+    ("http.pool_size", int, None, 1),
+    ("http.connect_timeout", NUMBER, None, 0),
+    ("http.read_timeout", NUMBER, None, 0),
+    ("streaming", dict, None, None),
+    ("streaming.enabled", bool, None, None),
+    ("streaming.stall_timeout", NUMBER, None, 0),
+    ("cache", dict, None, None),
+    ("cache.enabled", bool, None, None),
+    ("cache.max_mb", NUMBER, None, 0),
+    ("batch", dict, None, None),
+    ("batch.backend", str, ("openai", "local"), None),
+    ("style", dict, None, None),
+    ("style.mode", str, STYLE_MODES, None),
+    ("seo", dict, None, None),
+    ("ads", dict, None, None),
+]
+
+
+class ConfigError(ValueError):
+    """config.json 不符合 SCHEMA"""
+    pass
+
+
+def _lookup(config: Dict, path: str):
+    value = config
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            raise KeyError(path)
+        value = value[key]
+    return value
+
+
+def validate_config(config: Dict) -> List[str]:
+    """按 SCHEMA 检查配置，返回所有问题（空列表表示没问题）"""
+    problems = []
+    for path, kind, choices, minimum in SCHEMA:
+        try:
+            value = _lookup(config, path)
+        except KeyError:
+            continue
+        # bool 是 int 的子类，"articles_per_day": true 不能算合法
+        if not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool):
+            names = '/'.join(k.__name__ for k in kind) if isinstance(kind, tuple) else kind.__name__
+            problems.append(f"{path} 应为 {names}，实际是 {value!r}")
+        elif choices is not None and value not in choices:
+            problems.append(f"{path} 只能是 {', '.join(choices)}，实际是 {value!r}")
+        elif minimum is not None and value < minimum:
+            problems.append(f"{path} 不能小于 {minimum}，实际是 {value!r}")
+
+    providers = config.get("ai_providers")
+    if isinstance(providers, list):
+        unknown = [p for p in providers if p not in PROVIDERS]
+        if unknown:
+            problems.append(f"ai_providers 里有不支持的提供商：{unknown}（可选：{', '.join(PROVIDERS)}）")
+    base_url = config.get("base_url")
+    if isinstance(base_url, str) and not base_url.startswith(('http://', 'https://')):
+        problems.append(f"base_url 必须以 http:// 或 https:// 开头，实际是 {base_url!r}")
+    return problems
+
+
+def merge_config(defaults: Dict, overrides: Dict) -> Dict:
+    """把 overrides 逐层合并进 defaults（原地修改并返回 defaults）
+
+    config.json 里只写了某一节的一部分（比如 router 只改 failure_threshold），
+    这一节其余的键仍取默认值，而不是整节被替换掉。
+    """
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(defaults.get(key), dict):
+            merge_config(defaults[key], value)
+        else:
+            defaults[key] = value
+    return defaults
+
+
+@lru_cache(maxsize=None)
+def load_site_config(path: str = CONFIG_PATH) -> Dict:
+    """读取并校验 config.json（缺省项用 DEFAULT_CONFIG 补上）
+
+    结果在进程内缓存、所有调用方共用，不要原地修改；要改先 copy.deepcopy。
+    """
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            merge_config(config, json.load(f))
+    except FileNotFoundError:
+        print(f"配置文件 {path} 不存在，使用默认配置")
+    problems = validate_config(config)
+    if problems:
+        raise ConfigError(f"{path} 有 {len(problems)} 处错误：\n  " + "\n  ".join(problems))
+    config["base_url"] = config["base_url"].rstrip('/')
+    return config
+
+
+@lru_cache(maxsize=None)
+def site_base_url(path: str = CONFIG_PATH, cname_path: str = CNAME_PATH) -> str:
+    """站点地址（不带结尾斜杠）：CNAME 优先，其次 config.json 的 base_url"""
+    try:
+        with open(cname_path, 'r', encoding='utf-8') as f:
+            domain = f.read().strip()
+        if domain:
+            print(f"📍 检测到CNAME域名: {domain}")
+            return f"https://{domain}"
+    except FileNotFoundError:
+        pass
+    base_url = load_site_config(path)["base_url"]
+    print(f"📍 使用config.json中的URL: {base_url}")
+    return base_url
@@ -6,10 +6,15 @@
 """
 
 import os
-import json
+import sys
 import datetime
 import random
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from article_index import ArticleIndex
+from page_template import render_article_page
+from site_config import site_base_url
+
 def setup_working_directory():
     """设置正确的工作目录"""
     current_dir = os.getcwd()
@@ -144,164 +149,14 @@ def generate_sample_article():
     return article
 
 def create_article_html(title, category, content, date, slug):
-    """创建文章HTML"""
-    read_time = f"{max(1, round(len(content) / 250))}分钟"
-    # 提取更好的描述文本
-    import re
-    # 移除Markdown标记并获取第一段实际内容
-    text_content = re.sub(r'[#*>-]', '', content)
-    text_content = re.sub(r'\n+', ' ', text_content).strip()
-    lines = [line.strip() for line in text_content.split('\n') if line.strip() and not line.startswith('#')]
-    excerpt = lines[0][:120] + "..." if lines else "专业的猫咪饲养知识分享"
-    base_url = "https://www.mao.com.cn"
-    og_image = f"{base_url}/assets/images/logo.png"
-    
-    html_content = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - 猫咪世界</title>
-    <meta name="description" content="{excerpt}">
-    <meta name="keywords" content="养猫,猫咪,{category}">
-    
-    <!-- Open Graph / Facebook -->
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="{base_url}/articles/{slug}.html">
-    <meta property="og:title" content="{title}">
-    <meta property="og:description" content="{excerpt}">
-    <meta property="og:image" content="{og_image}">
-    <meta property="og:image:width" content="1200">
-    <meta property="og:image:height" content="630">
-    <meta property="og:site_name" content="猫咪世界">
-    <meta property="og:locale" content="zh_CN">
-    <meta property="article:published_time" content="{date}T00:00:00+08:00">
-    <meta property="article:section" content="{category}">
-    <meta property="article:tag" content="养猫">
-    <meta property="article:tag" content="猫咪">
-    <meta property="article:tag" content="{category}">
-    
-    <!-- Twitter -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:url" content="{base_url}/articles/{slug}.html">
-    <meta name="twitter:title" content="{title}">
-    <meta name="twitter:description" content="{excerpt}">
-    <meta name="twitter:image" content="{og_image}">
-    
-    <!-- WeChat specific -->
-    <meta name="apple-mobile-web-app-title" content="猫咪世界">
-    <meta name="application-name" content="猫咪世界">
-    
-    <link rel="stylesheet" href="../assets/css/style.css">
-    <link rel="canonical" href="{base_url}/articles/{slug}.html">
-</head>
-<body>
-    <header class="site-header">
-        <nav class="navbar">
-            <div class="nav-container">
-                <div class="nav-logo">
-                    <h1><a href="../index.html">🐱 猫咪世界</a></h1>
-                </div>
-                <ul class="nav-menu">
-                    <li><a href="../index.html">首页</a></li>
-                    <li><a href="../index.html#articles">文章</a></li>
-                </ul>
-            </div>
-        </nav>
-    </header>
-
-    <main class="main-content">
-        <article class="article-page">
-            <header class="article-header">
-                <div class="article-meta-top">
-                    <span class="article-category">{category}</span>
-                    <span class="article-date">📅 {date}</span>
-                    <span class="read-time">⏱️ {read_time}</span>
-                </div>
-                <h1>{title}</h1>
-            </header>
-
-            <div class="article-body">
-{markdown_to_html(content)}
-            </div>
-
-            <footer class="article-footer">
-                <div class="article-tags">
-                    <span class="tag">{category}</span>
-                    <span class="tag">测试文章</span>
-                </div>
-            </footer>
-        </article>
-    </main>
-
-    <footer class="site-footer">
-        <div class="footer-content">
-            <div class="footer-section">
-                <h4>猫咪世界</h4>
-                <p>专业的养猫知识分享平台</p>
-            </div>
-        </div>
-    </footer>
-</body>
-</html>"""
-    
-    return html_content
-
-def markdown_to_html(markdown_text):
-    """简单的Markdown转HTML"""
-    import re
-    
-    html = markdown_text
-    
-    # 标题转换
-    html = re.sub(r'^### (.*$)', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*$)', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^# (.*$)', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    
-    # 加粗文本
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-    
-    # 提示框
-    html = re.sub(r'^> 💡 提示：(.*$)', r'<div class="tip-box">💡 <strong>提示：</strong>\1</div>', html, flags=re.MULTILINE)
-    
-    # 列表转换
-    lines = html.split('\n')
-    in_ul = False
-    result_lines = []
-    
-    for line in lines:
-        if line.strip().startswith('- '):
-            if not in_ul:
-                result_lines.append('<ul>')
-                in_ul = True
-            result_lines.append(f'  <li>{line.strip()[2:]}</li>')
-        else:
-            if in_ul:
-                result_lines.append('</ul>')
-                in_ul = False
-            if line.strip():
-                result_lines.append(f'<p>{line}</p>')
-            else:
-                result_lines.append('')
-    
-    if in_ul:
-        result_lines.append('</ul>')
-    
-    return '\n'.join(result_lines)
+    """创建文章HTML，和正式生成用同一份页面模板"""
+    return render_article_page(title, category, content, date, slug, site_base_url())
 
 def update_articles_index(article_info):
-    """更新文章索引"""
-    try:
-        with open('articles.json', 'r', encoding='utf-8') as f:
-            articles = json.load(f)
-    except FileNotFoundError:
-        articles = []
-    
-    # 添加新文章到列表开头
-    articles.insert(0, article_info)
-    
-    with open('articles.json', 'w', encoding='utf-8') as f:
-        json.dump(articles, f, indent=2, ensure_ascii=False)
+    """更新文章索引（和正式生成走同一套索引日志，再立即合并）"""
+    index = ArticleIndex()
+    index.add([article_info])
+    index.compact()
 
 def main():
     """主函数"""
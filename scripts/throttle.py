@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""AI 接口的重试与限流
+
+以前 429 或 5xx 直接抛一个笼统的 Exception，整篇文章作废；唯一的限流手段是
+main() 里两篇文章之间固定 sleep 3 秒。这里提供：
+
+- classify_error()：把错误分成 限流 / 服务端错误 / 网络错误 / 不可重试 几类；
+- retry_after_seconds()：读取 Retry-After 以及各家的限流重置头；
+- ProviderThrottle：每个提供商一个，限制并发数，并按 requests/min 和
+  tokens/min 两个令牌桶匀速放行，遇到 429 时整个提供商暂停到重置时间；
+- RetryPolicy：指数退避加随机抖动，优先遵守服务端给出的等待时间；
+- ThrottleStats：重试次数和等待时间，运行结束时打印。
+
+节奏由实际的限额决定，而不是一个写死的 sleep。
+"""
+
+import datetime
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 错误分类
+RATE_LIMITED = 'rate_limited'
+SERVER_ERROR = 'server_error'
+NETWORK_ERROR = 'network_error'
+FATAL = 'fatal'
+
+RETRYABLE = (RATE_LIMITED, SERVER_ERROR, NETWORK_ERROR)
+
+# OpenAI 的重置时间格式："1s"、"6m0s"、"20ms"、"1h2m3.5s"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def classify_error(exc: Exception) -> str:
+    """判断一个调用错误属于哪一类"""
+    status = getattr(exc, 'status_code', None)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMITED
+        if status >= 500 or status in (408, 409):
+            return SERVER_ERROR
+        return FATAL
+
+    # 连接失败、超时、流式中断：都值得再试一次
+    try:
+        import requests
+        if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return NETWORK_ERROR
+    except ImportError:
+        pass
+    if type(exc).__name__ == 'StreamStalledError' or isinstance(exc, (ConnectionError, TimeoutError)):
+        return NETWORK_ERROR
+    return FATAL
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    parts = _DURATION_PART.findall(value)
+    if not parts or ''.join(n + u for n, u in parts) != value.replace(' ', ''):
+        return None
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def _parse_header_value(value: str, now: float) -> Optional[float]:
+    """把一个限流相关的头解析成"还要等几秒"""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    duration = _parse_duration(value)
+    if duration is not None:
+        return duration
+
+    # HTTP 日期（Retry-After）或 RFC 3339 时间戳（Anthropic 的 *-reset）
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+        return max(0.0, when - now)
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        return max(0.0, when - now)
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(headers: Optional[Dict], now: Optional[float] = None) -> Optional[float]:
+    """从响应头里读出服务端要求的等待时间，没有则返回 None
+
+    now 是当前的 Unix 时间，用于换算 HTTP 日期，默认取 time.time()。
+    """
+    if not headers:
+        return None
+    lowered = {k.lower(): v for k, v in headers.items()}
+    if now is None:
+        now = time.time()
+
+    if 'retry-after-ms' in lowered:
+        try:
+            return max(0.0, float(lowered['retry-after-ms']) / 1000)
+        except ValueError:
+            pass
+    if 'retry-after' in lowered:
+        seconds = _parse_header_value(lowered['retry-after'], now)
+        if seconds is not None:
+            return seconds
+
+    # 没有 Retry-After 时，看剩余额度为 0 的那个限额什么时候重置
+    waits = []
+    for kind in ('requests', 'tokens'):
+        remaining = lowered.get(f'x-ratelimit-remaining-{kind}',
+                                lowered.get(f'anthropic-ratelimit-{kind}-remaining'))
+        reset = lowered.get(f'x-ratelimit-reset-{kind}',
+                            lowered.get(f'anthropic-ratelimit-{kind}-reset'))
+        if reset is None or remaining not in ('0', 0):
+            continue
+        seconds = _parse_header_value(str(reset), now)
+        if seconds is not None:
+            waits.append(seconds)
+    return max(waits) if waits else None
+
+
+class ThrottleStats:
+    """重试与等待的计数器（所有提供商共用，线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = {}
+        self.retry_wait = 0.0
+        self.throttle_wait = 0.0
+
+    def record_retry(self, provider: str, wait: float) -> None:
+        with self._lock:
+            self.retries[provider] = self.retries.get(provider, 0) + 1
+            self.retry_wait += wait
+
+    def record_throttle(self, wait: float) -> None:
+        with self._lock:
+            self.throttle_wait += wait
+
+    def describe(self) -> str:
+        retries = "、".join(f"{p} {n} 次" for p, n in sorted(self.retries.items())) or "0 次"
+        return f"重试 {retries}，退避等待 {self.retry_wait:.1f} 秒，限流等待 {self.throttle_wait:.1f} 秒"
+
+
+class TokenBucket:
+    """令牌桶：每分钟补充 per_minute 个令牌，最多攒 per_minute 个"""
+
+    def __init__(self, per_minute: float, now: Optional[float] = None):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """预扣 amount 个令牌，返回需要等待的秒数（调用方负责加锁）"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # 单次请求比整个桶还大时按桶容量算，否则永远等不到
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class ProviderThrottle:
+    """单个提供商的限流器：并发上限 + requests/min + tokens/min
+
+    用法：
+        with throttle.slot(estimated_tokens):
+            ...发请求...
+    """
+
+    def __init__(self, max_concurrent: int = 1,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 stats: Optional[ThrottleStats] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._slots = threading.Semaphore(max(1, max_concurrent))
+        self._lock = threading.Lock()
+        now = clock()
+        self._requests = TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self.stats = stats or ThrottleStats()
+
+    def pause_for(self, seconds: float) -> None:
+        """服务端说限流了：整个提供商暂停 seconds 秒"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def _wait_time(self, tokens: float) -> float:
+        with self._lock:
+            now = self._clock()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return wait
+
+    def slot(self, tokens: float = 0):
+        return _ThrottleSlot(self, tokens)
+
+
+class _ThrottleSlot:
+    def __init__(self, throttle: ProviderThrottle, tokens: float):
+        self.throttle = throttle
+        self.tokens = tokens
+
+    def __enter__(self):
+        self.throttle._slots.acquire()
+        wait = self.throttle._wait_time(self.tokens)
+        if wait > 0:
+            self.throttle.stats.record_throttle(wait)
+            self.throttle._sleep(wait)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.throttle._slots.release()
+        return False
+
+
+def create_throttle(limits: Optional[Dict], stats: ThrottleStats) -> ProviderThrottle:
+    """按 config.json 里 concurrency.rate_limits.<provider> 创建限流器"""
+    limits = limits or {}
+    rpm = limits.get('requests_per_minute')
+    # 兼容旧配置：min_interval 秒一次 ≈ 每分钟 60/min_interval 次
+    if rpm is None and limits.get('min_interval'):
+        rpm = 60.0 / limits['min_interval']
+    return ProviderThrottle(
+        max_concurrent=limits.get('max_concurrent', 1),
+        requests_per_minute=rpm,
+        tokens_per_minute=limits.get('tokens_per_minute'),
+        stats=stats,
+    )
+
+
+class RetryPolicy:
+    """指数退避 + 全抖动的重试策略
+
+    服务端给了等待时间就按它等（但超过 max_delay 就不等了，直接失败，
+    让路由换下一个提供商）；没给就按 base_delay * 2^n 随机抖动。
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0,
+                 max_delay: float = 30.0, stats: Optional[ThrottleStats] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = stats or ThrottleStats()
+        self.sleep = sleep
+        self.rng = rng or random
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的随机等待时间（attempt 从 1 开始）"""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def run(self, provider: str, func: Callable[[], str],
+            throttle: Optional[ProviderThrottle] = None) -> str:
+        """执行 func，可重试的错误按策略重试，其余错误直接抛出"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func()
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in RETRYABLE or attempt >= self.max_attempts:
+                    raise
+
+                server_wait = retry_after_seconds(getattr(e, 'headers', None))
+                if server_wait is not None:
+                    if server_wait > self.max_delay:
+                        # 要等太久：交给路由换提供商，比干等划算
+                        raise
+                    wait = server_wait + self.rng.uniform(0, 0.5)
+                    if throttle is not None and kind == RATE_LIMITED:
+                        throttle.pause_for(wait)
+                else:
+                    wait = self.backoff(attempt)
+
+                self.stats.record_retry(provider, wait)
+                print(f"🔁 {provider} {kind}（{e}），{wait:.1f} 秒后第 {attempt + 1} 次尝试")
+                self.sleep(wait)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""标题空间索引：不再靠随机抽取加拒绝来找没用过的标题
+
+每个模板的 (标题句式, 词表取值) 组合用一个混合进制整数编号：
+先按句式分段，段内按该句式用到的各个词表做混合进制编码。编号可以直接
+解码出标题和话题键，不需要把所有标题存下来。
+
+每个分类维护一张"已用"位图和一个未用编号数组（配合位置表做交换删除），
+于是：
+  - 从未用集合里均匀抽一个是 O(1)；
+  - 剩余数量随时可得；
+  - 分类平衡按权重先抽分类，而不是抽到了再以 30% 的概率拒绝。
+
+文章库越满，旧的拒绝采样越是几乎每次都落空；这里抽样成本和已用多少无关。
+"""
+
+import random
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+# 模板里不是词表的字段
+NON_POOL_KEYS = ('category', 'title_patterns', 'content_structure', 'topic_slots')
+
+
+def resolve_pool(template: Dict, name: str) -> List[str]:
+    """根据占位符名字找到对应的词表：breed → breeds，nutrition → nutrition"""
+    pools = {k: v for k, v in template.items() if k not in NON_POOL_KEYS}
+    pool = pools.get(name) or pools.get(name + 's') \
+        or next((v for k, v in pools.items() if k.rstrip('s') == name), None)
+    return pool or []
+
+
+class TemplateSpace:
+    """单个模板（分类）的全部标题组合，按混合进制编号"""
+
+    def __init__(self, template: Dict):
+        self.category = template['category']
+        self.content_structure = template['content_structure']
+        self.topic_slots = template.get('topic_slots', [])
+        self._patterns = []
+        self._offsets = []
+        offset = 0
+        for pattern in template['title_patterns']:
+            names = list(dict.fromkeys(PLACEHOLDER.findall(pattern)))
+            pools = [resolve_pool(template, name) for name in names]
+            size = 1
+            for pool in pools:
+                size *= len(pool)
+            self._patterns.append((pattern, names, pools))
+            self._offsets.append(offset)
+            offset += size
+        self.size = offset
+
+    def decode(self, index: int) -> Tuple[str, str]:
+        """编号 → (标题, 话题键)"""
+        which = bisect_right(self._offsets, index) - 1
+        pattern, names, pools = self._patterns[which]
+        rest = index - self._offsets[which]
+        values = {}
+        # 最后一个词表是最低位
+        for name, pool in zip(reversed(names), reversed(pools)):
+            rest, digit = divmod(rest, len(pool))
+            values[name] = pool[digit]
+        title = pattern.format(**values)
+        # 话题键只由标题里真正出现的话题词决定
+        topic_values = [values[slot] for slot in self.topic_slots if slot in values]
+        topic_key = '_'.join([self.category] + topic_values)
+        return title, topic_key
+
+
+class TitleSpace:
+    """所有分类的标题空间，支持 O(1) 均匀抽取未用标题"""
+
+    def __init__(self, templates: List[Dict], used_titles: Iterable[str] = (),
+                 used_topics: Iterable[str] = ()):
+        self.spaces = {t['category']: TemplateSpace(t) for t in templates}
+        self.blocked_titles = set(used_titles)
+        self.blocked_topics = set(used_topics)
+
+        self._used = {}
+        self._free = {}
+        self._pos = {}
+        self._by_title = {}
+        self._by_topic = {}
+        for category, space in self.spaces.items():
+            used = bytearray(space.size)
+            free = []
+            pos = [-1] * space.size
+            for index in range(space.size):
+                title, topic_key = space.decode(index)
+                self._by_title.setdefault(title, []).append((category, index))
+                self._by_topic.setdefault(topic_key, []).append((category, index))
+                if title in self.blocked_titles or topic_key in self.blocked_topics:
+                    used[index] = 1
+                else:
+                    pos[index] = len(free)
+                    free.append(index)
+            self._used[category] = used
+            self._free[category] = free
+            self._pos[category] = pos
+
+    def remaining(self, category: Optional[str] = None) -> int:
+        """还有多少个可用组合"""
+        if category is not None:
+            return len(self._free.get(category, ()))
+        return sum(len(free) for free in self._free.values())
+
+    def total(self) -> int:
+        return sum(space.size for space in self.spaces.values())
+
+    def _take(self, category: str, index: int) -> None:
+        used = self._used[category]
+        if used[index]:
+            return
+        used[index] = 1
+        free, pos = self._free[category], self._pos[category]
+        slot = pos[index]
+        last = free.pop()
+        if last != index:
+            free[slot] = last
+            pos[last] = slot
+        pos[index] = -1
+
+    def _give_back(self, category: str, index: int) -> None:
+        used = self._used[category]
+        if not used[index]:
+            return
+        title, topic_key = self.spaces[category].decode(index)
+        if title in self.blocked_titles or topic_key in self.blocked_topics:
+            return
+        used[index] = 0
+        self._pos[category][index] = len(self._free[category])
+        self._free[category].append(index)
+
+    def mark_used(self, title: str, topic_key: str) -> None:
+        """登记一个标题/话题已被占用：同标题、同话题的组合都不再抽到"""
+        self.blocked_titles.add(title)
+        self.blocked_topics.add(topic_key)
+        for category, index in self._by_title.get(title, []) + self._by_topic.get(topic_key, []):
+            self._take(category, index)
+
+    def release(self, title: str, topic_key: str) -> None:
+        """撤销 mark_used（预留了但最终没生成出来的创意）"""
+        self.blocked_titles.discard(title)
+        self.blocked_topics.discard(topic_key)
+        for category, index in self._by_title.get(title, []) + self._by_topic.get(topic_key, []):
+            self._give_back(category, index)
+
+    def sample(self, weights: Optional[Dict[str, float]] = None,
+               category: Optional[str] = None, rng=random) -> Optional[Dict]:
+        """抽一个未用的创意；先按权重选分类，再在分类内均匀抽，全部用尽返回 None"""
+        if category is not None:
+            if not self._free.get(category):
+                return None
+        else:
+            weights = weights or {}
+            candidates = [(c, weights.get(c, 1.0)) for c, free in self._free.items() if free]
+            candidates = [(c, w) for c, w in candidates if w > 0]
+            if not candidates:
+                return None
+            pick = rng.random() * sum(w for _, w in candidates)
+            for category, weight in candidates:
+                pick -= weight
+                if pick < 0:
+                    break
+
+        free = self._free[category]
+        index = free[rng.randrange(len(free))]
+        space = self.spaces[category]
+        title, topic_key = space.decode(index)
+        return {
+            "title": title,
+            "category": category,
+            "content_structure": space.content_structure,
+            "topic_key": topic_key
+        }
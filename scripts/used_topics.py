@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""已用话题记录（used_topics.json）
+
+以前这个文件是几个不断追加的列表，查重靠 `x in list`，每多一篇文章
+就多一项，还把 articles.json 里已有的标题又存了一遍。现在：
+
+- 内存里用 set，查重是常数时间；
+- 磁盘上只存排好序的话题键，以及 articles.json 里没有的零星旧标题；
+  已发布的标题和分类计数都以 articles.json 为准，加载时从那里同步，
+  文件不会随文章库一起膨胀，CI 提交时的 diff 也稳定。
+
+兼容两种旧格式：纯列表（只有话题键）和 {"topics", "titles", "categories"}。
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+FORMAT_VERSION = 2
+
+
+class UsedTopics:
+    """已用的话题键和标题，以及各分类已发布的篇数"""
+
+    def __init__(self, topics: Iterable[str] = (), titles: Iterable[str] = (),
+                 categories: Optional[Dict[str, int]] = None):
+        self.topics = set(topics)
+        self.titles = set(titles)
+        self.categories = Counter(categories or {})
+
+    @classmethod
+    def load(cls, path: str = 'used_topics.json',
+             published: Optional[List[Dict]] = None) -> 'UsedTopics':
+        """读取 used_topics.json，并用 articles.json 的内容同步标题和分类计数"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+
+        # 兼容旧格式
+        if isinstance(data, list):
+            data = {"topics": data}
+
+        used = cls(data.get("topics", []), data.get("titles", []), data.get("categories", {}))
+        if published is not None:
+            used.titles.update(a['title'] for a in published if a.get('title'))
+            used.categories = Counter(a['category'] for a in published if a.get('category'))
+        return used
+
+    def has_topic(self, topic_key: str) -> bool:
+        return topic_key in self.topics
+
+    def has_title(self, title: str) -> bool:
+        return title in self.titles
+
+    def add(self, topic_key: str, title: str, category: str) -> None:
+        self.topics.add(topic_key)
+        self.titles.add(title)
+        self.categories[category] += 1
+
+    def save(self, path: str = 'used_topics.json',
+             published_titles: Iterable[str] = ()) -> None:
+        """写回磁盘：话题键排好序，已经在 articles.json 里的标题不再重复保存"""
+        published_titles = set(published_titles)
+        data = {
+            "version": FORMAT_VERSION,
+            "topics": sorted(self.topics),
+            "titles": sorted(self.titles - published_titles),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+            f.write('\n')
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""HTTP 客户端：会话和连接池配置、连接复用；流式对话按 UTF-8 解析 SSE、
+非 200 抛 ProviderError、太久没有新内容就中止"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import ai_clients  # noqa: E402
+from ai_clients import (PROVIDER_ENDPOINTS, ProviderClient, StreamStalledError,  # noqa: E402
+                        create_client)
+from provider_router import ProviderError  # noqa: E402
+from throttle import RATE_LIMITED, classify_error  # noqa: E402
+
+
+def sse(content):
+    return ('data: ' + json.dumps({'choices': [{'delta': {'content': content}}]},
+                                  ensure_ascii=False)).encode('utf-8')
+
+
+class FakeResponse:
+    """模拟 requests 的流式响应；没有 charset，和很多提供商的 text/event-stream 一样"""
+
+    def __init__(self, lines, status_code=200, headers=None, on_line=None):
+        self.lines = lines
+        self.status_code = status_code
+        self.headers = headers or {'Content-Type': 'text/event-stream'}
+        self.text = 'rate limited'
+        self.encoding = None
+        self.on_line = on_line
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self.lines:
+            if self.on_line:
+                self.on_line()
+            if decode_unicode:
+                # requests 在没有 charset 时的行为
+                line = line.decode('iso-8859-1')
+            yield line
+
+    def close(self):
+        self.closed = True
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """keep-alive 的本地接口：把收到的请求头原样返回"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps(dict(self.headers)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_pool_and_timeouts():
+    client = ProviderClient('openai', 'https://example.invalid/chat', pool_size=8,
+                            connect_timeout=2, read_timeout=90)
+    assert client.timeout == (2, 90)
+    adapter = client.session.get_adapter('https://example.invalid/chat')
+    assert client.session.get_adapter('http://example.invalid/chat') is adapter
+    assert adapter._pool_maxsize == 8
+    # 重试交给上层，urllib3 不能自己重发
+    assert adapter.max_retries.total == 0
+    assert client.session.headers['Content-Type'] == 'application/json'
+
+    sent = {}
+    client.session.post = lambda url, **kwargs: sent.update(kwargs, url=url)
+    client.post_json({'messages': []}, 'sk-test')
+    assert sent['url'] == 'https://example.invalid/chat'
+    assert sent['timeout'] == (2, 90)
+    assert sent['headers'] == {'Authorization': 'Bearer sk-test'}
+    client.post_json({}, 'sk-test', timeout=(1, 5))
+    assert sent['timeout'] == (1, 5)
+
+
+def test_claude_auth_headers():
+    client = ProviderClient('claude', PROVIDER_ENDPOINTS['claude'])
+    sent = {}
+    client.session.post = lambda url, **kwargs: sent.update(kwargs)
+    client.post_json({}, 'sk-ant', headers={'X-Extra': '1'})
+    assert sent['headers']['x-api-key'] == 'sk-ant'
+    assert 'anthropic-version' in sent['headers'] and sent['headers']['X-Extra'] == '1'
+    assert 'Authorization' not in sent['headers']
+
+
+def test_create_client_reads_http_config():
+    client = create_client('qwen', {'pool_size': 2, 'connect_timeout': 3, 'read_timeout': 30})
+    assert client.endpoint == PROVIDER_ENDPOINTS['qwen']
+    assert client.timeout == (3, 30)
+    assert client.session.get_adapter(client.endpoint)._pool_maxsize == 2
+    assert create_client('zhipu').timeout == (5.0, 60.0)
+    with pytest.raises(ValueError):
+        create_client('unknown')
+
+
+def test_connections_are_reused():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ProviderClient('openai', f'http://127.0.0.1:{server.server_port}/chat')
+    try:
+        for _ in range(3):
+            response = client.post_json({'messages': []}, 'key')
+            assert response.json()['Authorization'] == 'Bearer key'
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+    assert client.stats.requests == 3
+    assert client.stats.opened == 1 and client.stats.reused == 2
+
+
+def make_client(response):
+    client = ProviderClient('openai', 'https://example.invalid/chat')
+    client.session.post = lambda *args, **kwargs: response
+    return client
+
+
+def test_stream_decodes_utf8_lines():
+    response = FakeResponse([b': keep-alive', b'', sse('你好'), b'', sse('，猫咪'),
+                             b'data: {"choices": [{"delta": {}}]}', b'data: [DONE]', sse('多余')])
+    chunks = list(make_client(response).stream_chat({'messages': []}, 'key'))
+    assert chunks == ['你好', '，猫咪']
+    assert response.closed
+
+
+def test_stream_error_is_provider_error():
+    response = FakeResponse([], status_code=429, headers={'Retry-After': '3'})
+    with pytest.raises(ProviderError) as excinfo:
+        list(make_client(response).stream_chat({'messages': []}, 'key'))
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers['Retry-After'] == '3'
+    assert classify_error(excinfo.value) == RATE_LIMITED
+
+
+def test_stream_stalls_on_heartbeats_only(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ai_clients.time, 'monotonic', lambda: now[0])
+
+    def tick():
+        now[0] += 4
+
+    response = FakeResponse([sse('开头')] + [b': ping'] * 10 + [sse('太晚了')], on_line=tick)
+    stream = make_client(response).stream_chat({'messages': []}, 'key', stall_timeout=10)
+    assert next(stream) == '开头'
+    with pytest.raises(StreamStalledError):
+        list(stream)
+    assert response.closed
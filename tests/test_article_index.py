@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""文章索引：清洗时整份重写不会吞掉并发追加的事件，压缩后分片和 manifest 与快照一致"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_index import ArticleIndex  # noqa: E402
+
+
+def make_index(tmp_path):
+    return ArticleIndex(str(tmp_path / 'articles.json'), str(tmp_path / 'articles.journal.jsonl'),
+                        str(tmp_path / 'shards'), page_size=2)
+
+
+def article(slug, category='品种介绍'):
+    return {'slug': slug, 'title': slug.upper(), 'category': category, 'date': '2026-01-01'}
+
+
+def test_rewrite_holds_lock_against_appends(tmp_path):
+    index = make_index(tmp_path)
+    index.add([article('b'), article('a')])
+    index.compact()
+    index.add([article('dup-of-a')])
+
+    other = make_index(tmp_path)
+    appended = threading.Event()
+
+    def concurrent_append():
+        other.add([article('late')])
+        appended.set()
+
+    def transform(articles):
+        thread = threading.Thread(target=concurrent_append)
+        thread.start()
+        time.sleep(0.1)
+        # 追加要等 rewrite 释放锁
+        assert not appended.is_set()
+        transform.thread = thread
+        return [a for a in articles if a['slug'] != 'dup-of-a']
+
+    before, after = index.rewrite(transform)
+    transform.thread.join()
+    assert [a['slug'] for a in before] == ['dup-of-a', 'b', 'a']
+    assert [a['slug'] for a in after] == ['b', 'a']
+    assert [a['slug'] for a in index.load()] == ['late', 'b', 'a']
+
+
+def test_rewrite_dry_run_writes_nothing(tmp_path):
+    index = make_index(tmp_path)
+    index.add([article('a')])
+    before, after = index.rewrite(lambda articles: [], dry_run=True)
+    assert [a['slug'] for a in before] == ['a'] and after == []
+    assert not os.path.exists(index.snapshot_path)
+    assert index.pending_events() == 1
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_shards_match_snapshot_after_compact(tmp_path):
+    index = make_index(tmp_path)
+    index.add([article('a'), article('b', '幼猫护理'), article('c'), article('d', '营养饮食'),
+               article('e')])
+    index.compact()
+    assert os.path.exists(tmp_path / 'shards' / 'nutrition-1.json')
+    index.retitle('c', '新标题')
+    index.delete('d')
+    index.compact()
+
+    snapshot = read_json(index.snapshot_path)
+    assert [a['slug'] for a in snapshot] == ['a', 'b', 'c', 'e']
+    shards = tmp_path / 'shards'
+    manifest = read_json(shards / 'manifest.json')
+    assert manifest['total'] == len(snapshot) and manifest['pageSize'] == 2
+    assert manifest['hash'] == hashlib.sha256(json.dumps(
+        snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
+
+    # 按顺序拼起所有分页就是完整的快照
+    assert [a for page in manifest['pages'] for a in read_json(shards / page)] == snapshot
+    for category, info in manifest['categories'].items():
+        entries = [a for page in info['pages'] for a in read_json(shards / page)]
+        assert entries == [a for a in snapshot if a['category'] == category]
+        assert info['count'] == len(entries)
+    assert set(manifest['categories']) == {'品种介绍', '幼猫护理'}
+
+    # 营养饮食分类空了，它的旧分片被删掉，目录里只剩 manifest 列出的文件
+    listed = {'manifest.json'} | set(manifest['pages']) | {
+        page for info in manifest['categories'].values() for page in info['pages']}
+    assert set(os.listdir(shards)) == listed
+
+
+def test_unmapped_categories_get_separate_shards(tmp_path):
+    index = make_index(tmp_path)
+    index.add([article('a', '新手指南'), article('b', '猫咪冷知识'), article('c', '新手指南')])
+    snapshot = index.compact()
+
+    shards = tmp_path / 'shards'
+    manifest = read_json(shards / 'manifest.json')
+    guide, trivia = manifest['categories']['新手指南'], manifest['categories']['猫咪冷知识']
+    assert guide['slug'] != trivia['slug'] and guide['slug'].startswith('cat-')
+    assert not set(guide['pages']) & set(trivia['pages'])
+    assert [a['slug'] for page in guide['pages'] for a in read_json(shards / page)] == ['a', 'c']
+    assert [a['slug'] for page in trivia['pages'] for a in read_json(shards / page)] == ['b']
+    assert len(snapshot) == 3
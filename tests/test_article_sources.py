@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""文章源文件和构建清单：保存原文后可以逐字节重建页面，输入没变就跳过"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_sources import load_source, make_source, save_source  # noqa: E402
+from build_manifest import BuildManifest  # noqa: E402
+from page_template import render_article_page  # noqa: E402
+from rebuild import rebuild  # noqa: E402
+
+BASE_URL = 'https://www.example.com'
+MARKDOWN = '## 引言\n\n幼猫到家第一周最重要的是让它慢慢熟悉环境。\n\n- 准备猫砂盆'
+
+
+def test_rebuild_reproduces_generated_page_and_skips_unchanged(tmp_path):
+    sources, articles = tmp_path / 'sources', tmp_path / 'articles'
+    articles.mkdir()
+    path = save_source(make_source('kitten-care-1', '幼猫到家第一周', '幼猫护理', '2025-03-01', MARKDOWN),
+                       str(sources))
+    # 固定 mtime，同样的内容压缩结果逐字节相同
+    with open(path, 'rb') as f:
+        first = f.read()
+    save_source(load_source(path), str(sources))
+    with open(path, 'rb') as f:
+        assert f.read() == first
+
+    assert rebuild([path], BASE_URL, str(articles), workers=1) == ['kitten-care-1']
+    expected = render_article_page('幼猫到家第一周', '幼猫护理', MARKDOWN, '2025-03-01', 'kitten-care-1', BASE_URL)
+    assert (articles / 'kitten-care-1.html').read_text(encoding='utf-8') == expected
+    assert rebuild([path], BASE_URL, str(articles), workers=1) == []
+
+
+def test_manifest_skips_current_articles_and_unchanged_outputs(tmp_path):
+    sources, articles = tmp_path / 'sources', tmp_path / 'articles'
+    articles.mkdir()
+    path = save_source(make_source('kitten-care-1', '幼猫到家第一周', '幼猫护理', '2025-03-01', MARKDOWN),
+                       str(sources))
+    manifest = BuildManifest(str(tmp_path / 'build-manifest.json'))
+    assert rebuild([path], BASE_URL, str(articles), workers=1, manifest=manifest) == ['kitten-care-1']
+    manifest.save()
+
+    # 页面被改坏了，但输入没变：清单说是最新的就不再渲染
+    (articles / 'kitten-care-1.html').write_text('stale', encoding='utf-8')
+    manifest = BuildManifest(str(tmp_path / 'build-manifest.json'))
+    assert rebuild([path], BASE_URL, str(articles), workers=1, manifest=manifest) == []
+    assert rebuild([path], BASE_URL, str(articles), workers=1, manifest=manifest, force=True) == ['kitten-care-1']
+
+    feed = str(tmp_path / 'feed.xml')
+    assert manifest.write_output(feed, 'key-1', lambda: '<rss>1</rss>')
+    assert not manifest.write_output(feed, 'key-1', lambda: '<rss>2</rss>')
+    assert manifest.write_output(feed, 'key-2', lambda: '<rss>2</rss>')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""样式回填（现在是 html_migrations 的包装）：快速检查只看文件头和 mmap，
+处理过的页面不再改写；刚渲染的页面只跳过渲染时已注册的迁移"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_style import ARTICLE_STYLE  # noqa: E402
+from backfill_article_style import backfill, needs_backfill  # noqa: E402
+from build_manifest import BuildManifest  # noqa: E402
+from html_migrations import migration_ids, run_migrations  # noqa: E402
+
+OLD_PAGE = """<html><head>
+    <link rel="stylesheet" href="../assets/css/style.css">
+</head><body><a href="https://www.example.com/#/stories/breed-1">x</a></body></html>"""
+
+
+def test_backfill_then_fast_check_skips(tmp_path):
+    page = tmp_path / 'breed-1.html'
+    page.write_text(OLD_PAGE, encoding='utf-8')
+    assert needs_backfill(str(page))
+
+    changes = backfill(str(page))
+    assert changes['style'] and changes['urls'] == 1 and changes['output']
+    html = page.read_text(encoding='utf-8')
+    assert ARTICLE_STYLE in html and '/#/stories/' not in html
+    assert not needs_backfill(str(page))
+    assert needs_backfill(str(page), 'external')
+
+    # 正文里冒出 hash 地址也能被 mmap 查到
+    page.write_text(html.replace('</body>', '<a href="https://x.com/#/stories/a">y</a></body>'), encoding='utf-8')
+    assert needs_backfill(str(page))
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_rendered_pages_skip_only_migrations_in_force_at_render_time(tmp_path):
+    articles = tmp_path / 'articles'
+    articles.mkdir()
+    for slug in ('breed-1', 'breed-2', 'breed-3'):
+        (articles / f'{slug}.html').write_text(OLD_PAGE, encoding='utf-8')
+    ids = migration_ids('inline')
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    # 渲染时全部迁移都已注册：不打开
+    manifest.record_article('breed-1', 'src', 'out', migrations=ids)
+    # 渲染之后才注册了 0003：只执行 0003
+    manifest.record_article('breed-2', 'src', 'out',
+                            migrations=[i for i in ids if i != '0003-real-article-urls'])
+    # 旧清单没有记录渲染时的迁移：全部执行
+    manifest.record_article('breed-3', 'src', 'out')
+
+    stats = run_migrations(str(articles), workers=1, manifest=manifest)
+    assert stats['up_to_date'] == 1 and stats['changed'] == 2
+    assert (articles / 'breed-1.html').read_text(encoding='utf-8') == OLD_PAGE
+    html = (articles / 'breed-2.html').read_text(encoding='utf-8')
+    assert '/#/stories/' not in html and 'style.css' in html
+    html = (articles / 'breed-3.html').read_text(encoding='utf-8')
+    assert '/#/stories/' not in html and 'style.css' not in html
+    for slug in ('breed-1', 'breed-2', 'breed-3'):
+        assert manifest.applied_migrations(slug) == ids
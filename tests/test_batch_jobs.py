@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""批处理：本地替身走完 提交 → 轮询 → 取回，批量生成端到端不发网络请求"""
+
+import copy
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from batch_jobs import (LocalBatchBackend, OpenAIBatchBackend, build_batch_line,  # noqa: E402
+                        write_batch_input)
+from site_config import DEFAULT_CONFIG  # noqa: E402
+
+
+def echo(payload):
+    return '## 回答\n\n' + payload['messages'][0]['content']
+
+
+def test_local_backend_submit_poll_collect(tmp_path):
+    input_path = str(tmp_path / 'in.jsonl')
+    write_batch_input(input_path, [
+        build_batch_line('article-0', {'messages': [{'role': 'user', 'content': '甲'}]}),
+        build_batch_line('article-1', {'messages': [{'role': 'user', 'content': '乙'}]}),
+    ])
+
+    pending = LocalBatchBackend(str(tmp_path / 'jobs'))
+    job_id = pending.submit(input_path)
+    assert pending.status(job_id) == 'in_progress'
+
+    backend = LocalBatchBackend(str(tmp_path / 'jobs'), responder=echo)
+    job_id = backend.submit(input_path)
+    assert backend.status(job_id) == 'completed'
+    assert backend.wait(job_id, poll_interval=0) == {'article-0': '## 回答\n\n甲',
+                                                     'article-1': '## 回答\n\n乙'}
+
+
+def test_generate_articles_batch_with_local_backend(tmp_path, monkeypatch):
+    import generate_article
+
+    monkeypatch.chdir(tmp_path)
+    generator = generate_article.ArticleGenerator()
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config['cache']['enabled'] = False
+    config['batch'] = {'backend': 'local', 'dir': str(tmp_path / 'batches'), 'poll_interval': 0}
+    generator.config = config
+    generator.response_cache = None
+
+    infos = generator.generate_articles_batch(3, backend=LocalBatchBackend(config['batch']['dir'], echo))
+    assert len(infos) == 3
+    assert len({info['title'] for info in infos}) == 3
+    for info in infos:
+        with open(os.path.join('articles', f"{info['slug']}.html"), encoding='utf-8') as f:
+            assert info['title'] in f.read()
+
+    generator.compact_articles_index()
+    with open('articles.json', encoding='utf-8') as f:
+        indexed = json.load(f)
+    assert [a['slug'] for a in indexed] == [info['slug'] for info in reversed(infos)]
+
+
+def test_openai_upload_is_multipart():
+    import requests
+
+    # 即使传入的 session 默认带 JSON 的 Content-Type，上传文件也要是 multipart
+    session = requests.Session()
+    session.headers['Content-Type'] = 'application/json'
+    sent = {}
+
+    def fake_send(request, **kwargs):
+        sent.setdefault('content_type', request.headers.get('Content-Type'))
+        raise RuntimeError('stop')
+
+    session.send = fake_send
+    backend = OpenAIBatchBackend('key', session=session)
+    try:
+        backend.submit(__file__)
+    except RuntimeError:
+        pass
+    assert sent['content_type'].startswith('multipart/form-data; boundary=')
+    assert OpenAIBatchBackend('key').session.headers.get('Content-Type') is None
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""统一构建：某个阶段失败后面的阶段照常执行，最后报出失败的阶段并以非零状态退出"""
+
+import argparse
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import build  # noqa: E402
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    ran = []
+
+    def stage(name, error=None):
+        def run(ctx):
+            ran.append((name, ctx))
+            if error:
+                raise error
+        return run
+
+    monkeypatch.setattr(build, 'STAGES', {
+        'generate': stage('generate', RuntimeError('AI 接口全挂了')),
+        'index': stage('index'),
+        'render': stage('render', OSError('磁盘满了')),
+        'sitemap': stage('sitemap'),
+        'feeds': stage('feeds'),
+    })
+    return ran
+
+
+def test_failed_stage_does_not_stop_pipeline(fake_stages):
+    ctx = object()
+    failed = build.run_pipeline(['feeds', 'generate', 'sitemap', 'render', 'index'], ctx)
+    assert failed == ['generate', 'render']
+    # 按 STAGES 的顺序执行，不是按传入的顺序；所有阶段拿到同一个 ctx
+    assert [name for name, _ in fake_stages] == ['generate', 'index', 'render', 'sitemap', 'feeds']
+    assert all(c is ctx for _, c in fake_stages)
+
+
+def test_main_exit_status_and_stage_selection(fake_stages, monkeypatch):
+    monkeypatch.setattr(build, 'BuildContext', lambda workers=None, force=False: object())
+    assert build.main(['--skip', 'generate,render']) == 0
+    assert [name for name, _ in fake_stages] == ['index', 'sitemap', 'feeds']
+
+    fake_stages.clear()
+    assert build.main(['--stages', 'render,feeds']) == 1
+    assert [name for name, _ in fake_stages] == ['render', 'feeds']
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        build.parse_stage_list('sitemap,deploy')
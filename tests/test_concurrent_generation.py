@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""并发生成：结果按预留顺序登记，失败的标题会释放，全部失败时报出真正的原因"""
+
+import copy
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_article  # noqa: E402
+from generate_article import GenerationFailedError, TopicExhaustedError  # noqa: E402
+from site_config import DEFAULT_CONFIG  # noqa: E402
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = generate_article.ArticleGenerator()
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config['concurrency']['max_workers'] = 4
+    generator.config = config
+    generator.committed = []
+    generator.commit_articles = lambda results: generator.committed.extend(results)
+    return generator
+
+
+def test_order_preserved_and_failures_released(generator):
+    remaining = generator.title_space.remaining()
+    reserve = generator.reserve_article_ideas
+    reserved = []
+    generator.reserve_article_ideas = lambda count: reserved.extend(reserve(count)) or reserved
+
+    def write_article(idea):
+        i = reserved.index(idea)
+        # 先提交的后完成，打乱完成顺序
+        time.sleep(0.05 * (3 - i))
+        if i == 1:
+            raise RuntimeError('接口挂了')
+        return {'title': idea['title']}
+
+    generator.write_article = write_article
+    infos = generator.generate_articles_concurrently(4)
+
+    expected = [reserved[i]['title'] for i in (0, 2, 3)]
+    assert [info['title'] for info in infos] == expected
+    assert [idea['title'] for idea, _ in generator.committed] == expected
+    # 成功的 3 个仍然占用，失败的那个已经放回候选池
+    blocked = generator.title_space.blocked_titles
+    assert all(title in blocked for title in expected)
+    assert reserved[1]['title'] not in blocked
+    assert generator.title_space.remaining() < remaining
+
+
+def test_all_failures_raise_with_last_error(generator):
+    remaining = generator.title_space.remaining()
+
+    def write_article(idea):
+        raise RuntimeError('未配置 openai API密钥')
+
+    generator.write_article = write_article
+    with pytest.raises(GenerationFailedError, match='未配置 openai API密钥') as excinfo:
+        generator.generate_articles_concurrently(3)
+    assert not isinstance(excinfo.value, TopicExhaustedError)
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+    assert generator.title_space.remaining() == remaining
+    assert generator.committed == []
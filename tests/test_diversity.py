@@ -1 +1,109 @@
- 
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""标题空间：抽到的一定是没用过的组合，用尽时能立刻知道"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from title_space import TitleSpace, TemplateSpace  # noqa: E402
+
+TEMPLATES = [
+    {
+        "category": "品种介绍",
+        "topic_slots": ["breed"],
+        "title_patterns": ["{breed}猫品种详解", "认识{breed}猫"],
+        "content_structure": ["起源"],
+        "breeds": ["布偶", "暹罗", "缅因"],
+    },
+    {
+        "category": "用品测评",
+        "topic_slots": ["product"],
+        "title_patterns": ["{product}选购指南", "{product}深度测评：{count}款产品对比"],
+        "content_structure": ["评测"],
+        "products": ["猫粮", "猫砂"],
+        "counts": ["5", "8"],
+    },
+]
+
+
+def test_every_index_decodes_to_a_distinct_title():
+    space = TemplateSpace(TEMPLATES[1])
+    titles = [space.decode(i)[0] for i in range(space.size)]
+    assert space.size == 2 + 2 * 2
+    assert len(set(titles)) == space.size
+    assert "猫砂深度测评：8款产品对比" in titles
+
+
+def test_topic_key_only_uses_topic_slots():
+    space = TemplateSpace(TEMPLATES[1])
+    keys = {space.decode(i)[1] for i in range(space.size)}
+    assert keys == {"用品测评_猫粮", "用品测评_猫砂"}
+
+
+def test_used_titles_and_topics_are_never_sampled():
+    space = TitleSpace(TEMPLATES, used_titles={"认识布偶猫"}, used_topics={"用品测评_猫粮"})
+    # 布偶整个话题都被一个已用标题占掉的只有那一个标题；猫粮话题整个被占
+    assert space.remaining("品种介绍") == 5
+    assert space.remaining("用品测评") == 3
+    rng = random.Random(0)
+    for _ in range(200):
+        idea = space.sample(rng=rng)
+        assert idea["title"] != "认识布偶猫"
+        assert idea["topic_key"] != "用品测评_猫粮"
+
+
+def test_sampling_until_exhausted_yields_each_topic_once():
+    space = TitleSpace(TEMPLATES)
+    rng = random.Random(1)
+    seen = []
+    while True:
+        idea = space.sample(rng=rng)
+        if idea is None:
+            break
+        space.mark_used(idea["title"], idea["topic_key"])
+        seen.append(idea["topic_key"])
+    # 每个话题只会被写一次
+    assert sorted(seen) == sorted(["品种介绍_布偶", "品种介绍_暹罗", "品种介绍_缅因",
+                                   "用品测评_猫粮", "用品测评_猫砂"])
+    assert space.remaining() == 0
+
+
+def test_release_returns_reserved_combinations():
+    space = TitleSpace(TEMPLATES)
+    before = space.remaining()
+    space.mark_used("猫粮选购指南", "用品测评_猫粮")
+    assert space.remaining() == before - 3
+    space.release("猫粮选购指南", "用品测评_猫粮")
+    assert space.remaining() == before
+
+
+def test_category_weights_bias_sampling():
+    space = TitleSpace(TEMPLATES)
+    rng = random.Random(2)
+    picks = [space.sample({"品种介绍": 1.0, "用品测评": 0.0}, rng=rng)["category"] for _ in range(50)]
+    assert set(picks) == {"品种介绍"}
+
+
+def test_used_topics_syncs_with_published_index(tmp_path):
+    import json
+    from used_topics import UsedTopics
+
+    path = tmp_path / 'used_topics.json'
+    # 旧格式：纯话题键列表
+    path.write_text(json.dumps(["品种介绍_布偶", "行为训练_抓家具"], ensure_ascii=False), encoding='utf-8')
+    published = [{"title": "认识暹罗猫", "category": "品种介绍"},
+                 {"title": "猫砂选购指南", "category": "用品测评"}]
+
+    used = UsedTopics.load(str(path), published)
+    assert used.has_topic("品种介绍_布偶")
+    assert used.has_title("认识暹罗猫")
+    assert used.categories == {"品种介绍": 1, "用品测评": 1}
+
+    used.add("用品测评_猫粮", "猫粮选购指南", "用品测评")
+    used.save(str(path), published_titles={"认识暹罗猫", "猫砂选购指南"})
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data["topics"] == sorted(["品种介绍_布偶", "行为训练_抓家具", "用品测评_猫粮"])
+    # 已经在 articles.json 里的标题不再重复保存
+    assert data["titles"] == ["猫粮选购指南"]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""feed 的 top-K 选取：新→旧的索引直接取前 K 篇，顺序乱了也和整表排序结果一致；
+全站和各分类订阅源在同一次遍历里分桶"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from generate_rss import newest_articles, select_newest  # noqa: E402
+
+
+def article(slug, date, category=None):
+    return {'slug': slug, 'date': date, 'category': category}
+
+
+def test_newest_articles_ordered_and_shuffled():
+    ordered = [article('c', '2026-03-01'), article('b', '2026-02-01'), article('c', '2026-01-01'),
+               article('a', '2026-01-01')]
+    assert [a['slug'] for a in newest_articles(ordered, 2)] == ['c', 'b']
+    assert [a['slug'] for a in newest_articles(ordered, 5)] == ['c', 'b', 'a']
+
+    shuffled = [article('a', '2026-01-01'), article('c', '2026-01-01'), article('b', '2026-02-01'),
+                article('c', '2026-03-01'), article('d', '2026-01-01')]
+    newest = newest_articles(shuffled, 3)
+    assert [(a['slug'], a['date']) for a in newest] == [('c', '2026-03-01'), ('b', '2026-02-01'),
+                                                        ('a', '2026-01-01')]
+
+
+def test_select_newest_fans_out_to_categories():
+    articles = [article(f'a-{i}', f'2026-01-{31 - i:02d}', '品种介绍' if i % 3 else '健康护理')
+                for i in range(30)]
+    groups = select_newest(articles, 4, ['品种介绍', '健康护理', '营养饮食'])
+    assert [a['slug'] for a in groups[None]] == ['a-0', 'a-1', 'a-2', 'a-3']
+    assert [a['slug'] for a in groups['健康护理']] == ['a-0', 'a-3', 'a-6', 'a-9']
+    assert [a['slug'] for a in groups['品种介绍']] == ['a-1', 'a-2', 'a-4', 'a-5']
+    assert groups['营养饮食'] == []
+
+    shuffled = articles[:]
+    random.Random(7).shuffle(shuffled)
+    assert select_newest(shuffled, 4, ['品种介绍', '健康护理', '营养饮食']) == groups
+
+
+def test_select_newest_reads_only_the_head():
+    class Counting(list):
+        consumed = 0
+
+        def __iter__(self):
+            for item in list.__iter__(self):
+                Counting.consumed += 1
+                yield item
+
+    head = [article(f'n-{i}', f'2026-02-{28 - i:02d}', '品种介绍') for i in range(10)]
+    # 尾部即使顺序乱了也不会被读到
+    tail = [article('old', '2025-01-01', '品种介绍'), article('odd', '2026-12-31', '品种介绍')]
+    groups = select_newest(Counting(head + tail * 1000), 3, ['品种介绍'])
+    assert [a['slug'] for a in groups[None]] == ['n-0', 'n-1', 'n-2']
+    assert Counting.consumed == 3
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""generate_article 的启动开销：导入不拉进 HTTP 客户端、不读 .env，构造不碰文件系统"""
+
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+import generate_article  # noqa: E402
+
+# 只在真正请求AI接口时才需要的依赖
+HEAVY_MODULES = ('requests', 'urllib3', 'dotenv', 'ai_clients')
+# 只防止严重退化；包含解释器启动后的首次编译，不是精确的性能指标
+IMPORT_BUDGET_US = 500_000
+
+
+def import_times(module: str) -> dict:
+    """用 python -X importtime 在新进程里导入 module，返回 {模块名: 累计微秒}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_skips_heavy_dependencies():
+    times = import_times('generate_article')
+    # site 启动时自己导入的模块（比如 certifi）不算
+    baseline = import_times('sys')
+    loaded = set(times) - set(baseline)
+    assert not [m for m in loaded if m.split('.')[0] in HEAVY_MODULES]
+    assert times['generate_article'] < IMPORT_BUDGET_US
+
+
+def test_constructor_has_no_side_effects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = generate_article.ArticleGenerator()
+    assert os.getcwd() == str(tmp_path)
+    assert os.listdir(tmp_path) == []
+    assert 'config' not in vars(generator) and 'title_space' not in vars(generator)
+    # 不需要配置和索引的功能直接可用
+    assert generator.generate_slug('新手养猫指南', '新手指南')
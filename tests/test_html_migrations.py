@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""HTML 迁移：一次读写应用全部待执行迁移，构建清单记住已应用的 ID；
+命令行默认跟随 config.json 的样式模式"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_style import ARTICLE_STYLE  # noqa: E402
+from build_manifest import BuildManifest  # noqa: E402
+import html_migrations  # noqa: E402
+from html_migrations import migration_ids, migrations_for, run_migrations  # noqa: E402
+from site_config import load_site_config  # noqa: E402
+
+OLD_PAGE = """<html><head>
+    <link rel="stylesheet" href="../assets/css/style.css">
+</head><body><a href="https://www.example.com/#/stories/breed-1">x</a></body></html>"""
+
+
+def test_run_migrations_records_ids_and_skips_next_time(tmp_path):
+    articles = tmp_path / 'articles'
+    articles.mkdir()
+    (articles / 'breed-1.html').write_text(OLD_PAGE, encoding='utf-8')
+    (articles / 'breed-2.html').write_text(OLD_PAGE.replace('breed-1', 'breed-2'), encoding='utf-8')
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+
+    stats = run_migrations(str(articles), workers=1, manifest=manifest)
+    assert stats['changed'] == 2
+    assert all(files == 2 for files, _ in stats['by_migration'].values())
+    html = (articles / 'breed-1.html').read_text(encoding='utf-8')
+    assert ARTICLE_STYLE in html and '/#/stories/' not in html and 'style.css' not in html
+
+    ids = [m.id for m in migrations_for('inline')]
+    manifest = BuildManifest(str(tmp_path / 'manifest.json'))
+    assert manifest.applied_migrations('breed-1') == ids
+    stats = run_migrations(str(articles), workers=1, manifest=manifest)
+    assert stats['up_to_date'] == 2 and stats['changed'] == 0
+
+    # 换样式模式：只有样式迁移待执行，旧模式的记录被替换掉
+    stats = run_migrations(str(articles), style_mode='external', workers=1, manifest=manifest)
+    assert stats['changed'] == 2 and stats['probed_only'] == 0
+    assert manifest.applied_migrations('breed-1') == [m.id for m in migrations_for('external')]
+    assert not list(articles.glob('*.tmp'))
+
+
+def test_cli_style_mode_defaults_to_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'config.json').write_text(json.dumps({'style': {'mode': 'external'}}), encoding='utf-8')
+    (tmp_path / 'articles').mkdir()
+    (tmp_path / 'articles' / 'breed-1.html').write_text(OLD_PAGE, encoding='utf-8')
+    load_site_config.cache_clear()
+    try:
+        assert html_migrations.main(['--workers', '1']) == 0
+    finally:
+        load_site_config.cache_clear()
+
+    html = (tmp_path / 'articles' / 'breed-1.html').read_text(encoding='utf-8')
+    assert '<style data-critical>' in html and ARTICLE_STYLE not in html
+    manifest = BuildManifest(str(tmp_path / 'data' / 'build-manifest.json'))
+    assert manifest.applied_migrations('breed-1') == migration_ids('external')
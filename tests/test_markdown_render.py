@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""单遍 Markdown 渲染器和流式增量渲染"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from markdown_render import IncrementalMarkdownRenderer, render_markdown  # noqa: E402
+
+SAMPLE = """## 喂食要点
+
+幼猫每天需要**少量多餐**，可以参考 `3-4 次` 的频率。
+*不要*突然换粮。
+
+- 选择幼猫粮
+- 保证饮水
+
+1. 第一周：原粮
+2. 第二周：混合
+
+> 💡 提示：换粮要循序渐进
+
+> 猫咪不是小狗
+
+| 月龄 | 餐数 |
+| --- | ---: |
+| 2-4 | **4** |
+
+```
+a * b
+
+c
+```
+"""
+
+
+def test_blocks_and_inline_markup():
+    html = render_markdown(SAMPLE)
+    assert '<h2>喂食要点</h2>' in html
+    assert '<p>幼猫每天需要<strong>少量多餐</strong>，可以参考 <code>3-4 次</code> 的频率。\n<em>不要</em>突然换粮。</p>' in html
+    assert '<ul>\n  <li>选择幼猫粮</li>\n  <li>保证饮水</li>\n</ul>' in html
+    assert '<ol>\n  <li>第一周：原粮</li>\n  <li>第二周：混合</li>\n</ol>' in html
+    assert '<div class="tip-box">💡 <strong>提示：</strong>换粮要循序渐进</div>' in html
+    assert '<blockquote>猫咪不是小狗</blockquote>' in html
+    assert '<th>月龄</th><th style="text-align: right">餐数</th>' in html
+    assert '<td>2-4</td><td style="text-align: right"><strong>4</strong></td>' in html
+    assert '<pre><code>a * b\n\nc</code></pre>' in html
+
+
+def test_ordered_list_split_by_blank_line_keeps_numbering():
+    assert render_markdown('3. 第三步') == '<ol start="3">\n  <li>第三步</li>\n</ol>'
+
+
+def test_incremental_matches_whole_document_even_across_code_fences():
+    renderer = IncrementalMarkdownRenderer()
+    blocks = []
+    for i in range(0, len(SAMPLE), 7):
+        blocks.extend(renderer.feed(SAMPLE[i:i + 7]))
+    blocks.extend(renderer.close())
+    assert '\n\n'.join(blocks) == render_markdown(SAMPLE)
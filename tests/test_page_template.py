@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""文章页模板：解析一次，bind 站点常量后逐篇渲染；模板版本只随布局和渲染器版本变"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_style import ARTICLE_CSS, CRITICAL_CSS, STYLESHEET_NAME, write_stylesheet  # noqa: E402
+import build_manifest  # noqa: E402
+from page_template import PageTemplate, render_article_page  # noqa: E402
+
+
+def test_bind_merges_constants_and_render_fills_slots():
+    template = PageTemplate('<a href="{{base}}/{{slug}}.html">{ {{title}} }</a>')
+    bound = template.bind(base='https://example.com')
+    assert bound.slots == {'slug', 'title'}
+    # 值里出现的 {{...}} 不会被当成槽位
+    html = bound.render(slug='x', title='{{slug}}')
+    assert html == '<a href="https://example.com/x.html">{ {{slug}} }</a>'
+    assert bound.render_bytes(slug='x', title='猫') == '<a href="https://example.com/x.html">{ 猫 }</a>'.encode('utf-8')
+
+
+def test_article_page_uses_site_url_everywhere():
+    page = render_article_page('布偶猫：性格', '品种介绍', '## 引言\n\n布偶猫是一种性格非常温顺的大型猫咪。',
+                               '2025-01-02', 'breed-1234', 'https://www.example.com')
+    assert page.count('https://www.example.com/articles/breed-1234.html') == 4
+    assert '<meta name="keywords" content="养猫,猫咪,品种介绍,布偶猫">' in page
+    assert '<h2>引言</h2>' in page
+    assert '{{' not in page
+
+
+def test_external_style_mode_links_hashed_stylesheet(tmp_path):
+    page = render_article_page('标题', '品种介绍', '正文内容', '2025-01-02', 'breed-1',
+                               'https://www.example.com', style_mode='external')
+    assert f'<link rel="stylesheet" href="/assets/css/{STYLESHEET_NAME}">' in page
+    assert f'<style data-critical>{CRITICAL_CSS}</style>' in page
+    assert '.share-buttons' not in page  # 首屏以外的规则只在外部样式表里
+    assert len(CRITICAL_CSS) < len(ARTICLE_CSS)
+
+    path = write_stylesheet(str(tmp_path))
+    with open(path, encoding='utf-8') as f:
+        assert f.read().strip() == ARTICLE_CSS
+
+
+def test_template_version_tracks_layout_and_renderer_version(monkeypatch):
+    build_manifest.template_version.cache_clear()
+    current = build_manifest.template_version()
+
+    monkeypatch.setattr(build_manifest, 'RENDERER_VERSION', build_manifest.RENDERER_VERSION + 1)
+    build_manifest.template_version.cache_clear()
+    bumped = build_manifest.template_version()
+    monkeypatch.setattr(build_manifest, 'ARTICLE_LAYOUT', build_manifest.ARTICLE_LAYOUT + '\n')
+    build_manifest.template_version.cache_clear()
+    assert len({current, bumped, build_manifest.template_version()}) == 3
+    monkeypatch.undo()
+    build_manifest.template_version.cache_clear()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""熔断器状态机：列出候选不改状态，半开时只放一个试探请求；
+路由的线程池够并发调用用，对冲只在真正发出时计数"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from provider_router import CircuitBreaker, ProviderRouter  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock, threshold=2):
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=60, clock=clock)
+    for _ in range(threshold):
+        assert breaker.try_acquire_probe()
+        breaker.record_failure()
+    assert breaker.state == 'open'
+    return breaker
+
+
+def test_open_half_open_closed():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    assert not breaker.is_available() and not breaker.try_acquire_probe()
+
+    clock.now += 60
+    # 列候选是只读的，反复问也不会把它变成 half_open
+    assert breaker.is_available() and breaker.is_available()
+    assert breaker.state == 'open'
+
+    assert breaker.try_acquire_probe()
+    assert breaker.state == 'half_open'
+    # 试探请求还在路上：不再放行第二个，也不出现在候选里
+    assert not breaker.try_acquire_probe()
+    assert not breaker.is_available()
+
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+    assert breaker.try_acquire_probe() and breaker.try_acquire_probe()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.try_acquire_probe()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.is_available()
+    # 重新计冷却时间
+    clock.now += 59
+    assert not breaker.try_acquire_probe()
+    clock.now += 1
+    assert breaker.try_acquire_probe()
+
+
+def test_released_probe_can_be_retaken():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.try_acquire_probe()
+    breaker.release_probe()
+    assert breaker.is_available() and breaker.try_acquire_probe()
+
+
+def test_router_recovers_provider_after_cooldown():
+    calls = []
+    failing = {'primary'}
+
+    def call_provider(provider, prompt, max_tokens):
+        calls.append(provider)
+        if provider in failing:
+            raise RuntimeError('boom')
+        return f'{provider}:{prompt}'
+
+    router = ProviderRouter(['primary', 'backup'], call_provider,
+                            {'failure_threshold': 1, 'reset_timeout': 0})
+    try:
+        assert router.call('a', 10) == ('backup:a', 'backup')
+        assert router.breakers['primary'].state == 'open'
+        # 冷却结束：列候选不会吃掉试探名额，试探成功后主提供商恢复
+        assert router.healthy_providers() == ['primary', 'backup']
+        failing.clear()
+        assert router.call('b', 10) == ('primary:b', 'primary')
+        assert router.breakers['primary'].state == 'closed'
+        assert router.healthy_providers() == ['primary', 'backup']
+    finally:
+        router.close()
+
+
+def test_pool_fits_concurrent_calls_with_one_provider():
+    def call_provider(provider, prompt, max_tokens):
+        time.sleep(0.3)
+        return prompt
+
+    router = ProviderRouter(['openai'], call_provider, max_concurrency=3)
+    try:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda p: router.call(p, 10), ['a', 'b', 'c']))
+        # 三个调用同时进行，不会有一个排在别人后面
+        assert time.monotonic() - started < 0.55
+        assert results == [('a', 'openai'), ('b', 'openai'), ('c', 'openai')]
+    finally:
+        router.close()
+
+
+def test_hedge_counted_only_when_launched():
+    clock = FakeClock()
+    release = threading.Event()
+
+    def call_provider(provider, prompt, max_tokens):
+        release.wait(2)
+        return provider
+
+    router = ProviderRouter(['slow', 'backup'], call_provider,
+                            {'hedging': {'enabled': True, 'default_delay': 0.05}})
+    router.breakers['backup'] = open_breaker(clock)
+    try:
+        # backup 在 healthy_providers 之后才被熔断：候选里有它，但拿不到放行
+        router.healthy_providers = lambda: ['slow', 'backup']
+        threading.Timer(0.2, release.set).start()
+        assert router.call('a', 10) == ('slow', 'slow')
+        assert router.hedges_fired == 0
+    finally:
+        router.close()
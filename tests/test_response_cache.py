@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""AI 响应缓存：命中时离线回放，不发网络请求"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import response_cache  # noqa: E402
+from response_cache import EVICT_EVERY, STALE_TMP_SECONDS, ResponseCache  # noqa: E402
+
+
+def test_key_depends_on_every_parameter():
+    base = ResponseCache.make_key('openai', 'gpt-4o', '写一篇文章', 3000, 0.7)
+    assert base == ResponseCache.make_key('openai', 'gpt-4o', '写一篇文章', 3000, 0.7)
+    assert base != ResponseCache.make_key('zhipu', 'gpt-4o', '写一篇文章', 3000, 0.7)
+    assert base != ResponseCache.make_key('openai', 'glm-4', '写一篇文章', 3000, 0.7)
+    assert base != ResponseCache.make_key('openai', 'gpt-4o', '写两篇文章', 3000, 0.7)
+    assert base != ResponseCache.make_key('openai', 'gpt-4o', '写一篇文章', 2000, 0.7)
+    assert base != ResponseCache.make_key('openai', 'gpt-4o', '写一篇文章', 3000, 0.5)
+
+
+def test_put_then_get_round_trips(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('ab' * 32, '## 标题\n\n正文')
+    assert cache.get('ab' * 32) == '## 标题\n\n正文'
+    assert cache.get('cd' * 32) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_seconds=60)
+    cache.put('ab' * 32, '旧内容')
+    path = cache._path('ab' * 32)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert cache.get('ab' * 32) is None
+    assert not os.path.exists(path)
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 9, max_age_seconds=float('inf'))
+    for i, key in enumerate(('aa' * 32, 'bb' * 32, 'cc' * 32)):
+        cache.put(key, 'x' * 1000)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    cache.max_bytes = 2500
+    cache.evict()
+    assert cache.get('aa' * 32) is None
+    assert cache.get('bb' * 32) == 'x' * 1000
+    assert cache.get('cc' * 32) == 'x' * 1000
+
+
+def test_batch_puts_do_not_rescan_every_time(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 9)
+    scans = []
+    walk = os.walk
+    monkeypatch.setattr(response_cache.os, 'walk', lambda *a: scans.append(1) or walk(*a))
+    for i in range(2 * EVICT_EVERY):
+        cache.put(f'{i:064x}', 'x' * 100)
+    # 第一次写入时扫描一次建立总大小，之后每 EVICT_EVERY 条扫一次
+    assert len(scans) == 2
+    assert cache._size == sum(os.path.getsize(cache._path(f'{i:064x}')) for i in range(2 * EVICT_EVERY))
+
+
+def test_crossing_size_limit_evicts_immediately(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=2500, max_age_seconds=float('inf'))
+    for i, key in enumerate(('aa' * 32, 'bb' * 32, 'cc' * 32)):
+        cache.put(key, 'x' * 1000)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    assert not os.path.exists(cache._path('aa' * 32))
+    assert cache._size <= 2500
+
+
+def test_stale_tmp_files_are_swept(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('ab' * 32, '内容')
+    stale = tmp_path / 'ab' / ('cd' * 32 + '.json.123.tmp')
+    fresh = tmp_path / 'ab' / ('ef' * 32 + '.json.456.tmp')
+    stale.write_text('{"comp', encoding='utf-8')
+    fresh.write_text('{"comp', encoding='utf-8')
+    old = time.time() - STALE_TMP_SECONDS - 10
+    os.utime(stale, (old, old))
+    cache.evict()
+    assert not stale.exists()
+    assert fresh.exists()
+    assert cache.get('ab' * 32) == '内容'
+
+
+def test_call_ai_api_replays_cached_response_offline(tmp_path, monkeypatch):
+    import generate_article
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    generator = generate_article.ArticleGenerator.__new__(generate_article.ArticleGenerator)
+    generator.config = {'ai_provider': 'openai'}
+    generator.response_cache = ResponseCache(str(tmp_path))
+
+    key = generator._response_cache_key('openai', '提示词', 3000)
+    generator.response_cache.put(key, '## 缓存里的文章')
+
+    # 没有API密钥、也没有HTTP客户端：只要发了网络请求就会报错
+    assert generator.call_ai_api('提示词', max_tokens=3000) == '## 缓存里的文章'
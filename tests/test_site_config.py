@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""站点配置：缺省值合并、校验错误一次列全、同一进程只读一次"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from site_config import (DEFAULT_BASE_URL, DEFAULT_CONFIG, ConfigError,  # noqa: E402
+                         load_site_config, site_base_url, validate_config)
+
+
+def write_config(tmp_path, data):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_defaults_are_merged_and_cached(tmp_path):
+    path = write_config(tmp_path, {'articles_per_day': 3, 'base_url': 'https://example.com/'})
+    config = load_site_config(path)
+    assert config['articles_per_day'] == 3
+    assert config['base_url'] == 'https://example.com'
+    assert config['style'] == {'mode': 'inline'}
+    assert load_site_config(path) is config
+
+
+def test_partial_sections_keep_default_subkeys(tmp_path):
+    path = write_config(tmp_path, {'router': {'failure_threshold': 5, 'hedging': {'enabled': True}},
+                                   'concurrency': {'rate_limits': {'openai': {'requests_per_minute': 60}}}})
+    config = load_site_config(path)
+    assert config['router']['failure_threshold'] == 5
+    assert config['router']['reset_timeout'] == DEFAULT_CONFIG['router']['reset_timeout']
+    assert config['router']['hedging'] == {**DEFAULT_CONFIG['router']['hedging'], 'enabled': True}
+    assert config['concurrency'] == {'max_workers': 1,
+                                     'rate_limits': {'openai': {'requests_per_minute': 60}}}
+    # 默认值本身没有被改动
+    assert DEFAULT_CONFIG['router']['failure_threshold'] == 3
+    assert DEFAULT_CONFIG['concurrency']['rate_limits'] == {}
+
+
+def test_missing_file_uses_defaults_without_writing(tmp_path):
+    path = str(tmp_path / 'missing.json')
+    assert load_site_config(path)['base_url'] == DEFAULT_BASE_URL
+    assert not os.path.exists(path)
+
+
+def test_all_problems_reported(tmp_path):
+    path = write_config(tmp_path, {'ai_provider': 'gpt', 'articles_per_day': True,
+                                   'concurrency': {'max_workers': 0},
+                                   'ai_providers': ['openai', 'bard'], 'base_url': 'www.x.com'})
+    with pytest.raises(ConfigError) as excinfo:
+        load_site_config(path)
+    message = str(excinfo.value)
+    for key in ('ai_provider ', 'articles_per_day', 'concurrency.max_workers', 'bard', 'base_url'):
+        assert key in message
+    assert validate_config(load_site_config(str(tmp_path / 'missing.json'))) == []
+
+
+def test_cname_wins_over_config(tmp_path):
+    path = write_config(tmp_path, {'base_url': 'https://example.com'})
+    cname = tmp_path / 'CNAME'
+    assert site_base_url(path, str(cname)) == 'https://example.com'
+    cname.write_text('www.example.org\n', encoding='utf-8')
+    assert site_base_url(path, str(cname) + '') == 'https://example.com'  # 缓存
+    site_base_url.cache_clear()
+    assert site_base_url(path, str(cname)) == 'https://www.example.org'
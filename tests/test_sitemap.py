@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""流式 sitemap：到上限自动分卷并生成 sitemap index，卷数变少时删掉多余分卷；
+文章的 lastmod 取页面文件的修改时间（UTC）"""
+
+import calendar
+import gzip
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from article_index import ArticleIndex  # noqa: E402
+from generate_sitemap import SitemapGenerator, SitemapWriter  # noqa: E402
+
+
+def write(path, count, **limits):
+    writer = SitemapWriter(str(path), 'https://example.com', today='2026-01-01', **limits)
+    for i in range(count):
+        writer.add(f'https://example.com/articles/a-{i}.html', lastmod='2025-01-01')
+    key = writer.close()
+    return writer, key
+
+
+def test_split_into_index_and_back(tmp_path):
+    path = tmp_path / 'sitemap.xml'
+    writer, key = write(path, 5, max_urls=2)
+    files = writer.commit()
+    assert [os.path.basename(f) for f in files] == ['sitemap.xml', 'sitemap-1.xml', 'sitemap-2.xml', 'sitemap-3.xml']
+    index = path.read_text(encoding='utf-8')
+    assert '<sitemapindex' in index and '<loc>https://example.com/sitemap-3.xml</loc>' in index
+    part = (tmp_path / 'sitemap-3.xml').read_bytes()
+    assert part.count(b'<url>') == 1 and part.endswith(b'</urlset>')
+    assert gzip.decompress((tmp_path / 'sitemap-3.xml.gz').read_bytes()) == part
+
+    # 输入键只取决于条目和上限，不受当天日期影响
+    other, other_key = write(tmp_path / 'other.xml', 5, max_urls=2)
+    other.discard()
+    assert other_key == key
+
+    writer, _ = write(path, 1)
+    writer.commit(stale_parts=files[1:])
+    assert sorted(os.listdir(tmp_path)) == ['sitemap.xml', 'sitemap.xml.gz']
+    assert '<urlset' in path.read_text(encoding='utf-8')
+
+
+@pytest.fixture
+def shanghai_tz(monkeypatch):
+    # 本地时区比 UTC 快 8 小时，按本地时间取日期就会错一天
+    if not hasattr(time, 'tzset'):
+        pytest.skip('需要 time.tzset')
+    monkeypatch.setenv('TZ', 'Asia/Shanghai')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_article_lastmod_is_file_mtime_in_utc(tmp_path, monkeypatch, shanghai_tz):
+    monkeypatch.chdir(tmp_path)
+    index = ArticleIndex(str(tmp_path / 'articles.json'), str(tmp_path / 'articles.journal.jsonl'), None)
+    index.add([{'slug': s, 'title': s, 'category': '品种介绍', 'date': '2020-01-01'}
+               for s in ('late', 'early', 'missing', 'empty', 'early')])
+    os.mkdir('articles')
+    for slug, stamp in (('late', '2025-03-01 23:30:00'), ('early', '2025-02-10 01:00:00')):
+        path = os.path.join('articles', f'{slug}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<html></html>')
+        mtime = calendar.timegm(time.strptime(stamp, '%Y-%m-%d %H:%M:%S'))
+        os.utime(path, (mtime, mtime))
+    open(os.path.join('articles', 'empty.html'), 'w').close()
+
+    generator = SitemapGenerator('https://example.com', str(tmp_path / 'sitemap.xml'), today='2026-01-01')
+    generator.scan_articles(index)
+    generator.writer.close()
+    generator.writer.commit()
+
+    xml = (tmp_path / 'sitemap.xml').read_text(encoding='utf-8')
+    assert xml.count('<url>') == 2
+    assert ('<loc>https://example.com/articles/late.html</loc>\n'
+            '    <lastmod>2025-03-01</lastmod>') in xml
+    assert ('<loc>https://example.com/articles/early.html</loc>\n'
+            '    <lastmod>2025-02-10</lastmod>') in xml
+    assert 'missing.html' not in xml and 'empty.html' not in xml
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""流式生成文章：逐块渲染的页面和一次性渲染的一样，不留临时文件"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_article  # noqa: E402
+from site_config import DEFAULT_CONFIG  # noqa: E402
+
+ARTICLE = """## 小标题
+
+第一段，**加粗**。
+
+```python
+print(1)
+
+print(2)
+```
+
+- 列表一
+- 列表二
+
+> 💡 提示：多喝水"""
+
+
+def test_streamed_page_matches_full_render(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = generate_article.ArticleGenerator()
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config['streaming']['enabled'] = True
+    generator.config = config
+    generator.stream_ai_api = lambda prompt, max_tokens: (ARTICLE[i:i + 7] for i in range(0, len(ARTICLE), 7))
+    idea = {'title': '猫咪喝水', 'category': '健康护理', 'content_structure': ['为什么']}
+
+    info = generator.write_article(idea)
+    assert os.listdir('articles') == [f"{info['slug']}.html"]
+    with open(os.path.join('articles', f"{info['slug']}.html"), encoding='utf-8') as f:
+        streamed = f.read()
+    assert streamed == generator.create_article_html(idea['title'], idea['category'], ARTICLE,
+                                                     info['date'], info['slug'])
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""重试与限流：错误分类、Retry-After 解析、退避范围、令牌桶补充（全部用注入的时钟）"""
+
+import email.utils
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from ai_clients import StreamStalledError  # noqa: E402
+from provider_router import ProviderError  # noqa: E402
+from throttle import (FATAL, NETWORK_ERROR, RATE_LIMITED, SERVER_ERROR,  # noqa: E402
+                      ProviderThrottle, RetryPolicy, TokenBucket, classify_error,
+                      retry_after_seconds)
+
+NOW = 1_700_000_000.0
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_classify_error():
+    import requests
+
+    assert classify_error(ProviderError('openai', 429)) == RATE_LIMITED
+    for status in (500, 503, 408, 409):
+        assert classify_error(ProviderError('openai', status)) == SERVER_ERROR
+    for status in (400, 401, 404):
+        assert classify_error(ProviderError('openai', status)) == FATAL
+    assert classify_error(requests.exceptions.ConnectTimeout()) == NETWORK_ERROR
+    assert classify_error(requests.exceptions.ConnectionError()) == NETWORK_ERROR
+    assert classify_error(StreamStalledError()) == NETWORK_ERROR
+    assert classify_error(TimeoutError()) == NETWORK_ERROR
+    assert classify_error(ValueError('bad json')) == FATAL
+
+
+def test_retry_after_seconds_and_http_date():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds({'Retry-After': '7'}, NOW) == 7
+    assert retry_after_seconds({'retry-after-ms': '1500', 'Retry-After': '7'}, NOW) == 1.5
+    http_date = email.utils.formatdate(NOW + 30, usegmt=True)
+    assert retry_after_seconds({'Retry-After': http_date}, NOW) == 30
+    # 已经过去的时间不会变成负数
+    assert retry_after_seconds({'Retry-After': email.utils.formatdate(NOW - 30, usegmt=True)}, NOW) == 0
+    assert retry_after_seconds({'Retry-After': 'soon'}, NOW) is None
+
+
+def test_retry_after_from_reset_headers():
+    headers = {'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '6m0s',
+               'x-ratelimit-remaining-tokens': '100', 'x-ratelimit-reset-tokens': '1h'}
+    assert retry_after_seconds(headers, NOW) == 360
+    assert retry_after_seconds({'x-ratelimit-remaining-tokens': '0',
+                                'x-ratelimit-reset-tokens': '20ms'}, NOW) == pytest.approx(0.02)
+    anthropic = {'anthropic-ratelimit-requests-remaining': '0',
+                 'anthropic-ratelimit-requests-reset': '2023-11-14T22:13:27Z'}
+    assert retry_after_seconds(anthropic, NOW) == 7
+    assert retry_after_seconds({'x-ratelimit-reset-requests': '1s'}, NOW) is None
+
+
+def test_backoff_bounds():
+    policy = RetryPolicy(base_delay=1, max_delay=5, rng=random.Random(1))
+    for attempt, cap in ((1, 1), (2, 2), (3, 4), (4, 5), (10, 5)):
+        samples = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= s <= cap for s in samples)
+        assert max(samples) > cap * 0.8
+
+
+def test_retry_policy_run():
+    clock = FakeClock()
+    policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=10, sleep=clock.sleep,
+                         rng=random.Random(0))
+    errors = [ProviderError('openai', 503), ProviderError('openai', 429, headers={'Retry-After': '2'})]
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    throttle = ProviderThrottle(clock=clock, sleep=clock.sleep)
+    assert policy.run('openai', flaky, throttle) == 'ok'
+    assert len(clock.slept) == 2
+    assert 0 <= clock.slept[0] <= 1
+    assert 2 <= clock.slept[1] <= 2.5
+    assert policy.stats.retries == {'openai': 2}
+
+    # 不可重试、等太久、次数用完：都直接抛出
+    with pytest.raises(ProviderError):
+        policy.run('openai', lambda: (_ for _ in ()).throw(ProviderError('openai', 401)))
+    with pytest.raises(ProviderError):
+        policy.run('openai', lambda: (_ for _ in ()).throw(
+            ProviderError('openai', 429, headers={'Retry-After': '60'})))
+    slept = len(clock.slept)
+    with pytest.raises(ProviderError):
+        policy.run('openai', lambda: (_ for _ in ()).throw(ProviderError('openai', 500)))
+    assert len(clock.slept) == slept + 2
+
+
+def test_token_bucket_refill_and_cap():
+    bucket = TokenBucket(60, now=0)
+    assert bucket.reserve(60, 0) == 0
+    # 空桶：每秒补 1 个
+    assert bucket.reserve(1, 0) == pytest.approx(1)
+    assert bucket.reserve(1, 2) == pytest.approx(0)
+    # 闲置很久也最多攒满一桶
+    assert bucket.reserve(60, 1000) == 0
+    assert bucket.reserve(1, 1000) == pytest.approx(1)
+    # 比整桶还大的请求按桶容量算，不会永远等下去
+    big = TokenBucket(10, now=0)
+    assert big.reserve(1000, 0) == 0
+    assert big.reserve(1000, 0) == pytest.approx(60)
+
+
+def test_provider_throttle_limits_and_pause():
+    clock = FakeClock()
+    throttle = ProviderThrottle(requests_per_minute=2, tokens_per_minute=1000,
+                                clock=clock, sleep=clock.sleep)
+    with throttle.slot(100):
+        pass
+    with throttle.slot(100):
+        pass
+    assert clock.slept == []
+    # 每分钟 2 次：第三次要等 30 秒
+    with throttle.slot(100):
+        pass
+    assert clock.slept == [pytest.approx(30)]
+
+    throttle.pause_for(45)
+    with throttle.slot(0):
+        pass
+    assert clock.slept[-1] == pytest.approx(45)
+    assert throttle.stats.throttle_wait == pytest.approx(75)
@@ -10,8 +10,11 @@ export default defineConfig({
       targets: [
         { src: 'config.json', dest: 'dist' },
         { src: 'articles.json', dest: 'dist' },
-        { src: 'sitemap.xml', dest: 'dist' },
+        { src: 'data/articles/*', dest: 'dist/data/articles' },
+        { src: 'sitemap*.xml*', dest: 'dist' },
         { src: 'feed.xml', dest: 'dist' },
+        { src: 'atom.xml', dest: 'dist' },
+        { src: 'feeds/*', dest: 'dist/feeds' },
         { src: 'robots.txt', dest: 'dist' },
         { src: 'articles/**/*', dest: 'dist/articles' },
         // { src: 'assets/**/*', dest: 'dist/assets' }, // 注释掉，因为这是旧版本的资源